@@ -0,0 +1,126 @@
+from typing import List, Optional
+from crypto_queries import CryptoQueries
+from query_builder import Query, QueryParameter, TransferTable, time_filter, wallet_transfers, window_parameters
+
+def sampled(table: TransferTable, sample_percent: float) -> TransferTable:
+    """
+    The same transfer table read through TABLESAMPLE, so a query scans and bills only the sampled blocks.
+
+    Args:
+        table (TransferTable): The transfer table
+        sample_percent (float): Share of the table's blocks to read, in percent
+
+    Returns:
+        TransferTable: The sampled table
+    """
+    return TransferTable(f"{table.table} TABLESAMPLE SYSTEM ({sample_percent:g} PERCENT)",
+                         table.from_column, table.to_column)
+
+def day_window(days: int) -> List[QueryParameter]:
+    """
+    Window parameters starting at midnight (UTC), so approximate queries made during a day share their results.
+
+    Args:
+        days (int): Number of days to look back
+
+    Returns:
+        List[QueryParameter]: The @start_time parameter
+    """
+    start = window_parameters(days)[0]
+    return [QueryParameter(start.name, start.type, start.value.replace(hour=0, minute=0))]
+
+def approximate_top_tokens(wallet_ids: List[str], days: int, limit: int, sample_percent: float) -> Query:
+    """
+    Build the sampled per-token raw volume query behind approximate top tokens.
+
+    Like CryptoQueries.top_tokens, but over a sample of the token transfers;
+    sampled_transfers, sent_raw and received_raw are sample totals, scaled
+    up on the client.
+
+    Args:
+        wallet_ids (List[str]): The Ethereum wallet addresses to query
+        days (int): Number of days to look back
+        limit (int): Unused; the top tokens are picked on the client
+        sample_percent (float): Share of the table's blocks to read, in percent
+
+    Returns:
+        Query: The parameterized query
+    """
+    window = day_window(days)
+    transfers = wallet_transfers(sampled(CryptoQueries.TOKEN_TRANSFERS, sample_percent),
+        CryptoQueries.TOKEN_SENT_COLUMNS, time_filter(window), received_columns=CryptoQueries.TOKEN_RECEIVED_COLUMNS)
+    sql = f"""
+    WITH matched AS ({transfers})
+    SELECT
+        wallet_id,
+        token_address,
+        COUNT(*) AS sampled_transfers,
+        SUM(sent_raw) AS sent_raw,
+        SUM(received_raw) AS received_raw
+    FROM matched
+    GROUP BY wallet_id, token_address
+    ORDER BY wallet_id
+    """
+    parameters = (QueryParameter("wallet_ids", "STRING", tuple(wallet_ids)), *window)
+    return Query(sql, parameters, "top_tokens_approximate")
+
+def approximate_wallet_info(wallet_ids: List[str], days: int, limit: Optional[int], sample_percent: float) -> Query:
+    """
+    Build the sampled wallet info query (first seen, transaction and counterparty counts, contract status).
+
+    Transactions are sampled; the contract lookup reads one row per
+    wallet and stays exact. sampled_transactions is a sample total, scaled
+    up on the client, and sampled_counterparties an APPROX_COUNT_DISTINCT
+    over the sample, a lower bound on the wallet's counterparties.
+
+    Args:
+        wallet_ids (List[str]): The Ethereum wallet addresses to query
+        days (int): Number of days to look back
+        limit (Optional[int]): Unused; there is one row per wallet
+        sample_percent (float): Share of the table's blocks to read, in percent
+
+    Returns:
+        Query: The parameterized query
+    """
+    window = day_window(days)
+    transactions = wallet_transfers(sampled(CryptoQueries.TRANSACTIONS, sample_percent),
+        "block_timestamp, to_address AS counterparty", time_filter(window),
+        received_columns="block_timestamp, from_address AS counterparty"
+    )
+    sql = f"""
+    WITH matched AS ({transactions}),
+
+    wallet_stats AS (
+        SELECT
+            wallet_id,
+            MIN(block_timestamp) AS first_seen,
+            COUNT(*) AS sampled_transactions,
+            APPROX_COUNT_DISTINCT(counterparty) AS sampled_counterparties
+        FROM matched
+        GROUP BY wallet_id
+    ),
+
+    contracts AS (
+        SELECT DISTINCT address
+        FROM {CryptoQueries.CONTRACTS_TABLE}
+        WHERE address IN UNNEST(@wallet_ids)
+            AND {time_filter(window)}
+    )
+
+    SELECT
+        wallet_id,
+        ws.first_seen,
+        IFNULL(ws.sampled_transactions, 0) AS sampled_transactions,
+        IFNULL(ws.sampled_counterparties, 0) AS sampled_counterparties,
+        wallet_id IN (SELECT address FROM contracts) AS is_contract
+    FROM UNNEST(@wallet_ids) AS wallet_id
+    LEFT JOIN wallet_stats ws USING (wallet_id)
+    """
+    parameters = (QueryParameter("wallet_ids", "STRING", tuple(wallet_ids)), *window)
+    return Query(sql, parameters, "wallet_info_approximate")
+
+# Sampled query builder of each query kind with an approximate mode
+APPROXIMATE_BUILDERS = {
+    "top_tokens": approximate_top_tokens,
+    "wallet_info": approximate_wallet_info,
+}
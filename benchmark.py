@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+import numpy as np
+import fake_bigquery
+from compact_format import dumps
+
+# Single-wallet targets: MCP tools and the CryptoClient methods behind them
+TOOL_TARGETS = ["get_usdc_transactions", "get_eth_transfers", "get_sol_transfers",
+                "get_top_tokens", "get_wallet_info", "load_wallet_profile", "get_wallet_profile"]
+CLIENT_TARGETS = ["get_usdc_transactions", "get_eth_transfers", "get_sol_transfers",
+                  "get_top_tokens", "get_wallet_info", "load_wallet_profile", "get_wallet_profile"]
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Isolate the run from local state: fresh cache, no history store, no budgets, BigQuery backend."""
+    os.environ.update({
+        "PROJECT_ID": "benchmark",
+        "QUERY_BACKEND": "bigquery",
+        "QUERY_CACHE_DIR": tempfile.mkdtemp(prefix="benchmark-cache-"),
+        "TOKEN_INDEX_PATH": os.path.join(tempfile.mkdtemp(prefix="benchmark-tokens-"), "tokens.db"),
+        "QUERY_CACHE_TTL_SECONDS": str(args.cache_ttl),
+        "MICRO_BATCH_WINDOW_MS": str(args.batch_window_ms),
+        "GOVERNOR_CALLER_BUDGET_GB": "0",
+        "GOVERNOR_GLOBAL_BUDGET_GB": "0",
+        "GOVERNOR_JOBS_PER_MINUTE": "0",
+        "GOVERNOR_MAX_JOBS_PER_CALLER": "0",
+        "BIGQUERY_HEDGE_PERCENTILE": str(args.hedge_percentile),
+    })
+    os.environ.pop("WALLET_HISTORY_DB", None)
+
+def build_targets(names: List[str], compact: bool = False) -> Dict[str, Callable[[str], Awaitable[Any]]]:
+    """Resolve "tool.<name>" and "client.<name>" target names to coroutine functions of a wallet address."""
+    import mcp_server
+    from crypto_client import crypto_client
+
+    async def profile_summary(wallet_id: str) -> Dict[str, Any]:
+        profile = await crypto_client.load_wallet_profile(wallet_id)
+        return profile.summary(crypto_client.DEFAULT_TRANSACTION_LIMIT)
+
+    targets = {f"tool.{name}": functools.partial(getattr(mcp_server, name), compact=compact) for name in TOOL_TARGETS}
+    targets.update({f"client.{name}": getattr(crypto_client, name) for name in CLIENT_TARGETS})
+    targets["client.load_wallet_profile"] = profile_summary
+    return {name: targets[name] for name in names} if names else targets
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def run_target(fn: Callable[[str], Awaitable[Any]], first_wallet: int, args: argparse.Namespace,
+                     client: "fake_bigquery.FakeBigQueryClient") -> Dict[str, Any]:
+    """
+    Call one target args.requests times at args.concurrency and summarize the calls.
+
+    Args:
+        fn: The target, called with a wallet address
+        first_wallet (int): Number of the target's first wallet, so targets don't share cached results
+        args (argparse.Namespace): The benchmark options
+        client (FakeBigQueryClient): The stand-in client, for job and byte counts
+
+    Returns:
+        Dict[str, Any]: Latency percentiles, throughput, serialization time, jobs and bytes per request
+    """
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies, serialization, rows, sizes = [], [], [], []
+    counters_before = dict(client.counters)
+
+    async def call(i: int) -> None:
+        wallet_number = first_wallet + (i % args.wallet_pool if args.wallet_pool else i)
+        async with slots:
+            started = time.perf_counter()
+            result = await fn(f"0x{wallet_number:040x}")
+            latencies.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        sizes.append(len(dumps(result)))
+        serialization.append(time.perf_counter() - started)
+        rows.append(len(result) if isinstance(result, list) else 1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "throughput_rps": round(args.requests / elapsed, 2),
+        "serialize_ms_mean": round(float(np.mean(serialization)) * 1000, 3),
+        "rows_per_request": round(float(np.mean(rows)), 1),
+        "response_kb_mean": round(float(np.mean(sizes)) / 1024, 2),
+        "jobs_per_request": (client.counters["jobs"] - counters_before["jobs"]) / args.requests,
+        "dry_runs_per_request": (client.counters["dry_runs"] - counters_before["dry_runs"]) / args.requests,
+        "cancelled_jobs_per_request": (client.counters["cancelled"] - counters_before["cancelled"]) / args.requests,
+        "gb_per_request": round((client.counters["bytes_processed"] - counters_before["bytes_processed"])
+                                / args.requests / 1e9, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+def measure_row_conversion(row_count: int) -> Dict[str, float]:
+    """Microseconds per row spent turning result pages into dictionaries."""
+    from bigquery_client import BigQueryClient
+    rows = fake_bigquery.ROW_GENERATORS["eth_transfers"]("0x" + "0" * 40, row_count, random.Random(0))
+    started = time.perf_counter()
+    BigQueryClient._next_page_rows(iter([rows]))
+    return {"pages_us_per_row": round((time.perf_counter() - started) / row_count * 1e6, 3)}
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def compare(baseline: Dict[str, Any], report: Dict[str, Any]) -> None:
+    """Print the relative change of each target's latency and throughput against a baseline report."""
+    for name, result in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        changes = ", ".join(
+            f"{metric} {(result[metric] - previous[metric]) / previous[metric] * 100:+.1f}%"
+            for metric in ("p50_ms", "p95_ms", "throughput_rps") if previous[metric]
+        )
+        print(f"{name}: {changes}")
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    from bigquery_client import bigquery_client
+    targets = build_targets(args.targets.split(",") if args.targets else [], args.compact)
+    results = {}
+    for number, (name, fn) in enumerate(targets.items()):
+        results[name] = await run_target(fn, number * 1_000_000, args, bigquery_client.client)
+        print(f"{name}: {results[name]}", file=sys.stderr)
+    return {
+        "commit": current_commit(),
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "results": results,
+        "row_conversion": measure_row_conversion(args.conversion_rows),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the MCP tools against an emulated BigQuery")
+    parser.add_argument("--targets", help="Comma-separated targets, e.g. tool.get_eth_transfers,client.get_top_tokens")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--wallet-pool", type=int, default=0, help="Distinct wallets per target (0: one per request)")
+    parser.add_argument("--rows-per-wallet", type=int, default=fake_bigquery.FakeProfile.rows_per_wallet)
+    parser.add_argument("--dry-run-latency", type=float, default=fake_bigquery.FakeProfile.dry_run_latency_seconds)
+    parser.add_argument("--job-latency", type=float, default=fake_bigquery.FakeProfile.job_latency_seconds)
+    parser.add_argument("--page-latency", type=float, default=fake_bigquery.FakeProfile.page_latency_seconds)
+    parser.add_argument("--page-size", type=int, default=fake_bigquery.FakeProfile.page_size)
+    parser.add_argument("--gb-per-day", type=float, default=fake_bigquery.FakeProfile.gb_per_day)
+    parser.add_argument("--slow-job-fraction", type=float, default=fake_bigquery.FakeProfile.slow_job_fraction,
+                        help="Share of jobs that stall for --slow-job-latency seconds")
+    parser.add_argument("--slow-job-latency", type=float, default=fake_bigquery.FakeProfile.slow_job_latency_seconds)
+    parser.add_argument("--hedge-percentile", type=float, default=0, help="BIGQUERY_HEDGE_PERCENTILE (0 disables hedging)")
+    parser.add_argument("--cache-ttl", type=float, default=0, help="Result cache TTL (0 measures uncached calls)")
+    parser.add_argument("--batch-window-ms", type=float, default=0, help="Micro-batch window (0 disables batching)")
+    parser.add_argument("--compact", action="store_true", help="Call the tools with compact=True")
+    parser.add_argument("--conversion-rows", type=int, default=100000)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--compare", help="Baseline report to compare against")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    fake_bigquery.install(fake_bigquery.FakeProfile(
+        rows_per_wallet=args.rows_per_wallet,
+        dry_run_latency_seconds=args.dry_run_latency,
+        job_latency_seconds=args.job_latency,
+        page_latency_seconds=args.page_latency,
+        page_size=args.page_size,
+        gb_per_day=args.gb_per_day,
+        slow_job_fraction=args.slow_job_fraction,
+        slow_job_latency_seconds=args.slow_job_latency,
+    ))
+    report = asyncio.run(main(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
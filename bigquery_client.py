@@ -1,61 +1,239 @@
-from google.cloud import bigquery
-import os
-from dotenv import load_dotenv
+import asyncio
+import contextvars
+import functools
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
+from settings import getenv
+from single_flight import SingleFlight
+from estimate_cache import EstimateCache
+from budget_governor import BudgetGovernor
+from query_builder import Query
+from bigquery_paging import BigQueryPagingMixin
+from query_backend import QueryBackend, QueryResult
+from bigquery_errors import BigQueryQueryTooLarge
+from bigquery_estimates import BigQueryEstimateMixin
+from bigquery_jobs import BigQueryJobMixin, JobLatencies
+from deadlines import remaining
+from telemetry import record, timed
 
-class BigQueryQueryTooLarge(Exception):
-    """Exception raised when a BigQuery query would process too much data."""
-    pass
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
+class BigQueryClient(BigQueryPagingMixin, BigQueryEstimateMixin, BigQueryJobMixin, QueryBackend):
+    name = "bigquery"
+    # Concurrency defaults
+    DEFAULT_MAX_CONCURRENT_QUERIES = 8
 
-class BigQueryClient:
     def __init__(self):
-        load_dotenv()
-        self.project_id = os.getenv("PROJECT_ID")
-        self.client = bigquery.Client(project=self.project_id)
+        self.project_id = getenv("PROJECT_ID")
         self.max_query_size_gb = 300  # Maximum allowed query size in GB
-    
-    async def execute_query(self, query: str) -> list:
+        self.max_concurrent_queries = int(
+            getenv("BIGQUERY_MAX_CONCURRENT_QUERIES", self.DEFAULT_MAX_CONCURRENT_QUERIES)
+        )
+        # Blocking client calls run on this pool so the event loop stays free;
+        # the semaphore bounds how many jobs are in flight at once.
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_queries,
+            thread_name_prefix="bigquery"
+        )
+        self._job_slots = asyncio.Semaphore(self.max_concurrent_queries)
+        # Signs pagination cursors; without a configured secret, cursors are valid until the server restarts
+        self.cursor_secret = getenv("PAGINATION_CURSOR_SECRET", "").encode() or secrets.token_bytes(32)
+        self.single_flight = SingleFlight()
+        # Resubmit jobs still running after this percentile of recent job latencies (0: never)
+        self.latencies = JobLatencies(percentile=float(getenv("BIGQUERY_HEDGE_PERCENTILE", "0")))
+        self.estimates = EstimateCache(
+            ttl_seconds=float(getenv("BIGQUERY_ESTIMATE_TTL_SECONDS", EstimateCache.DEFAULT_TTL_SECONDS))
+        )
+        self.estimate_flight = SingleFlight()
+        # Query shapes known to stay under max_query_size_gb skip the dry run;
+        # maximum_bytes_billed on the job is the hard guard for every query.
+        self.trusted_shapes = {
+            shape.strip() for shape in getenv("BIGQUERY_TRUSTED_SHAPES", "").split(",") if shape.strip()
+        }
+        self.governor = BudgetGovernor(
+            caller_budget_gb=float(getenv("GOVERNOR_CALLER_BUDGET_GB", BudgetGovernor.DEFAULT_CALLER_BUDGET_GB)),
+            global_budget_gb=float(getenv("GOVERNOR_GLOBAL_BUDGET_GB", BudgetGovernor.DEFAULT_GLOBAL_BUDGET_GB)),
+            budget_window_seconds=float(getenv("GOVERNOR_BUDGET_WINDOW_SECONDS", BudgetGovernor.DEFAULT_BUDGET_WINDOW_SECONDS)),
+            jobs_per_minute=float(getenv("GOVERNOR_JOBS_PER_MINUTE", BudgetGovernor.DEFAULT_JOBS_PER_MINUTE)),
+            job_burst=int(getenv("GOVERNOR_JOB_BURST", BudgetGovernor.DEFAULT_JOB_BURST)),
+            max_jobs_per_caller=int(getenv("GOVERNOR_MAX_JOBS_PER_CALLER", BudgetGovernor.DEFAULT_MAX_JOBS_PER_CALLER)),
+            max_queue_seconds=float(getenv("GOVERNOR_MAX_QUEUE_SECONDS", BudgetGovernor.DEFAULT_MAX_QUEUE_SECONDS))
+        )
+
+    @functools.cached_property
+    def client(self) -> "bigquery.Client":
+        """
+        The BigQuery API client, created on first use.
+
+        Importing google.cloud.bigquery and resolving credentials takes seconds,
+        so it is deferred until a query (or the warm-up) needs it.
+        """
+        from google.cloud import bigquery
+        return bigquery.Client(project=self.project_id)
+
+    async def connect(self) -> None:
+        """Create the API client on the worker pool, so credential lookup does not block the event loop."""
+        if "client" not in self.__dict__:
+            await self._run_blocking(lambda: self.client)
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """
+        Run a blocking BigQuery client call on the worker pool.
+
+        The call runs in a copy of the caller's context, so it records into the current trace.
+
+        Args:
+            func: The blocking callable
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+
+        Returns:
+            The callable's return value
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, func, *args, **kwargs))
+
+    @staticmethod
+    def _job_config(query: Query, **kwargs) -> "bigquery.QueryJobConfig":
+        """
+        Build a job config carrying the query's typed parameters.
+
+        Args:
+            query (Query): The parameterized query
+            **kwargs: Extra QueryJobConfig options
+
+        Returns:
+            bigquery.QueryJobConfig: The job config
+        """
+        from google.cloud import bigquery
+
+        parameters = [
+            bigquery.ArrayQueryParameter(parameter.name, parameter.type, list(parameter.value))
+            if parameter.is_array else
+            bigquery.ScalarQueryParameter(parameter.name, parameter.type, parameter.value)
+            for parameter in query.parameters
+        ]
+        return bigquery.QueryJobConfig(query_parameters=parameters, **kwargs)
+
+    @staticmethod
+    def _next_page_rows(pages) -> Optional[list]:
+        """
+        Fetch the next result page and convert its rows to dictionaries.
+
+        Args:
+            pages: Page iterator of a RowIterator
+
+        Returns:
+            Optional[list]: Rows of the next page, or None when there are no more pages
+        """
+        page = next(pages, None)
+        if page is None:
+            return None
+        with timed("conversion_seconds"):
+            return [dict(row.items()) for row in page]
+
+    async def execute_query(self, query: Query) -> QueryResult:
         """
         Execute a BigQuery query asynchronously.
-        
+
+        Identical queries (same SQL and parameters) already in flight are not
+        sent again: later callers await the running job. Every caller, the one
+        that started the job included, receives its own copy of the rows, so
+        callers can change them without affecting each other.
+
         Args:
-            query (str): The SQL query to execute
-            
+            query (Query): The parameterized query to execute
+
         Returns:
-            list: List of dictionaries containing query results
-            
+            QueryResult: List of dictionaries containing query results, with the job's bytes processed
+
         Raises:
             BigQueryQueryTooLarge: If the query would process more than max_query_size_gb GB
         """
-        # First check the query size
-        usage = await self.estimate_query_usage(query)
-        if usage > self.max_query_size_gb:
+        result, shared = await self.single_flight.run(query.key(), lambda: self._run_query(query))
+        if shared:
+            record("deduplicated")
+        return result.copy_rows()
+
+    def _run_config(self, query: Query) -> "bigquery.QueryJobConfig":
+        """
+        A new job config for one run of a query: capped at max_query_size_gb, and timed out at the current deadline.
+
+        Args:
+            query (Query): The parameterized query
+
+        Returns:
+            bigquery.QueryJobConfig: The job config
+        """
+        job_config = self._job_config(query, maximum_bytes_billed=int(self.max_query_size_gb * 1_000_000_000))
+        seconds_left = remaining()
+        if seconds_left is not None:
+            # BigQuery stops the job itself at the deadline, even if this process is gone by then
+            job_config.job_timeout_ms = max(1, int(seconds_left * 1000))
+        return job_config
+
+    async def _start_job(self, query: Query, usage: Optional[float] = None) -> "bigquery.QueryJob":
+        """
+        Run a query job under its callers' budgets and wait until it is done.
+
+        Each copy of the job (see BigQueryJobMixin) is admitted by the
+        governor before it takes one of the global job slots, so a caller
+        held up by its own limits does not keep a slot from others. The job
+        is cancelled if the wait is.
+
+        Args:
+            query (Query): The parameterized query to run
+            usage (Optional[float]): Estimated GB processed, held against the caller's budget
+
+        Returns:
+            bigquery.QueryJob: The finished job
+
+        Raises:
+            BigQueryBudgetExceeded: If the caller is over its byte budget or job rate
+            BigQueryQueryTooLarge: If the job was stopped for billing more than max_query_size_gb GB
+        """
+        await self.connect()
+        with timed("job_seconds"):
+            query_job = await self._run_job(query, usage)
+        if (query_job.error_result or {}).get("reason") == "bytesBilledLimitExceeded":
             raise BigQueryQueryTooLarge(
-                f"Query would process {usage:.2f} GB, which exceeds the maximum allowed size of {self.max_query_size_gb} GB"
+                f"Query exceeded the maximum allowed size of {self.max_query_size_gb} GB"
             )
-        
-        print(f"Query usage: {usage:.2f} GB")
-        query_job = self.client.query(query)
-        results = []
-        
-        # Convert results to list of dictionaries
-        for row in query_job:
-            results.append(dict(row.items()))
-        
-        return results
-
-    async def estimate_query_usage(self, query: str) -> float:
-        """
-        Estimate the data usage of a BigQuery query asynchronously.
-        
+        return query_job
+
+    async def _run_query(self, query: Query) -> QueryResult:
+        """
+        Check the size of a query, then run it.
+
+        The job is submitted, polled and its result pages fetched on a worker
+        pool, so concurrent calls overlap instead of blocking the event loop.
+        The job holds a global job slot while it runs, not while its results are fetched.
+
         Args:
-            query (str): The SQL query to estimate usage for
-            
+            query (Query): The parameterized query to execute
+
         Returns:
-            float: Estimated data usage in GB
+            QueryResult: List of dictionaries containing query results, with the job's bytes processed
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process more than max_query_size_gb GB
         """
-        job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
-        job = self.client.query(query, job_config=job_config)
-        return job.total_bytes_processed / 1_000_000_000  # GB
+        # First check the query size
+        usage = await self._check_query_size(query)
+        query_job = await self._start_job(query, usage)
+        with timed("fetch_seconds"):
+            row_iterator = await self._run_blocking(query_job.result)
+            pages = row_iterator.pages
+            results = []
+
+            # Convert results to list of dictionaries, one page at a time
+            while (page_rows := await self._run_blocking(self._next_page_rows, pages)) is not None:
+                results.extend(page_rows)
+
+        return QueryResult(results, query_job.total_bytes_processed or 0)
 
 # Create a singleton instance
-bigquery_client = BigQueryClient() 
\ No newline at end of file
+bigquery_client = BigQueryClient()
@@ -0,0 +1,20 @@
+from typing import Optional
+
+class BigQueryQueryTooLarge(Exception):
+    """Exception raised when a BigQuery query would process too much data."""
+    pass
+
+class BigQueryBudgetExceeded(Exception):
+    """
+    Exception raised when a query would exceed the caller's byte budget or job rate.
+
+    Unlike BigQueryQueryTooLarge, a smaller window does not help: the caller has to wait.
+
+    Args:
+        message (str): What was exceeded
+        retry_after_seconds (Optional[float]): When the query could be admitted, or None if it never fits the budget
+    """
+
+    def __init__(self, message: str, retry_after_seconds: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
@@ -0,0 +1,110 @@
+import logging
+from typing import Optional
+from bigquery_errors import BigQueryQueryTooLarge
+from query_builder import Query
+from telemetry import record, timed
+
+logger = logging.getLogger(__name__)
+
+class BigQueryEstimateMixin:
+    """
+    Dry-run size checks for BigQueryClient.
+
+    Estimates are cached per query template and window (see estimate_cache.py),
+    and held against the caller's byte budget before a job starts. Concurrent
+    lookups of the same uncached estimate share one dry run.
+    """
+
+    def size_limit_gb(self) -> float:
+        """
+        Largest query the current callers may run: max_query_size_gb, or less if their byte budgets are nearly spent.
+
+        Returns:
+            float: The limit in GB
+        """
+        remaining = self.governor.remaining_shared_bytes(self.governor.current_callers())
+        return self.max_query_size_gb if remaining is None else min(self.max_query_size_gb, remaining / 1e9)
+
+    async def fits(self, query: Query) -> bool:
+        """
+        Whether a query stays under size_limit_gb(), by its cached estimate; trusted shapes always fit.
+
+        Args:
+            query (Query): The parameterized query
+
+        Returns:
+            bool: True if the query may run
+        """
+        if query.shape in self.trusted_shapes:
+            return True
+        return await self.estimate_cached(query) <= self.size_limit_gb()
+
+    async def _check_query_size(self, query: Query) -> Optional[float]:
+        """
+        Refuse a query if its (cached) dry-run estimate is too large.
+
+        Trusted query shapes are not estimated at all.
+
+        Args:
+            query (Query): The parameterized query to check
+
+        Returns:
+            Optional[float]: Estimated GB processed, or None for a trusted shape
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process more than max_query_size_gb GB
+        """
+        if query.shape in self.trusted_shapes:
+            self.estimates.counters["skipped"] += 1
+            return None
+
+        usage = await self.estimate_cached(query)
+        self.governor.record_estimate(self.governor.current_callers(), int(usage * 1_000_000_000))
+        if usage > self.max_query_size_gb:
+            raise BigQueryQueryTooLarge(
+                f"Query would process {usage:.2f} GB, which exceeds the maximum allowed size of {self.max_query_size_gb} GB"
+            )
+
+        logger.info("Query usage: %.2f GB", usage)
+        return usage
+
+    async def estimate_query_usage(self, query: Query) -> float:
+        """
+        Estimate the data usage of a BigQuery query asynchronously.
+
+        Args:
+            query (Query): The parameterized query to estimate usage for
+
+        Returns:
+            float: Estimated data usage in GB
+        """
+        await self.connect()
+        job_config = self._job_config(query, dry_run=True, use_query_cache=False)
+        with timed("dry_run_seconds"):
+            job = await self._run_blocking(self.client.query, query.sql, job_config=job_config)
+        record("dry_runs")
+        return job.total_bytes_processed / 1_000_000_000  # GB
+
+    async def estimate_cached(self, query: Query) -> float:
+        """
+        Estimate the data usage of a query, reusing the estimate of the same template and window.
+
+        Args:
+            query (Query): The parameterized query to estimate usage for
+
+        Returns:
+            float: Estimated data usage in GB
+        """
+        usage = self.estimates.get(query)
+        if usage is not None:
+            record("estimate_cache_hits")
+            return usage
+        usage, shared = await self.estimate_flight.run(self.estimates.key(query), lambda: self._estimate_and_cache(query))
+        if shared:
+            record("estimate_cache_hits")
+        return usage
+
+    async def _estimate_and_cache(self, query: Query) -> float:
+        usage = await self.estimate_query_usage(query)
+        self.estimates.put(query, usage)
+        return usage
@@ -0,0 +1,202 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Optional
+from bigquery_errors import BigQueryBudgetExceeded
+from budget_governor import QuotaExceeded
+from query_builder import Query
+from telemetry import record
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
+logger = logging.getLogger(__name__)
+
+class JobLatencies:
+    """
+    Recent job latencies (submission until done), for the hedging threshold.
+
+    Args:
+        percentile (float): Latency percentile after which a job is hedged, or 0 to never hedge
+    """
+    MAX_SAMPLES = 200
+    # Too few samples make a noisy percentile; no hedging until there are this many
+    MIN_SAMPLES = 20
+
+    def __init__(self, percentile: float = 0):
+        self.percentile = percentile
+        self._samples: Deque[float] = deque(maxlen=self.MAX_SAMPLES)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def threshold(self) -> Optional[float]:
+        """
+        How long a job may run before a hedge is submitted.
+
+        Returns:
+            Optional[float]: The percentile latency in seconds, or None if hedging is off or there are too few samples
+        """
+        if not self.percentile or len(self._samples) < self.MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+class BigQueryJobMixin:
+    """
+    Job submission, cancellation and hedging for BigQueryClient.
+
+    A job whose caller goes away (deadline passed, MCP request cancelled, or
+    every single-flight waiter gone) is cancelled in BigQuery rather than
+    left running and billing. With hedging on, a job still running after the
+    hedge percentile of recent latencies is submitted a second time; the
+    first copy to finish without error wins and the other is cancelled.
+    Every copy is admitted by the governor, holds its own job slot and is
+    billed to its callers' budgets.
+    """
+    # Job polling defaults
+    INITIAL_POLL_INTERVAL_SECONDS = 0.1
+    MAX_POLL_INTERVAL_SECONDS = 2.0
+
+    def _cancel_job(self, query_job: "bigquery.QueryJob") -> None:
+        """Ask BigQuery to cancel a job (blocking); failures are only logged, the job may be done already."""
+        try:
+            query_job.cancel()
+            record("jobs_cancelled")
+        except Exception as e:
+            logger.warning("Cancelling job %s failed: %s", getattr(query_job, "job_id", "?"), e)
+
+    def _cancel_in_background(self, query_job: "bigquery.QueryJob") -> None:
+        """Cancel a job on the worker pool without waiting, so a cancelled caller is not held up."""
+        self._executor.submit(contextvars.copy_context().run, self._cancel_job, query_job)
+
+    async def _wait_for_job(self, query_job: "bigquery.QueryJob") -> None:
+        """
+        Poll a submitted job until it is done, sleeping on the event loop between polls.
+
+        Args:
+            query_job ("bigquery.QueryJob"): The submitted query job
+        """
+        delay = self.INITIAL_POLL_INTERVAL_SECONDS
+        while not await self._run_blocking(query_job.done):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.MAX_POLL_INTERVAL_SECONDS)
+
+    async def _submit_and_wait(self, query: Query, job_config: "bigquery.QueryJobConfig") -> "bigquery.QueryJob":
+        """
+        Submit a job and wait until it is done, cancelling it if the wait is cancelled.
+
+        Args:
+            query (Query): The parameterized query
+            job_config (bigquery.QueryJobConfig): The job config
+
+        Returns:
+            bigquery.QueryJob: The finished job
+        """
+        started = time.perf_counter()
+        submitted = self._executor.submit(
+            contextvars.copy_context().run,
+            functools.partial(self.client.query, query.sql, job_config=job_config)
+        )
+        try:
+            query_job = await asyncio.wrap_future(submitted)
+        except asyncio.CancelledError:
+            # The request may already be on its way; cancel the job as soon as it exists
+            submitted.add_done_callback(
+                lambda done: not done.cancelled() and done.exception() is None and self._cancel_job(done.result())
+            )
+            raise
+        try:
+            await self._wait_for_job(query_job)
+        except asyncio.CancelledError:
+            self._cancel_in_background(query_job)
+            raise
+        # Failed jobs often end early; they would drag the hedging threshold down
+        if not query_job.error_result:
+            self.latencies.add(time.perf_counter() - started)
+        return query_job
+
+    async def _run_copy(self, query: Query, usage: Optional[float], submitted: asyncio.Event,
+                        succeeded: asyncio.Event) -> Optional["bigquery.QueryJob"]:
+        """
+        Run one copy of a job: admitted by the governor, then in one of the global job slots.
+
+        The copy is billed its job's bytes, or its estimate if it is cancelled
+        once submitted, as a cancelled job's bytes billed are not known.
+
+        Args:
+            query (Query): The parameterized query
+            usage (Optional[float]): Estimated GB processed, held against the callers' budgets
+            submitted (asyncio.Event): Set when the job is submitted
+            succeeded (asyncio.Event): Shared by the copies; set when one of them finishes without error
+
+        Returns:
+            Optional[bigquery.QueryJob]: The finished job, or None if another copy succeeded before this one got a slot
+
+        Raises:
+            BigQueryBudgetExceeded: If a caller is over its byte budget, job rate or jobs in flight
+        """
+        estimated_bytes = int((usage or 0) * 1_000_000_000)
+        queued = time.perf_counter()
+        try:
+            async with self.governor.admit(self.governor.current_callers(), estimated_bytes) as reservation:
+                async with self._job_slots:
+                    record("queue_wait_seconds", time.perf_counter() - queued)
+                    if succeeded.is_set():
+                        return None
+                    reservation.billed_bytes = estimated_bytes
+                    submitted.set()
+                    query_job = await self._submit_and_wait(query, self._run_config(query))
+                    if not query_job.error_result:
+                        succeeded.set()
+                reservation.billed_bytes = query_job.total_bytes_billed or 0
+        except QuotaExceeded as e:
+            raise BigQueryBudgetExceeded(str(e), e.retry_after_seconds) from e
+        record("jobs")
+        record("slot_ms", query_job.slot_millis or 0)
+        record("bytes_processed", query_job.total_bytes_processed or 0)
+        record("bytes_billed", query_job.total_bytes_billed or 0)
+        return query_job
+
+    async def _run_job(self, query: Query, usage: Optional[float] = None) -> "bigquery.QueryJob":
+        """
+        Run a job to completion, hedging it with a second copy if it runs longer than usual.
+
+        The hedge threshold counts from the first copy's submission, not from
+        its wait for admission.
+
+        Args:
+            query (Query): The parameterized query
+            usage (Optional[float]): Estimated GB processed, held against the callers' budgets
+
+        Returns:
+            bigquery.QueryJob: The first copy to finish without error, else the first copy
+        """
+        submitted, succeeded = asyncio.Event(), asyncio.Event()
+        copies = [asyncio.ensure_future(self._run_copy(query, usage, submitted, succeeded))]
+        try:
+            threshold = self.latencies.threshold()
+            if threshold is not None:
+                submitting = asyncio.ensure_future(submitted.wait())
+                await asyncio.wait([copies[0], submitting], return_when=asyncio.FIRST_COMPLETED)
+                submitting.cancel()
+                done, _ = await asyncio.wait(copies, timeout=threshold)
+                if not done:
+                    record("hedged_jobs")
+                    copies.append(asyncio.ensure_future(self._run_copy(query, usage, asyncio.Event(), succeeded)))
+            running = set(copies)
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                finished = [copy for copy in done
+                            if copy.exception() is None and copy.result() is not None and not copy.result().error_result]
+                if finished:
+                    return finished[0].result()
+            # Every copy failed; return or raise the first one's outcome
+            return copies[0].result()
+        finally:
+            # Cancelling a copy still running cancels its job
+            for copy in copies:
+                copy.cancel()
@@ -0,0 +1,105 @@
+import base64
+import hashlib
+import hmac
+import json
+from typing import AsyncIterator, Optional, Tuple
+from query_builder import Query
+
+class BigQueryPagingMixin:
+    """
+    Page-at-a-time access to query results for BigQueryClient.
+
+    Streams pages as BigQuery delivers them, or returns one page plus a cursor
+    into the finished job's destination table, so later pages are read from
+    that table instead of running the query again. Cursors are signed with
+    cursor_secret, so only tables this server wrote can be read through them.
+    """
+    DEFAULT_PAGE_SIZE = 100
+
+    async def execute_query_stream(self, query: Query, page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator[list]:
+        """
+        Execute a query and yield its rows page by page as BigQuery delivers them.
+
+        Args:
+            query (Query): The parameterized query to execute
+            page_size (int, optional): Rows per page. Defaults to DEFAULT_PAGE_SIZE.
+
+        Yields:
+            list: Dictionaries of the rows in each page
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process more than max_query_size_gb GB
+        """
+        usage = await self._check_query_size(query)
+        query_job = await self._start_job(query, usage)
+        row_iterator = await self._run_blocking(query_job.result, page_size=page_size)
+        pages = row_iterator.pages
+        while (page_rows := await self._run_blocking(self._next_page_rows, pages)) is not None:
+            yield page_rows
+
+    async def execute_query_page(self, query: Query, page_size: int = DEFAULT_PAGE_SIZE) -> Tuple[list, Optional[str]]:
+        """
+        Execute a query and return its first page with a cursor to the rest.
+
+        Args:
+            query (Query): The parameterized query to execute
+            page_size (int, optional): Rows per page. Defaults to DEFAULT_PAGE_SIZE.
+
+        Returns:
+            Tuple[list, Optional[str]]: Rows of the first page, and a cursor for the next page
+                or None if there are no more rows
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process more than max_query_size_gb GB
+        """
+        usage = await self._check_query_size(query)
+        query_job = await self._start_job(query, usage)
+        destination = query_job.destination
+        return await self.fetch_page(self._encode_cursor(
+            f"{destination.project}.{destination.dataset_id}.{destination.table_id}", 0
+        ), page_size)
+
+    async def fetch_page(self, cursor: str, page_size: int = DEFAULT_PAGE_SIZE) -> Tuple[list, Optional[str]]:
+        """
+        Fetch the page a cursor points to from the job's destination table, without re-running the query.
+
+        Args:
+            cursor (str): Cursor returned with the previous page
+            page_size (int, optional): Rows per page. Defaults to DEFAULT_PAGE_SIZE.
+
+        Returns:
+            Tuple[list, Optional[str]]: Rows of the page, and a cursor for the next page
+                or None if there are no more rows
+
+        Raises:
+            ValueError: If the cursor is malformed or was not issued by this server
+        """
+        table_id, offset = self._decode_cursor(cursor)
+        await self.connect()
+        row_iterator = await self._run_blocking(
+            self.client.list_rows, table_id, start_index=offset, max_results=page_size
+        )
+        rows = await self._run_blocking(lambda: [dict(row.items()) for row in row_iterator])
+        next_offset = offset + len(rows)
+        if not rows or next_offset >= row_iterator.total_rows:
+            return rows, None
+        return rows, self._encode_cursor(table_id, next_offset)
+
+    def _sign(self, state: bytes) -> str:
+        signature = hmac.new(self.cursor_secret, state, hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(signature).decode()
+
+    def _encode_cursor(self, table_id: str, offset: int) -> str:
+        state = json.dumps({"table": table_id, "offset": offset}).encode()
+        return f"{base64.urlsafe_b64encode(state).decode()}.{self._sign(state)}"
+
+    def _decode_cursor(self, cursor: str) -> Tuple[str, int]:
+        try:
+            encoded_state, signature = cursor.split(".")
+            state = base64.urlsafe_b64decode(encoded_state.encode())
+            if not hmac.compare_digest(signature, self._sign(state)):
+                raise ValueError("bad signature")
+            fields = json.loads(state)
+            return fields["table"], int(fields["offset"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError("Invalid pagination cursor") from e
@@ -0,0 +1,299 @@
+import asyncio
+import sys
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, Optional, Sequence, Tuple
+from micro_batcher import batch_waiters
+
+DEFAULT_CALLER = "default"
+
+class QuotaExceeded(Exception):
+    """Raised when a caller is over its byte budget or job rate, with the seconds until it may retry (None: never)."""
+
+    def __init__(self, message: str, retry_after_seconds: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+class _Reservation:
+    """Bytes held against the budgets of the callers of a job while it runs, split evenly between them."""
+
+    def __init__(self, callers: Sequence[str], estimated_bytes: int):
+        self.callers = callers
+        self.estimated_bytes = estimated_bytes
+        self.billed_bytes = 0
+
+    def share(self, total: int) -> int:
+        return -(-total // len(self.callers))
+
+class _CallerState:
+    """Rolling usage, rate bucket and concurrency slot of one caller."""
+
+    def __init__(self, burst: int, max_jobs: int):
+        self.billed: Deque[Tuple[float, int]] = deque()  # (settled at, bytes billed)
+        self.reserved_bytes = 0
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.slots = asyncio.Semaphore(max_jobs or sys.maxsize)
+        self.counters = {"jobs": 0, "rejected": 0, "estimated_bytes": 0, "billed_bytes": 0}
+
+class BudgetGovernor:
+    """
+    Per-caller byte budgets and job rates for BigQuery work.
+
+    Each caller (an MCP session, or DEFAULT_CALLER outside one) has a rolling
+    byte budget, a token bucket of job starts and a cap on jobs in flight.
+    A job's dry-run estimate is reserved against the budgets when it starts
+    and replaced by its actual bytes billed when it ends. Over-budget work is
+    rejected; over-rate work, and work of a caller with all its in-flight
+    slots taken, queues for up to max_queue_seconds in all. A job run
+    for several callers at once (a merged batch) costs each of them an even
+    share of its bytes and of a job start.
+    """
+    DEFAULT_CALLER_BUDGET_GB = 1000
+    DEFAULT_GLOBAL_BUDGET_GB = 3000
+    DEFAULT_BUDGET_WINDOW_SECONDS = 86400
+    DEFAULT_JOBS_PER_MINUTE = 30
+    DEFAULT_JOB_BURST = 10
+    DEFAULT_MAX_JOBS_PER_CALLER = 4
+    DEFAULT_MAX_QUEUE_SECONDS = 30
+
+    def __init__(
+        self,
+        caller_budget_gb: float = DEFAULT_CALLER_BUDGET_GB,
+        global_budget_gb: float = DEFAULT_GLOBAL_BUDGET_GB,
+        budget_window_seconds: float = DEFAULT_BUDGET_WINDOW_SECONDS,
+        jobs_per_minute: float = DEFAULT_JOBS_PER_MINUTE,
+        job_burst: int = DEFAULT_JOB_BURST,
+        max_jobs_per_caller: int = DEFAULT_MAX_JOBS_PER_CALLER,
+        max_queue_seconds: float = DEFAULT_MAX_QUEUE_SECONDS
+    ):
+        # A budget or rate of 0 disables that limit
+        self.caller_budget_bytes = int(caller_budget_gb * 1_000_000_000)
+        self.global_budget_bytes = int(global_budget_gb * 1_000_000_000)
+        self.budget_window_seconds = budget_window_seconds
+        self.jobs_per_second = jobs_per_minute / 60
+        self.job_burst = job_burst
+        self.max_jobs_per_caller = max_jobs_per_caller
+        self.max_queue_seconds = max_queue_seconds
+        self.resolve_caller: Callable[[], str] = lambda: DEFAULT_CALLER
+        self._callers: Dict[str, _CallerState] = {}
+
+    def _state(self, caller: str) -> _CallerState:
+        state = self._callers.get(caller)
+        if state is None:
+            state = self._callers[caller] = _CallerState(self.job_burst, self.max_jobs_per_caller)
+        return state
+
+    def _used_bytes(self, state: _CallerState) -> int:
+        """Bytes billed within the rolling window plus bytes reserved by running jobs."""
+        cutoff = time.time() - self.budget_window_seconds
+        while state.billed and state.billed[0][0] < cutoff:
+            state.billed.popleft()
+        return sum(billed for _, billed in state.billed) + state.reserved_bytes
+
+    def current_callers(self) -> Tuple[str, ...]:
+        """
+        The callers the current work is done for.
+
+        Returns:
+            Tuple[str, ...]: Every caller waiting on the merged batch being run (see micro_batcher.py),
+                else the one resolve_caller names
+        """
+        waiters = batch_waiters()
+        if waiters:
+            return tuple(dict.fromkeys(context.run(self.resolve_caller) for context in waiters))
+        return (self.resolve_caller(),)
+
+    def remaining_bytes(self, caller: str, sharing: int = 1) -> Optional[int]:
+        """
+        Bytes a caller can still spend in the current window.
+
+        Args:
+            caller (str): The caller
+            sharing (int, optional): Number of callers splitting the job, the caller paying its share. Defaults to 1.
+
+        Returns:
+            Optional[int]: Remaining bytes (of the whole job when shared) under the tighter of its own
+                and the global budget, or None if neither budget is enabled
+        """
+        remaining = []
+        if self.caller_budget_bytes:
+            remaining.append((self.caller_budget_bytes - self._used_bytes(self._state(caller))) * sharing)
+        if self.global_budget_bytes:
+            used = sum(self._used_bytes(state) for state in self._callers.values())
+            remaining.append(self.global_budget_bytes - used)
+        return max(0, min(remaining)) if remaining else None
+
+    def remaining_shared_bytes(self, callers: Sequence[str]) -> Optional[int]:
+        """
+        Bytes a job split evenly between callers can still process, each share fitting its caller's budget.
+
+        Args:
+            callers (Sequence[str]): The callers of the job
+
+        Returns:
+            Optional[int]: Remaining bytes of the job, or None if no budget is enabled
+        """
+        remaining = [self.remaining_bytes(caller, len(callers)) for caller in callers]
+        return None if remaining[0] is None else min(remaining)
+
+    def _seconds_until_freed(self, billed: Iterable[Tuple[float, int]], needed_bytes: int) -> Optional[float]:
+        """Seconds until needed_bytes of billed usage leave the rolling window, or None if there is not that much."""
+        freed = 0
+        for settled_at, bytes_billed in sorted(billed):
+            freed += bytes_billed
+            if freed >= needed_bytes:
+                return max(0.0, settled_at + self.budget_window_seconds - time.time())
+        return None
+
+    def _budget_retry_after(self, caller: str, sharing: int, estimated_bytes: int) -> Optional[float]:
+        """Seconds until a job of estimated_bytes split between sharing callers fits the caller's budgets, or None if it never does."""
+        waits = []
+        if self.caller_budget_bytes:
+            state = self._state(caller)
+            short = -(-estimated_bytes // sharing) - (self.caller_budget_bytes - self._used_bytes(state))
+            if short > 0:
+                waits.append(self._seconds_until_freed(state.billed, short))
+        if self.global_budget_bytes:
+            short = estimated_bytes - (self.global_budget_bytes - sum(self._used_bytes(state) for state in self._callers.values()))
+            if short > 0:
+                waits.append(self._seconds_until_freed(
+                    (entry for state in self._callers.values() for entry in state.billed), short))
+        return None if None in waits else max(waits, default=0.0)
+
+    def record_estimate(self, callers: Sequence[str], estimated_bytes: int) -> None:
+        """Account a dry-run estimate made for callers, split evenly between them."""
+        for caller in callers:
+            self._state(caller).counters["estimated_bytes"] += -(-estimated_bytes // len(callers))
+
+    def _take_token(self, caller: str, state: _CallerState, cost: float) -> float:
+        """
+        Take cost job tokens from the caller's bucket.
+
+        Returns:
+            float: Seconds to wait for the bucket to refill, 0 if the tokens were there
+
+        Raises:
+            QuotaExceeded: If the wait would be longer than max_queue_seconds
+        """
+        if not self.jobs_per_second:
+            return 0.0
+        now = time.monotonic()
+        state.tokens = min(self.job_burst, state.tokens + (now - state.refilled_at) * self.jobs_per_second)
+        state.refilled_at = now
+        state.tokens -= cost
+        if state.tokens < 0:
+            wait_seconds = -state.tokens / self.jobs_per_second
+            if wait_seconds > self.max_queue_seconds:
+                state.tokens += cost
+                state.counters["rejected"] += 1
+                raise QuotaExceeded(
+                    f"Job rate limit reached for {caller}; retry in {wait_seconds:.0f} seconds", wait_seconds
+                )
+            return wait_seconds
+        return 0.0
+
+    async def _take_slot(self, caller: str, state: _CallerState, timeout_seconds: float) -> None:
+        """Take one of the caller's in-flight slots; QuotaExceeded, with the job token given back, if none frees up in time."""
+        try:
+            async with asyncio.timeout(max(0.0, timeout_seconds)) as timeout:
+                await state.slots.acquire()
+        except TimeoutError:
+            if not timeout.expired():
+                raise
+            state.counters["rejected"] += 1
+            if self.jobs_per_second:
+                state.tokens += 1
+            retry_after = max(self.max_queue_seconds, 1.0)
+            raise QuotaExceeded(
+                f"{caller} already has {self.max_jobs_per_caller} jobs running; retry in {retry_after:.0f} seconds",
+                retry_after
+            ) from None
+
+    @asynccontextmanager
+    async def admit(self, callers: Sequence[str], estimated_bytes: int) -> AsyncIterator[_Reservation]:
+        """
+        Admit one job for its callers and account its bytes when it ends.
+
+        Each caller is held to an even share of the job's bytes and of a job
+        start. A job for one caller also takes one of its in-flight slots; a
+        shared job takes none, being a single job for all of them.
+        Set billed_bytes on the yielded reservation once the job is done.
+
+        Args:
+            callers (Sequence[str]): The callers the job runs for (see current_callers)
+            estimated_bytes (int): The job's dry-run estimate, or 0 if not estimated
+
+        Yields:
+            _Reservation: The bytes held for the job
+
+        Raises:
+            QuotaExceeded: If the estimate is over a caller's remaining budget, a job rate is exceeded
+                or the caller's in-flight slots stay taken for max_queue_seconds
+        """
+        states = [self._state(caller) for caller in callers]
+        for caller, state in zip(callers, states):
+            remaining = self.remaining_bytes(caller, len(callers))
+            if remaining is not None and estimated_bytes > remaining:
+                state.counters["rejected"] += 1
+                retry_after = self._budget_retry_after(caller, len(callers), estimated_bytes)
+                when = "it never fits the budget" if retry_after is None else f"retry in {retry_after:.0f} seconds"
+                raise QuotaExceeded(
+                    f"Query would process {estimated_bytes / 1e9:.2f} GB but {caller} has "
+                    f"{remaining / 1e9:.2f} GB of its byte budget left; {when}", retry_after
+                )
+        cost = 1 / len(callers)
+        taken = []
+        try:
+            wait_seconds = 0.0
+            for caller, state in zip(callers, states):
+                wait_seconds = max(wait_seconds, self._take_token(caller, state, cost))
+                taken.append(state)
+        except QuotaExceeded:
+            for state in taken if self.jobs_per_second else ():
+                state.tokens += cost
+            raise
+        if wait_seconds:
+            await asyncio.sleep(wait_seconds)
+        slots = states[0].slots if len(states) == 1 else None
+        if slots is not None:
+            await self._take_slot(callers[0], states[0], self.max_queue_seconds - wait_seconds)
+
+        reservation = _Reservation(callers, estimated_bytes)
+        share = reservation.share(estimated_bytes)
+        for state in states:
+            state.reserved_bytes += share
+            state.counters["jobs"] += 1
+        try:
+            yield reservation
+        finally:
+            if slots is not None:
+                slots.release()
+            billed = reservation.share(reservation.billed_bytes)
+            for state in states:
+                state.reserved_bytes -= share
+                state.billed.append((time.time(), billed))
+                state.counters["billed_bytes"] += billed
+
+    def report(self, caller: str) -> Dict[str, Any]:
+        """
+        Budget and usage of a caller.
+
+        Args:
+            caller (str): The caller
+
+        Returns:
+            Dict[str, Any]: Remaining GB, the budgets, the rate limit and the caller's counters
+        """
+        remaining = self.remaining_bytes(caller)
+        return {
+            "caller": caller,
+            "remaining_gb": None if remaining is None else remaining / 1e9,
+            "caller_budget_gb": self.caller_budget_bytes / 1e9 or None,
+            "global_budget_gb": self.global_budget_bytes / 1e9 or None,
+            "budget_window_seconds": self.budget_window_seconds,
+            "jobs_per_minute": self.jobs_per_second * 60 or None,
+            "max_jobs_in_flight": self.max_jobs_per_caller or None,
+            **self._state(caller).counters,
+        }
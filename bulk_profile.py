@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Set
+from query_builder import normalize_address
+from compact_format import dumps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 4
+# Rows per wallet and source; bulk runs trade completeness on very active wallets for bounded batches
+DEFAULT_MAX_ROWS = 5000
+DEFAULT_TOP = 10
+
+def read_wallets(lines: Iterable[str], skip: Set[str]) -> Iterator[str]:
+    """
+    Stream normalized wallet addresses from a wallet list, skipping finished and repeated ones.
+
+    Each line is either an address or a JSON object with a wallet_id, wallet or address field.
+
+    Args:
+        lines (Iterable[str]): Lines of the wallet list
+        skip (Set[str]): Addresses already profiled; addresses read are added to it
+
+    Yields:
+        str: The next address to profile
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            entry = json.loads(line)
+            line = entry.get("wallet_id") or entry.get("wallet") or entry.get("address") or ""
+        address = normalize_address(line)
+        if address and address not in skip:
+            skip.add(address)
+            yield address
+
+def batched(wallets: Iterator[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for wallet_id in wallets:
+        batch.append(wallet_id)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _flatten(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """A summary as one flat record: nested sections are merged in, lists become JSON text."""
+    record = {}
+    for key, value in summary.items():
+        if isinstance(value, dict):
+            record.update(_flatten(value))
+        elif isinstance(value, list):
+            record[key] = dumps(value)
+        else:
+            record[key] = value.isoformat() if hasattr(value, "isoformat") else value
+    return record
+
+def format_batch(rows_by_wallet: Dict[str, List[Dict[str, Any]]], days: int, max_rows: int,
+                 top: int, output_format: str) -> List[Any]:
+    """
+    Summarize a batch of wallets and format the results; runs in a worker process.
+
+    Args:
+        rows_by_wallet (Dict[str, List[Dict[str, Any]]]): Profile rows of each wallet
+        days (int): Number of days the rows cover
+        max_rows (int): Row cap the rows were fetched with
+        top (int): Number of top tokens and counterparties per wallet
+        output_format (str): "jsonl" for JSON lines, "parquet" for flat records
+
+    Returns:
+        List[Any]: One JSON line or record per wallet
+    """
+    from wallet_profile import WalletProfile
+
+    summaries = [WalletProfile(wallet_id, days, max_rows, rows).summary(top) for wallet_id, rows in rows_by_wallet.items()]
+    if output_format == "parquet":
+        return [_flatten(summary) for summary in summaries]
+    return [dumps(summary) + "\n" for summary in summaries]
+
+class Checkpoint:
+    """
+    Append-only list of the wallets whose results are written, one address per line.
+
+    Args:
+        path (str): The checkpoint file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.finished: Set[str] = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.finished = {line.strip() for line in f if line.strip()}
+        self._file = open(path, "a")
+
+    def add(self, wallet_ids: List[str]) -> None:
+        self._file.write("".join(f"{wallet_id}\n" for wallet_id in wallet_ids))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+class _JsonlOutput:
+    def __init__(self, path: str):
+        self._file = open(path, "a")
+
+    def write(self, lines: List[str]) -> None:
+        self._file.writelines(lines)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+class _ParquetOutput:
+    """One Parquet file per batch in a directory, so an interrupted run never leaves a half-written file behind."""
+
+    def __init__(self, path: str):
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        name = os.path.join(self.path, f"part-{uuid.uuid4().hex}.parquet")
+        pq.write_table(pa.Table.from_pylist(records), name + ".tmp")
+        os.replace(name + ".tmp", name)
+
+    def close(self) -> None:
+        pass
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Profile every wallet of args.input and write the summaries to args.output.
+
+    Batches of wallets are fetched with one profile query each, at most
+    args.concurrency at a time; summarizing and formatting run in a process
+    pool. A batch is checkpointed once its results are written, so a rerun
+    skips it. A failed batch, whatever the error, is logged and left for the
+    next run. If the run itself stops, batches still in flight are cancelled
+    before the pool, output and checkpoint are closed.
+
+    Args:
+        args (argparse.Namespace): The runner options
+
+    Returns:
+        Dict[str, Any]: Wallets profiled, finished by earlier runs, and failed, and the run time
+    """
+    from crypto_client import crypto_client
+    from bigquery_errors import BigQueryQueryTooLarge, BigQueryBudgetExceeded
+
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output}.checkpoint")
+    output = _ParquetOutput(args.output) if args.format == "parquet" else _JsonlOutput(args.output)
+    days = min(args.days, crypto_client.MAX_DAYS_TO_LOOK_BACK)
+    loop = asyncio.get_running_loop()
+    # Spawned workers only import the summarizing code, not the client and its threads
+    pool = ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn"))
+    slots = asyncio.Semaphore(args.concurrency)
+    report = {"profiled": 0, "previously_finished": len(checkpoint.finished), "failed": 0}
+    started = time.perf_counter()
+
+    async def process(batch: List[str]) -> None:
+        try:
+            rows = await crypto_client.fetch_profile_rows(batch, days, args.max_rows)
+            results = await loop.run_in_executor(pool, format_batch, rows, days, args.max_rows, args.top, args.format)
+            output.write(results)
+            checkpoint.add(batch)
+            report["profiled"] += len(batch)
+            logger.info("Profiled %d wallets", report["profiled"])
+        except Exception as e:
+            report["failed"] += len(batch)
+            logger.warning("Batch of %d wallets starting at %s failed: %s", len(batch), batch[0], e,
+                           exc_info=not isinstance(e, (BigQueryQueryTooLarge, BigQueryBudgetExceeded)))
+        finally:
+            slots.release()
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    tasks = set()
+    try:
+        for batch in batched(read_wallets(source, set(checkpoint.finished)), args.batch_size):
+            await slots.acquire()
+            task = asyncio.ensure_future(process(batch))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if source is not sys.stdin:
+            source.close()
+        pool.shutdown(cancel_futures=True)
+        output.close()
+        checkpoint.close()
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile a list of wallets offline, resuming interrupted runs")
+    parser.add_argument("input", help="Wallet list: one address or JSON object (wallet_id) per line, or - for stdin")
+    parser.add_argument("output", help="JSONL file to append to, or directory of Parquet files with --format parquet")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    parser.add_argument("--checkpoint", help="Finished-wallet list (default: <output>.checkpoint)")
+    parser.add_argument("--days", type=int, default=100, help="Number of days to look back")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Wallets per query")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Batches queried at once")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes summarizing batches")
+    parser.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS, help="Rows per wallet and source")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Top tokens and counterparties per wallet")
+    args = parser.parse_args()
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO)
+    print(json.dumps(asyncio.run(run(args))))
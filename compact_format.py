@@ -0,0 +1,214 @@
+import json
+import math
+import re
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+COMPACT_FORMAT = "columnar-v1"
+
+# What each column type of a compact table holds; sent with every compact response
+COLUMN_TYPES = {
+    "ref": "index into dictionary",
+    "time": "seconds before time_base",
+    "float": "number rounded to the response's significant digits",
+    "int": "integer",
+    "bool": "boolean",
+    "str": "text",
+    "value": "any JSON value, nested tables in the same layout",
+}
+
+_ADDRESS = re.compile(r"^(0x[0-9a-fA-F]{40}|[1-9A-HJ-NP-Za-km-z]{32,44})$")
+_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}")
+
+def json_default(value: Any) -> Any:
+    """
+    Convert the non-JSON values query results carry, as a json.dumps default.
+
+    Args:
+        value (Any): A value json cannot serialize itself
+
+    Returns:
+        Any: Decimal as float, dates as ISO 8601 text, NumPy scalars as Python numbers, sets as lists
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any, indent: Optional[int] = None) -> str:
+    """
+    Serialize a tool result without converting its rows first; Decimal and datetime values are handled on the way out.
+
+    Args:
+        value (Any): The result
+        indent (Optional[int], optional): Indentation for readable output, None for the most compact text. Defaults to None.
+
+    Returns:
+        str: The JSON text
+    """
+    separators = None if indent else (",", ":")
+    return json.dumps(value, default=json_default, indent=indent, separators=separators)
+
+def _round(value: float, digits: int) -> float:
+    if not value or not math.isfinite(value):
+        return value
+    return round(value, digits - 1 - math.floor(math.log10(abs(value))))
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(row, dict) for row in value)
+
+class _Encoder:
+    """
+    One compact response being built: the shared dictionary and the reference time.
+
+    Args:
+        time_base (datetime): Timestamps are sent as seconds before it
+        digits (int): Significant digits floats are rounded to
+    """
+
+    def __init__(self, time_base: datetime, digits: int):
+        self.time_base = time_base
+        self.digits = digits
+        self.dictionary: List[str] = []
+        self._refs: Dict[str, int] = {}
+
+    def ref(self, text: str) -> int:
+        index = self._refs.get(text)
+        if index is None:
+            index = self._refs[text] = len(self.dictionary)
+            self.dictionary.append(text)
+        return index
+
+    def seconds_before(self, value: Any) -> int:
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        elif not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return round((self.time_base - value).total_seconds())
+
+    def column_type(self, values: List[Any]) -> str:
+        present = [value for value in values if value is not None]
+        if not present:
+            return "value"
+        if all(isinstance(value, bool) for value in present):
+            return "bool"
+        if all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+            return "int"
+        if all(isinstance(value, (int, float, Decimal)) and not isinstance(value, bool) for value in present):
+            return "float"
+        if all(isinstance(value, (datetime, date)) for value in present):
+            return "time"
+        if all(isinstance(value, str) for value in present):
+            if all(_TIMESTAMP.match(value) for value in present):
+                return "time"
+            # Addresses and repeated labels (symbols, directions) go to the dictionary, unique text stays inline
+            if all(_ADDRESS.match(value) for value in present) or len(set(present)) < len(present):
+                return "ref"
+            return "str"
+        return "value"
+
+    def column(self, values: List[Any], kind: str) -> List[Any]:
+        convert = {
+            "ref": self.ref,
+            "time": self.seconds_before,
+            "float": lambda value: _round(float(value), self.digits),
+            "value": self.value,
+        }.get(kind)
+        if convert is None:
+            return values
+        return [None if value is None else convert(value) for value in values]
+
+    def table(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        names = list(dict.fromkeys(name for row in rows for name in row))
+        columns = [[row.get(name) for row in rows] for name in names]
+        types = [self.column_type(values) for values in columns]
+        return {
+            "columns": names,
+            "types": types,
+            "data": [self.column(values, kind) for values, kind in zip(columns, types)],
+        }
+
+    def value(self, value: Any) -> Any:
+        if _is_table(value):
+            return self.table(value)
+        if isinstance(value, dict):
+            return {key: self.value(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.value(item) for item in value]
+        if isinstance(value, (float, Decimal)):
+            return _round(float(value), self.digits)
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+def encode(result: Any, digits: int = 6, time_base: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Encode a tool result in the compact, column-oriented layout.
+
+    Every list of row dicts, at any depth, becomes a table of columns
+    (names, types and one value list per column) instead of repeating the
+    column names in every row. Addresses and other repeated text are sent
+    once in a dictionary shared by the whole response and referenced by
+    index, timestamps as whole seconds before time_base, and numbers
+    rounded to significant digits. The response carries its own legend
+    of the column types.
+
+    Args:
+        result (Any): The result as the tool returns it
+        digits (int, optional): Significant digits kept of floats. Defaults to 6.
+        time_base (Optional[datetime], optional): Reference time of relative timestamps. Defaults to now (UTC).
+
+    Returns:
+        Dict[str, Any]: format, column_types, time_base, dictionary and the encoded result
+    """
+    encoder = _Encoder((time_base or datetime.now(timezone.utc)).replace(microsecond=0), digits)
+    encoded = encoder.value(result)
+    return {
+        "format": COMPACT_FORMAT,
+        "column_types": COLUMN_TYPES,
+        "time_base": encoder.time_base.isoformat(),
+        "dictionary": encoder.dictionary,
+        "result": encoded,
+    }
+
+def decode(compact: Dict[str, Any]) -> Any:
+    """
+    Expand a compact response back to row dicts (timestamps as datetimes), for clients and checks.
+
+    Args:
+        compact (Dict[str, Any]): A response made by encode
+
+    Returns:
+        Any: The result with every table turned back into a list of rows
+    """
+    dictionary = compact["dictionary"]
+    time_base = datetime.fromisoformat(compact["time_base"])
+
+    def column(values: List[Any], kind: str) -> List[Any]:
+        if kind == "ref":
+            return [None if value is None else dictionary[value] for value in values]
+        if kind == "time":
+            return [None if value is None else time_base - timedelta(seconds=value) for value in values]
+        if kind == "value":
+            return [expand(value) for value in values]
+        return values
+
+    def expand(value: Any) -> Any:
+        if isinstance(value, dict) and value.keys() == {"columns", "types", "data"}:
+            columns = [column(values, kind) for values, kind in zip(value["data"], value["types"])]
+            return [dict(zip(value["columns"], row)) for row in zip(*columns)]
+        if isinstance(value, dict):
+            return {key: expand(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [expand(item) for item in value]
+        return value
+
+    return expand(compact["result"])
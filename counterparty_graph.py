@@ -0,0 +1,187 @@
+from typing import List, Dict, Any, Optional, Set, Tuple
+import numpy as np
+from crypto_queries import CryptoQueries
+from query_builder import Query, QueryParameter, time_filter, wallet_transfers, window_parameters
+
+# Transfers each graph asset is built from: table, value scale and extra filter
+GRAPH_ASSETS = {
+    "eth": (CryptoQueries.TRANSACTIONS, 1e18, ""),
+    "usdc": (CryptoQueries.TOKEN_TRANSFERS, 1e6, "token_address = @token_address"),
+}
+
+def counterparty_query(wallet_ids: List[str], asset: str, days: int, min_value: float, max_edges: int) -> Query:
+    """
+    Build the query expanding one frontier of a counterparty graph.
+
+    Every wallet of the frontier comes back with its counterparties and the
+    transfers between them summed per pair, strongest first, so one job
+    expands a whole hop.
+
+    Args:
+        wallet_ids (List[str]): The normalized wallet addresses of the frontier
+        asset (str): Transfers to follow, one of GRAPH_ASSETS
+        days (int): Number of days to look back
+        min_value (float): Minimum volume (sent plus received, in asset units) of a pair
+        max_edges (int): Maximum counterparties per wallet
+
+    Returns:
+        Query: The parameterized query
+    """
+    table, scale, extra_filter = GRAPH_ASSETS[asset]
+    window = window_parameters(days)
+    transfers = wallet_transfers(table,
+        f"to_address AS counterparty, CAST(value AS FLOAT64) / {scale:g} AS sent, 0.0 AS received",
+        time_filter(window), extra_filter,
+        received_columns=f"from_address AS counterparty, 0.0 AS sent, CAST(value AS FLOAT64) / {scale:g} AS received"
+    )
+    sql = f"""
+    WITH matched AS ({transfers}),
+
+    counterparty_edges AS (
+        SELECT
+            wallet_id,
+            counterparty,
+            COUNT(*) AS transfer_count,
+            SUM(sent) AS sent,
+            SUM(received) AS received
+        FROM matched
+        WHERE counterparty IS NOT NULL AND counterparty != wallet_id
+        GROUP BY wallet_id, counterparty
+        HAVING SUM(sent) + SUM(received) >= @min_value
+    )
+
+    SELECT *
+    FROM counterparty_edges
+    WHERE TRUE
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY wallet_id ORDER BY sent + received DESC) <= @limit
+    ORDER BY wallet_id, sent + received DESC
+    """
+    parameters = (
+        QueryParameter("wallet_ids", "STRING", tuple(wallet_ids)),
+        *window,
+        QueryParameter("min_value", "FLOAT64", float(min_value)),
+        QueryParameter("limit", "INT64", max_edges),
+        *((QueryParameter("token_address", "STRING", CryptoQueries.USDC_TOKEN_ADDRESS),) if extra_filter else ())
+    )
+    return Query(sql, parameters, f"counterparty_graph_{asset}")
+
+class CounterpartyGraph:
+    """
+    Wallets and the transfer volumes between them, as CSR adjacency arrays.
+
+    Edges are undirected pairs stored once, with sent and received seen from
+    the source. indptr and edge_ids index them by node: the edges of node i
+    are edge_ids[indptr[i]:indptr[i + 1]], whichever end it is.
+    """
+
+    def __init__(self, addresses: List[str], hops: List[int], source: np.ndarray, target: np.ndarray,
+                 transfer_count: np.ndarray, sent: np.ndarray, received: np.ndarray):
+        self.addresses = addresses
+        self.hops = np.asarray(hops, dtype=np.int64)
+        self.source, self.target = source, target
+        self.transfer_count, self.sent, self.received = transfer_count, sent, received
+        ends = np.concatenate([source, target])
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(ends, minlength=len(addresses)))])
+        self.edge_ids = np.argsort(ends, kind="stable") % max(len(source), 1)
+
+    def edges_of(self, node: int) -> np.ndarray:
+        """Ids of the edges touching a node."""
+        return self.edge_ids[self.indptr[node]:self.indptr[node + 1]]
+
+    def neighbors(self, node: int) -> np.ndarray:
+        """Nodes sharing an edge with a node."""
+        edges = self.edges_of(node)
+        return np.where(self.source[edges] == node, self.target[edges], self.source[edges])
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def volumes(self) -> np.ndarray:
+        """Total volume (sent plus received) over each node's edges."""
+        volume = self.sent + self.received
+        count = len(self.addresses)
+        return (np.bincount(self.source, weights=volume, minlength=count)
+                + np.bincount(self.target, weights=volume, minlength=count))
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Nodes with their hop, degree and volume, and edges by address."""
+        degrees, volumes = self.degrees(), self.volumes()
+        return {
+            "nodes": [{
+                "address": address,
+                "hop": int(self.hops[i]),
+                "degree": int(degrees[i]),
+                "volume": float(volumes[i]),
+            } for i, address in enumerate(self.addresses)],
+            "edges": [{
+                "source": self.addresses[self.source[i]],
+                "target": self.addresses[self.target[i]],
+                "transfer_count": int(self.transfer_count[i]),
+                "sent": float(self.sent[i]),
+                "received": float(self.received[i]),
+            } for i in range(len(self.source))],
+        }
+
+class GraphBuilder:
+    """
+    Breadth-first expansion state: node ids, the pairs already joined by an edge and the edge arrays being filled.
+
+    Args:
+        root (str): The normalized address the expansion starts from
+        max_nodes (int): Maximum nodes in the graph; further counterparties are pruned
+    """
+
+    def __init__(self, root: str, max_nodes: int):
+        self.max_nodes = max_nodes
+        self.node_ids: Dict[str, int] = {root: 0}
+        self.hops = [0]
+        self.pairs: Set[Tuple[str, str]] = set()
+        self.pruned: set = set()
+        self.edges: List[tuple] = []
+
+    def _node(self, address: str, hop: int) -> Optional[int]:
+        node = self.node_ids.get(address)
+        if node is None and len(self.node_ids) < self.max_nodes:
+            node = self.node_ids[address] = len(self.hops)
+            self.hops.append(hop)
+        return node
+
+    def add_hop(self, frontier: List[str], rows: List[Dict[str, Any]], hop: int) -> List[str]:
+        """
+        Add a frontier's counterparty rows to the graph.
+
+        Strongest pairs are admitted first, so the max_nodes cap prunes the weakest counterparties.
+        A pair returned from both sides becomes one edge, from the side seen
+        first; each side's rows are cut at max_edges independently, so a pair
+        may also come back from one side only.
+
+        Args:
+            frontier (List[str]): The addresses just expanded
+            rows (List[Dict[str, Any]]): Their counterparty_query rows
+            hop (int): The hop the new counterparties are at
+
+        Returns:
+            List[str]: The new counterparties, the next frontier
+        """
+        discovered = []
+        for row in sorted(rows, key=lambda row: row["sent"] + row["received"], reverse=True):
+            wallet_id, counterparty = row["wallet_id"], row["counterparty"]
+            pair = (min(wallet_id, counterparty), max(wallet_id, counterparty))
+            if pair in self.pairs:
+                continue
+            known = counterparty in self.node_ids
+            node = self._node(counterparty, hop)
+            if node is None:
+                self.pruned.add(counterparty)
+                continue
+            if not known:
+                discovered.append(counterparty)
+            self.pairs.add(pair)
+            self.edges.append((self.node_ids[wallet_id], node, row["transfer_count"], row["sent"], row["received"]))
+        return discovered
+
+    def build(self) -> CounterpartyGraph:
+        edges = np.array(self.edges, dtype=np.float64).reshape(-1, 5)
+        addresses = list(self.node_ids)
+        return CounterpartyGraph(addresses, self.hops, edges[:, 0].astype(np.int64), edges[:, 1].astype(np.int64),
+                                 edges[:, 2].astype(np.int64), edges[:, 3], edges[:, 4])
@@ -0,0 +1,121 @@
+import math
+import sys
+from approximate_queries import APPROXIMATE_BUILDERS
+from typing import List, Dict, Any, Tuple
+
+class CryptoApproximateMixin:
+    """
+    Approximate mode of the CryptoClient top tokens and wallet info.
+
+    The queries read a TABLESAMPLE of the transfer tables over a window
+    starting at midnight, so they scan and bill about sample_percent of the
+    exact queries. Sample totals are scaled up and reported with 95% error
+    bounds, which assume transfers are sampled independently; block
+    sampling keeps a wallet's transfers of one block together, so the
+    bounds are optimistic for wallets with bursty activity.
+    """
+    MODES = ("exact", "approximate")
+    DEFAULT_SAMPLE_PERCENT = 10.0
+    # z-score of the reported error bounds
+    ERROR_BOUND_Z = 1.96
+    APPROXIMATE_NOTE = "Estimated from a sample; call again with mode='exact' for exact figures"
+
+    @classmethod
+    def _is_approximate(cls, mode: str) -> bool:
+        if mode not in cls.MODES:
+            raise ValueError(f"Unsupported mode {mode!r}; use one of {', '.join(cls.MODES)}")
+        return mode == "approximate"
+
+    def _estimate(self, sampled: int) -> Tuple[int, int]:
+        """
+        Scale up a count taken over the sample.
+
+        Args:
+            sampled (int): The count in the sample
+
+        Returns:
+            Tuple[int, int]: The estimated total and its error bound; an empty sample still
+                bounds the total, by what one sampled row would stand for
+        """
+        fraction = self.sample_percent / 100
+        error = self.ERROR_BOUND_Z * math.sqrt(max(sampled, 1) * (1 - fraction)) / fraction
+        return round(sampled / fraction), math.ceil(error)
+
+    async def _approximate_rows(self, kind: str, wallet_id: str, days: int) -> List[Dict[str, Any]]:
+        """Rows of a kind's sampled query for one wallet, from the cache when possible."""
+        cache_kind = f"{kind}_approximate"
+        # Sampled rows are not ranked yet, so they are cached whole, under no limit
+        rows = self.cache.get(cache_kind, wallet_id, days, sys.maxsize)
+        if rows is None:
+            rows = await self._execute_safe_query(APPROXIMATE_BUILDERS[kind]([wallet_id], days, None, self.sample_percent))
+            self.cache.put(cache_kind, wallet_id, days, sys.maxsize, rows, time_ordered=False,
+                           bytes_processed=getattr(rows, "bytes_processed", 0))
+        return rows
+
+    def _approximate_result(self, days: int, **result: Any) -> Dict[str, Any]:
+        return {"mode": "approximate", "sample_percent": self.sample_percent, "days": days,
+                **result, "note": self.APPROXIMATE_NOTE}
+
+    async def _approximate_top_tokens(self, wallet_id: str, days: int, limit: int) -> Dict[str, Any]:
+        """
+        Estimate a wallet's top tokens from a sample of its token transfers.
+
+        Args:
+            wallet_id (str): The normalized wallet address
+            days (int): Number of days to look back
+            limit (int): Number of top tokens to return
+
+        Returns:
+            Dict[str, Any]: The top tokens under "rows", each with estimated transaction_count and
+                sent/received, transaction_count_error and volume_relative_error, plus the sample used
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        days, limit = self._validate_limits(days, limit)
+        rows = await self._approximate_rows("top_tokens", wallet_id, days)
+        fraction = self.sample_percent / 100
+        sampled = {row["token_address"]: row["sampled_transfers"] for row in rows}
+        estimated = [{
+            "token_address": row["token_address"],
+            "transaction_count": self._estimate(row["sampled_transfers"])[0],
+            "sent_raw": (row["sent_raw"] or 0.0) / fraction,
+            "received_raw": (row["received_raw"] or 0.0) / fraction,
+        } for row in rows]
+        top = self._scale_top_tokens(estimated, await self.tokens.lookup(sampled), limit)
+        for token in top:
+            count = sampled[token["token_address"]]
+            token["transaction_count_error"] = self._estimate(count)[1]
+            token["volume_relative_error"] = round(self.ERROR_BOUND_Z * math.sqrt((1 - fraction) / count), 3)
+        return self._approximate_result(days, rows=top)
+
+    async def _approximate_wallet_info(self, wallet_id: str, days: int) -> Dict[str, Any]:
+        """
+        Estimate a wallet's info from a sample of its transactions.
+
+        Args:
+            wallet_id (str): The normalized wallet address
+            days (int): Number of days to look back
+
+        Returns:
+            Dict[str, Any]: first_seen (day of the earliest sampled transaction; the first one may be
+                earlier), estimated total_transactions and total_transactions_error, counterparties_at_least
+                and is_contract, plus the sample used
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        days, _ = self._validate_limits(days, 0)
+        rows = await self._approximate_rows("wallet_info", wallet_id, days)
+        row = rows[0] if rows else {"first_seen": None, "sampled_transactions": 0,
+                                    "sampled_counterparties": 0, "is_contract": False}
+        first_seen = row["first_seen"]
+        total, error = self._estimate(row["sampled_transactions"])
+        return self._approximate_result(
+            days,
+            first_seen=first_seen and first_seen.replace(hour=0, minute=0, second=0, microsecond=0),
+            total_transactions=total,
+            total_transactions_error=error,
+            counterparties_at_least=row["sampled_counterparties"],
+            is_contract=row["is_contract"],
+        )
@@ -0,0 +1,218 @@
+from crypto_queries import QUERY_BUILDERS
+from query_builder import normalize_address
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+class CryptoBatchMixin:
+    """
+    Multi-wallet variants of the CryptoClient queries.
+
+    Each call sends one array-filtered query for all wallets not already cached,
+    so N wallets cost roughly one scan instead of N. Results are split by wallet
+    and cached per wallet, so later single-wallet calls hit the cache.
+    """
+    MAX_BATCH_WALLETS = 1000
+
+    async def _query_rows_by_wallet(
+        self,
+        kind: str,
+        wallet_ids: List[str],
+        days: int,
+        limit: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Tuple[Dict[str, List[Dict[str, Any]]], int]:
+        """
+        Run one query for the given wallets and split the rows per wallet.
+
+        Top tokens and wallet info are read from the summary tables when they cover the window.
+
+        Args:
+            kind (str): Query kind, one of QUERY_BUILDERS
+            wallet_ids (List[str]): The normalized wallet addresses to query
+            days (int): Number of days to look back
+            limit (int): Maximum number of rows per wallet
+            since (Optional[datetime]): Narrower lower bound on block_timestamp. Defaults to None.
+            until (Optional[datetime]): Exclusive upper bound on block_timestamp. Defaults to None.
+
+        Returns:
+            Tuple[Dict[str, List[Dict[str, Any]]], int]: Rows for each wallet, and bytes processed
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        builder = await self._summary_builder(kind, days, since, until) or QUERY_BUILDERS[kind]
+        rows = await self._execute_safe_query(builder(wallet_ids, days, limit, since=since, until=until))
+        grouped = {wallet_id: [] for wallet_id in wallet_ids}
+        for row in rows:
+            grouped[row.pop("wallet_id")].append(row)
+        return await self._apply_token_index(kind, grouped, limit), getattr(rows, "bytes_processed", 0)
+
+    async def _run_batch_query(
+        self,
+        kind: str,
+        wallet_ids: List[str],
+        days: int,
+        limit: int,
+        time_ordered: bool
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Run one batched query for the given wallets and cache each wallet's rows.
+
+        Args:
+            kind (str): Query kind, one of QUERY_BUILDERS
+            wallet_ids (List[str]): The normalized wallet addresses to query
+            days (int): Number of days to look back
+            limit (int): Maximum number of rows per wallet
+            time_ordered (bool): Whether results are ordered newest first by block_timestamp
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Rows for each wallet
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        grouped, bytes_processed = await self._query_rows_by_wallet(kind, wallet_ids, days, limit)
+        bytes_per_wallet = bytes_processed // len(wallet_ids)
+        for wallet_id, wallet_rows in grouped.items():
+            self.cache.put(kind, wallet_id, days, limit, wallet_rows, time_ordered,
+                           bytes_processed=bytes_per_wallet)
+        return grouped
+
+    async def _execute_batch_query(
+        self,
+        kind: str,
+        wallet_ids: List[str],
+        days: Optional[int],
+        limit: Optional[int],
+        time_ordered: bool
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Serve cached wallets from the cache and query the rest in one batch.
+
+        Args:
+            kind (str): Query kind, one of BATCH_QUERIES
+            wallet_ids (List[str]): The wallet addresses to query
+            days (Optional[int]): Number of days to look back, or None for the default
+            limit (Optional[int]): Maximum number of rows per wallet, or None for the default
+            time_ordered (bool): Whether results are ordered newest first by block_timestamp
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Rows for each requested wallet, keyed by normalized address
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+            ValueError: If more than MAX_BATCH_WALLETS wallets are requested
+        """
+        chain = "solana" if kind == "sol_transfers" else "ethereum"
+        wallet_ids = list(dict.fromkeys(normalize_address(wallet_id, chain) for wallet_id in wallet_ids))
+        if len(wallet_ids) > self.MAX_BATCH_WALLETS:
+            raise ValueError(f"At most {self.MAX_BATCH_WALLETS} wallets can be queried in one batch")
+        days, limit = self._validate_limits(
+            self.DEFAULT_DAYS_TO_LOOK_BACK if days is None else days,
+            self.DEFAULT_TRANSACTION_LIMIT if limit is None else limit
+        )
+        limit = self.FIXED_ROW_LIMITS.get(kind, limit)
+
+        results = {}
+        missing = []
+        for wallet_id in wallet_ids:
+            cached = self.cache.get(kind, wallet_id, days, limit)
+            if cached is None:
+                missing.append(wallet_id)
+            else:
+                results[wallet_id] = cached
+
+        if missing:
+            results.update(await self._run_batch_query(kind, missing, days, limit, time_ordered))
+
+        return {wallet_id: results[wallet_id] for wallet_id in wallet_ids}
+
+    async def get_usdc_transactions_batch(self, wallet_ids: List[str], days: Optional[int] = None, limit: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get USDC token transfers for several wallet addresses in one query.
+
+        Args:
+            wallet_ids (List[str]): The Ethereum wallet addresses to query
+            days (int, optional): Number of days to look back. Defaults to DEFAULT_DAYS_TO_LOOK_BACK.
+            limit (int, optional): Maximum number of transactions per wallet. Defaults to DEFAULT_TRANSACTION_LIMIT.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Transactions keyed by wallet address
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        return await self._execute_batch_query("usdc_transactions", wallet_ids, days, limit, time_ordered=True)
+
+    async def get_eth_transfers_batch(self, wallet_ids: List[str], days: Optional[int] = None, limit: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get ETH transfers for several wallet addresses in one query.
+
+        Args:
+            wallet_ids (List[str]): The Ethereum wallet addresses to query
+            days (int, optional): Number of days to look back. Defaults to DEFAULT_DAYS_TO_LOOK_BACK.
+            limit (int, optional): Maximum number of transfers per wallet. Defaults to DEFAULT_TRANSACTION_LIMIT.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: ETH transfers keyed by wallet address
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        return await self._execute_batch_query("eth_transfers", wallet_ids, days, limit, time_ordered=True)
+
+    async def get_sol_transfers_batch(self, wallet_ids: List[str], days: Optional[int] = 10, limit: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get SOL transfers for several wallet addresses in one query.
+
+        Args:
+            wallet_ids (List[str]): The Solana wallet addresses to query
+            days (int, optional): Number of days to look back. Defaults to 10.
+            limit (int, optional): Maximum number of transfers per wallet. Defaults to DEFAULT_TRANSACTION_LIMIT.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: SOL transfers keyed by wallet address
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        return await self._execute_batch_query("sol_transfers", wallet_ids, days, limit, time_ordered=True)
+
+    async def get_top_tokens_batch(self, wallet_ids: List[str], days: Optional[int] = None, limit: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get top tokens by volume for several wallets in one query.
+
+        Args:
+            wallet_ids (List[str]): The Ethereum wallet addresses to query
+            days (int, optional): Number of days to look back. Defaults to DEFAULT_DAYS_TO_LOOK_BACK.
+            limit (int, optional): Number of top tokens per wallet. Defaults to DEFAULT_TRANSACTION_LIMIT.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Top tokens keyed by wallet address
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        return await self._execute_batch_query("top_tokens", wallet_ids, days, limit, time_ordered=False)
+
+    async def get_wallet_info_batch(self, wallet_ids: List[str], days: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get basic information about several wallets in one query.
+
+        Args:
+            wallet_ids (List[str]): The Ethereum wallet addresses
+            days (int, optional): Number of days to look back. Defaults to DEFAULT_DAYS_TO_LOOK_BACK.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Wallet information keyed by wallet address, each including
+                first_seen, total_transactions and is_contract
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        results = await self._execute_batch_query("wallet_info", wallet_ids, days, None, time_ordered=False)
+        return {
+            wallet_id: rows[0] if rows else {'first_seen': None, 'total_transactions': 0, 'is_contract': False}
+            for wallet_id, rows in results.items()
+        }
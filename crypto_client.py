@@ -1,18 +1,86 @@
 from bigquery_client import bigquery_client, BigQueryQueryTooLarge
-from crypto_queries import CryptoQueries
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from query_builder import Query, normalize_address
+from query_backend import QueryBackend, RoutingBackend
+from crypto_batch import CryptoBatchMixin
+from crypto_streaming import CryptoStreamingMixin
+from crypto_profile import CryptoProfileMixin
+from crypto_planner import CryptoPlannerMixin
+from crypto_tokens import CryptoTokensMixin
+from crypto_graph import CryptoGraphMixin
+from crypto_approximate import CryptoApproximateMixin
+from crypto_summaries import CryptoSummariesMixin
+from summary_tables import SummaryTables
+from micro_batcher import MicroBatcher
+from query_cache import QueryCache
+from wallet_history import WalletHistoryStore
+from token_index import TokenIndex
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from settings import getenv
+import logging
 
-class CryptoClient:
+if TYPE_CHECKING:
+    from wallet_profile import WalletProfile
+
+logger = logging.getLogger(__name__)
+
+class CryptoClient(CryptoBatchMixin, CryptoStreamingMixin, CryptoProfileMixin, CryptoPlannerMixin, CryptoTokensMixin,
+                   CryptoGraphMixin, CryptoApproximateMixin, CryptoSummariesMixin):
     # Class constants for default values
     DEFAULT_DAYS_TO_LOOK_BACK = 100
     DEFAULT_TRANSACTION_LIMIT = 100
     MAX_DAYS_TO_LOOK_BACK = 500
     MAX_TRANSACTION_LIMIT = 500
+    # Kinds returning a fixed number of rows per wallet whatever the limit, so they are cached and batched under it
+    FIXED_ROW_LIMITS = {"wallet_info": 1}
 
     def __init__(self):
         self.days_to_look_back = self.DEFAULT_DAYS_TO_LOOK_BACK
         self.transaction_limit = self.DEFAULT_TRANSACTION_LIMIT
+        self.sample_percent = float(getenv("APPROXIMATE_SAMPLE_PERCENT", self.DEFAULT_SAMPLE_PERCENT))
+        self.cache = QueryCache(
+            cache_dir=getenv("QUERY_CACHE_DIR", QueryCache.DEFAULT_CACHE_DIR),
+            ttl_seconds=float(getenv("QUERY_CACHE_TTL_SECONDS", QueryCache.DEFAULT_TTL_SECONDS)),
+            max_memory_mb=float(getenv("QUERY_CACHE_MAX_MEMORY_MB", QueryCache.DEFAULT_MAX_MEMORY_MB)),
+            max_disk_mb=float(getenv("QUERY_CACHE_MAX_DISK_MB", QueryCache.DEFAULT_MAX_DISK_MB))
+        )
+        history_path = getenv("WALLET_HISTORY_DB")
+        self.history = WalletHistoryStore(history_path) if history_path else None
+        batch_window_ms = float(getenv("MICRO_BATCH_WINDOW_MS", MicroBatcher.DEFAULT_WINDOW_MS))
+        self.batcher = MicroBatcher(
+            window_ms=batch_window_ms,
+            max_batch_size=int(getenv("MICRO_BATCH_MAX_SIZE", MicroBatcher.DEFAULT_MAX_BATCH_SIZE))
+        ) if batch_window_ms > 0 else None
+        # Loaded wallet profiles, least recently loaded first
+        self.profiles: "OrderedDict[str, WalletProfile]" = OrderedDict()
+        self.backend = self._backend_from_env()
+        self.tokens = TokenIndex(
+            getenv("TOKEN_INDEX_PATH", TokenIndex.DEFAULT_PATH),
+            self.backend,
+            refresh_seconds=float(getenv("TOKEN_INDEX_REFRESH_SECONDS", TokenIndex.DEFAULT_REFRESH_SECONDS))
+        )
+        summary_dataset = getenv("SUMMARY_DATASET")
+        self.summaries = SummaryTables(summary_dataset) if summary_dataset else None
+        self.summary_max_staleness = timedelta(seconds=float(
+            getenv("SUMMARY_MAX_STALENESS_SECONDS", self.DEFAULT_SUMMARY_MAX_STALENESS_SECONDS)))
+        self._summary_state_cache = (float("-inf"), None)
+
+    @staticmethod
+    def _backend_from_env() -> QueryBackend:
+        """
+        Choose the query backend from QUERY_BACKEND: "bigquery" (default), "duckdb" for local
+        Parquet extracts only, or "auto" for local extracts where they cover a query and BigQuery otherwise.
+
+        Returns:
+            QueryBackend: The backend queries run on
+        """
+        backend = getenv("QUERY_BACKEND", "bigquery").lower()
+        if backend == "bigquery":
+            return bigquery_client
+        from duckdb_backend import DuckDBBackend
+        local = DuckDBBackend(getenv("LOCAL_PARQUET_DIR", "parquet"))
+        return RoutingBackend(local, bigquery_client) if backend == "auto" else local
 
     def _validate_limits(self, days: int, limit: int) -> tuple[int, int]:
         """
@@ -30,12 +98,12 @@ class CryptoClient:
             min(limit, self.MAX_TRANSACTION_LIMIT)
         )
 
-    async def _execute_safe_query(self, query: str) -> Optional[List[Dict[str, Any]]]:
+    async def _execute_safe_query(self, query: Query) -> Optional[List[Dict[str, Any]]]:
         """
         Execute a query with size checking and error handling.
         
         Args:
-            query (str): The SQL query to execute
+            query (Query): The parameterized query to execute
             
         Returns:
             Optional[List[Dict[str, Any]]]: Query results or None if query is too large
@@ -44,11 +112,66 @@ class CryptoClient:
             BigQueryQueryTooLarge: If the query would process too much data
         """
         try:
-            return await bigquery_client.execute_query(query)
+            return await self.backend.execute_query(query)
         except BigQueryQueryTooLarge as e:
-            print(f"Warning: {str(e)}")
+            logger.warning("%s", e)
             raise
 
+    async def _fetch_wallet_rows(
+        self,
+        kind: str,
+        wallet_id: str,
+        days: int,
+        limit: int,
+        time_ordered: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Get one wallet's rows for a query kind, from the cache when possible.
+
+        A loaded wallet profile covering the window answers without a query.
+        Otherwise, newest-first transfer lists are synced incrementally through
+        the history store when it is enabled. Other misses are merged by the
+        micro-batcher when it is enabled, or queried on their own.
+
+        Args:
+            kind (str): Query kind, one of QUERY_BUILDERS
+            wallet_id (str): The normalized wallet address
+            days (int): Number of days to look back
+            limit (int): Maximum number of rows
+            time_ordered (bool): Whether rows are ordered newest first by block_timestamp
+
+        Returns:
+            List[Dict[str, Any]]: Query results
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        days, limit = self._validate_limits(days, limit)
+        limit = self.FIXED_ROW_LIMITS.get(kind, limit)
+        cached = self.cache.get(kind, wallet_id, days, limit)
+        if cached is not None:
+            return cached
+
+        profile_rows = self._profile_rows(kind, wallet_id, days, limit)
+        if profile_rows is not None:
+            return profile_rows
+
+        if time_ordered and self.history is not None:
+            async def run_query(since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+                rows, _ = await self._query_rows_by_wallet(kind, [wallet_id], days, limit, since=since)
+                return rows[wallet_id]
+
+            rows = await self.history.sync(kind, wallet_id, days, limit, run_query)
+            self.cache.put(kind, wallet_id, days, limit, rows, time_ordered)
+            return rows
+
+        if self.batcher is not None:
+            return await self.batcher.submit((kind, days, limit), wallet_id,
+                lambda wallet_ids: self._run_batch_query(kind, wallet_ids, days, limit, time_ordered))
+
+        rows = await self._run_batch_query(kind, [wallet_id], days, limit, time_ordered)
+        return rows[wallet_id]
+
     async def get_usdc_transactions(self, wallet_id: str, days: int = DEFAULT_DAYS_TO_LOOK_BACK, limit: int = DEFAULT_TRANSACTION_LIMIT) -> List[Dict[str, Any]]:
         """
         Get USDC token transfers for a given wallet address.
@@ -64,15 +187,8 @@ class CryptoClient:
         Raises:
             BigQueryQueryTooLarge: If the query would process too much data
         """
-        days, limit = self._validate_limits(days, limit)
-        query = CryptoQueries.format_query(CryptoQueries.USDC_TRANSACTIONS,
-            token_address=CryptoQueries.USDC_TOKEN_ADDRESS,
-            wallet_id=wallet_id,
-            days=days,
-            limit=limit
-        )
-        
-        transactions = await self._execute_safe_query(query)
+        transactions = await self._fetch_wallet_rows("usdc_transactions", normalize_address(wallet_id),
+            days, limit, time_ordered=True)
         return transactions
 
     async def get_eth_transfers(self, wallet_id: str, days: int = DEFAULT_DAYS_TO_LOOK_BACK, limit: int = DEFAULT_TRANSACTION_LIMIT) -> List[Dict[str, Any]]:
@@ -90,17 +206,12 @@ class CryptoClient:
         Raises:
             BigQueryQueryTooLarge: If the query would process too much data
         """
-        days, limit = self._validate_limits(days, limit)
-        query = CryptoQueries.format_query(CryptoQueries.ETH_TRANSFERS,
-            wallet_id=wallet_id,
-            days=days,
-            limit=limit
-        )
-        
-        transfers = await self._execute_safe_query(query)            
+        transfers = await self._fetch_wallet_rows("eth_transfers", normalize_address(wallet_id),
+            days, limit, time_ordered=True)
         return transfers
 
-    async def get_top_tokens(self, wallet_id: str, days: int = DEFAULT_DAYS_TO_LOOK_BACK, limit: int = DEFAULT_TRANSACTION_LIMIT) -> List[Dict[str, Any]]:
+    async def get_top_tokens(self, wallet_id: str, days: int = DEFAULT_DAYS_TO_LOOK_BACK, limit: int = DEFAULT_TRANSACTION_LIMIT,
+                             mode: str = "exact") -> List[Dict[str, Any]] | Dict[str, Any]:
         """
         Get top tokens by volume for a given wallet.
         
@@ -108,21 +219,21 @@ class CryptoClient:
             wallet_id (str): The Ethereum wallet address to query
             days (int, optional): Number of days to look back. Defaults to DEFAULT_DAYS_TO_LOOK_BACK.
             limit (int, optional): Number of top tokens to return. Defaults to DEFAULT_TRANSACTION_LIMIT.
+            mode (str, optional): "exact", or "approximate" to estimate from a sample (see
+                CryptoApproximateMixin). Defaults to "exact".
 
         Returns:
-            List[Dict[str, Any]]: List of top tokens with transaction counts and volumes
+            List[Dict[str, Any]] | Dict[str, Any]: List of top tokens with transaction counts and volumes;
+                in approximate mode, a dict with the estimates under "rows" and their error bounds
             
         Raises:
             BigQueryQueryTooLarge: If the query would process too much data
+            ValueError: If the mode is not supported
         """
-        days, limit = self._validate_limits(days, limit)
-        query = CryptoQueries.format_query(CryptoQueries.TOP_TOKENS,
-            wallet_id=wallet_id,
-            days=days,
-            limit=limit
-        )
-        
-        return await self._execute_safe_query(query)
+        if self._is_approximate(mode):
+            return await self._approximate_top_tokens(normalize_address(wallet_id), days, limit)
+        return await self._fetch_wallet_rows("top_tokens", normalize_address(wallet_id),
+            days, limit, time_ordered=False)
 
     async def get_sol_transfers(self, wallet_id: str, days: int = 10, limit: int = DEFAULT_TRANSACTION_LIMIT) -> List[Dict[str, Any]]:
         """
@@ -139,36 +250,35 @@ class CryptoClient:
         Raises:
             BigQueryQueryTooLarge: If the query would process too much data
         """
-        days, limit = self._validate_limits(days, limit)
-        query = CryptoQueries.format_query(CryptoQueries.SOL_TRANSFERS,
-            wallet_id=wallet_id,
-            days=days,
-            limit=limit
-        )
-        return await self._execute_safe_query(query)
+        return await self._fetch_wallet_rows("sol_transfers", normalize_address(wallet_id, "solana"),
+            days, limit, time_ordered=True)
 
-    async def get_wallet_info(self, wallet_id: str, days: int = DEFAULT_DAYS_TO_LOOK_BACK, limit: int = DEFAULT_TRANSACTION_LIMIT) -> Dict[str, Any]:
+    async def get_wallet_info(self, wallet_id: str, days: int = DEFAULT_DAYS_TO_LOOK_BACK, limit: int = DEFAULT_TRANSACTION_LIMIT,
+                              mode: str = "exact") -> Dict[str, Any]:
         """
         Get basic information about a wallet.
         
         Args:
             wallet_id (str): The Ethereum wallet address
             days (int, optional): Number of days to look back. Defaults to DEFAULT_DAYS_TO_LOOK_BACK.
-            limit (int, optional): Maximum number of transactions to return. Defaults to DEFAULT_TRANSACTION_LIMIT.
+            limit (int, optional): Unused; there is one row per wallet. Defaults to DEFAULT_TRANSACTION_LIMIT.
+            mode (str, optional): "exact", or "approximate" to estimate from a sample (see
+                CryptoApproximateMixin). Defaults to "exact".
             
         Returns:
             Dict[str, Any]: Dictionary containing wallet information including:
                 - first_seen: First transaction timestamp
                 - total_transactions: Total number of transactions
                 - is_contract: Whether the address is a contract
+                In approximate mode, estimates with their error bounds (see _approximate_wallet_info)
+
+        Raises:
+            ValueError: If the mode is not supported
         """
-        days, limit = self._validate_limits(days, limit)
-        query = CryptoQueries.format_query(CryptoQueries.WALLET_INFO,
-            wallet_id=wallet_id,
-            days=days,
-            limit=limit
-        )
-        result = await self._execute_safe_query(query)
+        if self._is_approximate(mode):
+            return await self._approximate_wallet_info(normalize_address(wallet_id), days)
+        result = await self._fetch_wallet_rows("wallet_info", normalize_address(wallet_id),
+            days, limit, time_ordered=False)
         return result[0] if result else {
             'first_seen': None,
             'total_transactions': 0,
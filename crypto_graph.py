@@ -0,0 +1,75 @@
+from query_builder import normalize_address
+from typing import Dict, Any
+
+class CryptoGraphMixin:
+    """
+    Multi-hop counterparty graphs for CryptoClient.
+
+    The graph is expanded breadth-first with one query per hop covering the
+    whole frontier, so a 2-hop graph costs two jobs instead of a transfer
+    query per neighbor. Addresses already expanded are never queried again.
+    """
+    DEFAULT_GRAPH_HOPS = 2
+    MAX_GRAPH_HOPS = 3
+    DEFAULT_GRAPH_MAX_NODES = 200
+    MAX_GRAPH_NODES = 2000
+    # Each hop scans the whole window of the transfer table, so graphs default to a shorter one
+    DEFAULT_GRAPH_DAYS = 30
+
+    async def get_counterparty_graph(
+        self,
+        wallet_id: str,
+        hops: int = DEFAULT_GRAPH_HOPS,
+        min_value: float = 0.0,
+        max_nodes: int = DEFAULT_GRAPH_MAX_NODES,
+        asset: str = "eth",
+        days: int = DEFAULT_GRAPH_DAYS
+    ) -> Dict[str, Any]:
+        """
+        Get the graph of a wallet's counterparties, their counterparties, and so on.
+
+        Args:
+            wallet_id (str): The Ethereum wallet address to start from
+            hops (int, optional): Number of hops to expand, at most MAX_GRAPH_HOPS. Defaults to DEFAULT_GRAPH_HOPS.
+            min_value (float, optional): Minimum volume between two wallets, in asset units, for an edge. Defaults to 0.0.
+            max_nodes (int, optional): Maximum wallets in the graph; the weakest counterparties are pruned
+                beyond it. Defaults to DEFAULT_GRAPH_MAX_NODES.
+            asset (str, optional): Transfers to follow, "eth" or "usdc". Defaults to "eth".
+            days (int, optional): Number of days to look back. Defaults to DEFAULT_GRAPH_DAYS.
+
+        Returns:
+            Dict[str, Any]: The nodes (address, hop, degree, volume), the edges (source, target,
+                transfer_count, and sent/received seen from the source), how many counterparties
+                were pruned, and how many queries were run
+
+        Raises:
+            BigQueryQueryTooLarge: If a hop's query would process too much data
+            ValueError: If the asset is not supported
+        """
+        # NumPy is only imported once a graph is built
+        from counterparty_graph import GRAPH_ASSETS, GraphBuilder, counterparty_query
+
+        if asset not in GRAPH_ASSETS:
+            raise ValueError(f"Unsupported asset {asset!r}; use one of {', '.join(GRAPH_ASSETS)}")
+        wallet_id = normalize_address(wallet_id)
+        days, _ = self._validate_limits(days, 0)
+        hops = max(1, min(hops, self.MAX_GRAPH_HOPS))
+        max_nodes = max(1, min(max_nodes, self.MAX_GRAPH_NODES))
+
+        builder = GraphBuilder(wallet_id, max_nodes)
+        frontier, queries = [wallet_id], 0
+        for hop in range(1, hops + 1):
+            if not frontier:
+                break
+            rows = await self._execute_safe_query(counterparty_query(frontier, asset, days, min_value, max_nodes))
+            queries += 1
+            frontier = builder.add_hop(frontier, rows, hop)
+        return {
+            "wallet_id": wallet_id,
+            "asset": asset,
+            "days": days,
+            "hops": hops,
+            **builder.build().as_dict(),
+            "pruned_nodes": len(builder.pruned),
+            "queries": queries,
+        }
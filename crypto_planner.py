@@ -0,0 +1,138 @@
+from bigquery_client import bigquery_client, BigQueryQueryTooLarge
+from crypto_queries import QUERY_BUILDERS
+from query_builder import normalize_address
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+
+class CryptoPlannerMixin:
+    """
+    Adaptive windows for CryptoClient queries that would exceed the size limit.
+
+    Instead of failing, the largest window (in days) that fits under the
+    backend's size limit (see QueryBackend.fits: on BigQuery the cached
+    dry-run estimate against max_query_size_gb, or the caller's remaining
+    byte budget if lower) is found by binary search, its rows are returned
+    flagged as truncated, and older windows can be fetched in later chunks
+    by passing the returned offset.
+    """
+    TIME_ORDERED_KINDS = ("usdc_transactions", "eth_transfers", "sol_transfers")
+    # Default look-back per kind where it differs from DEFAULT_DAYS_TO_LOOK_BACK
+    KIND_DEFAULT_DAYS = {"sol_transfers": 10}
+    # Wallets the warm-up estimates with; estimates depend on the window, not the wallet
+    WARM_UP_WALLETS = {"sol_transfers": "11111111111111111111111111111111"}
+    DEFAULT_WARM_UP_WALLET = "0x" + "0" * 40
+
+    async def warm_up(self) -> None:
+        """
+        Prepare for the first tool call in the background.
+
+        Creates the BigQuery client (importing the library and resolving
+        credentials), then checks each query kind over its default window
+        against the backend's size limit, which dry-runs it on BigQuery:
+        fetching an access token, opening the connection and filling the
+        estimate cache (skipped for trusted shapes and queries answered
+        locally). Then the token index is loaded or refreshed if stale.
+
+        Raises:
+            Exception: Whatever the client raises, e.g. missing credentials
+        """
+        if self.backend.name != "duckdb":
+            await bigquery_client.connect()
+        for kind, build in QUERY_BUILDERS.items():
+            wallet_id = self.WARM_UP_WALLETS.get(kind, self.DEFAULT_WARM_UP_WALLET)
+            days = self.KIND_DEFAULT_DAYS.get(kind, self.DEFAULT_DAYS_TO_LOOK_BACK)
+            await self.backend.fits(build([wallet_id], days, self.DEFAULT_TRANSACTION_LIMIT))
+        await self.tokens.refresh(only_if_stale=True)
+
+    async def _fits(self, kind: str, wallet_id: str, offset_days: int, span_days: int, limit: int) -> bool:
+        """Whether the window of span_days ending offset_days ago fits under the backend's size limit."""
+        until = datetime.now(timezone.utc) - timedelta(days=offset_days) if offset_days else None
+        query = QUERY_BUILDERS[kind]([wallet_id], offset_days + span_days, limit, until=until)
+        return await self.backend.fits(query)
+
+    async def _fit_window(self, kind: str, wallet_id: str, offset_days: int, span_days: int, limit: int) -> int:
+        """
+        Find the largest window, up to span_days, ending offset_days ago that fits under the size limit.
+
+        Args:
+            kind (str): Query kind, one of QUERY_BUILDERS
+            wallet_id (str): The normalized wallet address
+            offset_days (int): How many days ago the window ends
+            span_days (int): Largest window wanted, in days
+            limit (int): Maximum number of rows
+
+        Returns:
+            int: Window length in days
+
+        Raises:
+            BigQueryQueryTooLarge: If not even a one-day window fits
+        """
+        if await self._fits(kind, wallet_id, offset_days, span_days, limit):
+            return span_days
+        # Scanned bytes grow with the window, so the fitting windows are a prefix of 1..span_days
+        low, high = 0, span_days - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if await self._fits(kind, wallet_id, offset_days, middle, limit):
+                low = middle
+            else:
+                high = middle - 1
+        if low == 0:
+            raise BigQueryQueryTooLarge(f"Even a one-day window of {kind} exceeds the allowed query size")
+        return low
+
+    async def fetch_adaptive_window(
+        self,
+        kind: str,
+        wallet_id: str,
+        days: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset_days: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Get a wallet's rows for the largest part of a window that fits under the size limit.
+
+        Args:
+            kind (str): Query kind, one of QUERY_BUILDERS
+            wallet_id (str): The wallet address to query
+            days (Optional[int]): Number of days to look back in total. Defaults to the kind's default.
+            limit (Optional[int]): Maximum number of rows. Defaults to DEFAULT_TRANSACTION_LIMIT.
+            offset_days (int, optional): Skip the most recent days, to continue a truncated result. Defaults to 0.
+
+        Returns:
+            Dict[str, Any]: The "rows", whether the result is "truncated", the days covered
+                ("from_days_ago", "to_days_ago") and the "next_offset_days" to continue from, or None
+
+        Raises:
+            BigQueryQueryTooLarge: If not even a one-day window fits
+            ValueError: If the kind is unknown or the offset is outside the window
+        """
+        if kind not in QUERY_BUILDERS:
+            raise ValueError(f"Unknown query kind: {kind}")
+        wallet_id = normalize_address(wallet_id, "solana" if kind == "sol_transfers" else "ethereum")
+        days, limit = self._validate_limits(
+            self.KIND_DEFAULT_DAYS.get(kind, self.DEFAULT_DAYS_TO_LOOK_BACK) if days is None else days,
+            self.DEFAULT_TRANSACTION_LIMIT if limit is None else limit
+        )
+        if not 0 <= offset_days < days:
+            raise ValueError(f"offset_days must be between 0 and {days - 1}")
+
+        span_days = await self._fit_window(kind, wallet_id, offset_days, days - offset_days, limit)
+        if offset_days == 0:
+            rows = await self._fetch_wallet_rows(kind, wallet_id, span_days, limit,
+                                                 time_ordered=kind in self.TIME_ORDERED_KINDS)
+        else:
+            # Older chunks are not cached: the result cache keys windows by days back from now
+            until = datetime.now(timezone.utc) - timedelta(days=offset_days)
+            grouped, _ = await self._query_rows_by_wallet(kind, [wallet_id], offset_days + span_days, limit,
+                                                          until=until)
+            rows = grouped[wallet_id]
+
+        covered_until = offset_days + span_days
+        return {
+            "rows": rows,
+            "truncated": covered_until < days,
+            "from_days_ago": covered_until,
+            "to_days_ago": offset_days,
+            "next_offset_days": covered_until if covered_until < days else None,
+        }
@@ -0,0 +1,185 @@
+import asyncio
+from bigquery_errors import BigQueryQueryTooLarge
+from deadlines import remaining
+from query_builder import normalize_address
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+if TYPE_CHECKING:
+    from wallet_profile import WalletProfile
+
+class CryptoProfileMixin:
+    """
+    Wallet profiles for CryptoClient: one raw fetch, many local views.
+
+    A loaded profile serves get_usdc_transactions, get_eth_transfers,
+    get_top_tokens and get_wallet_info for the same wallet without further
+    queries, as long as it covers the requested window and is fresher than
+    the result cache TTL.
+    """
+    PROFILE_MAX_ROWS = 50000
+    MAX_LOADED_PROFILES = 32
+    # Time kept back from the call's deadline to answer with the profile sections already finished
+    PARTIAL_RESULT_MARGIN_SECONDS = 1.0
+
+    # How each query kind is derived from a loaded profile
+    PROFILE_VIEWS = {
+        "usdc_transactions": lambda profile, days, limit: profile.usdc_transactions(days, limit),
+        "eth_transfers": lambda profile, days, limit: profile.eth_transfers(days, limit),
+        "top_tokens": lambda profile, days, limit: profile.top_tokens(days, limit),
+        "wallet_info": lambda profile, days, limit: [profile.wallet_info(days)],
+    }
+
+    async def fetch_profile_rows(self, wallet_ids: List[str], days: int, max_rows: int) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch the raw, labeled profile rows of several wallets in one query.
+
+        Args:
+            wallet_ids (List[str]): The normalized Ethereum wallet addresses
+            days (int): Number of days to look back
+            max_rows (int): Maximum rows per wallet and source (token or native)
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Rows for each wallet, to build a WalletProfile from
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        from wallet_profile import profile_query
+
+        rows = await self._execute_safe_query(profile_query(wallet_ids, days, max_rows))
+        await self._label_token_transfers(rows)
+        grouped = {wallet_id: [] for wallet_id in wallet_ids}
+        for row in rows:
+            grouped[row["wallet_id"]].append(row)
+        return grouped
+
+    async def load_wallet_profile(self, wallet_id: str, days: Optional[int] = None) -> "WalletProfile":
+        """
+        Fetch a wallet's raw transfers for a window once and keep them as a profile.
+
+        Args:
+            wallet_id (str): The Ethereum wallet address
+            days (int, optional): Number of days to look back. Defaults to DEFAULT_DAYS_TO_LOOK_BACK.
+
+        Returns:
+            WalletProfile: The loaded profile
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+        """
+        # NumPy is only imported once a profile is loaded
+        from wallet_profile import WalletProfile
+
+        wallet_id = normalize_address(wallet_id)
+        days, _ = self._validate_limits(self.DEFAULT_DAYS_TO_LOOK_BACK if days is None else days, 0)
+        rows = await self.fetch_profile_rows([wallet_id], days, self.PROFILE_MAX_ROWS)
+        profile = WalletProfile(wallet_id, days, self.PROFILE_MAX_ROWS, rows[wallet_id])
+        self.profiles[wallet_id] = profile
+        self.profiles.move_to_end(wallet_id)
+        while len(self.profiles) > self.MAX_LOADED_PROFILES:
+            self.profiles.popitem(last=False)
+        return profile
+
+    async def get_wallet_profile(self, wallet_id: str, days: Optional[int] = None,
+                                 limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get a wallet's info, ETH transfers, top tokens and USDC transfers in one round trip.
+
+        All four sections come from one wallet profile, a single job reading the
+        token_transfers window once. When that job would be too large, or the
+        wallet is so active that the profile was cut at PROFILE_MAX_ROWS, the
+        sections are queried on their own, concurrently; sections still running
+        just before the call's deadline are then left out (see deadlines.py).
+
+        Args:
+            wallet_id (str): The Ethereum wallet address
+            days (int, optional): Number of days to look back. Defaults to DEFAULT_DAYS_TO_LOOK_BACK.
+            limit (int, optional): Maximum number of rows per section. Defaults to DEFAULT_TRANSACTION_LIMIT.
+
+        Returns:
+            Dict[str, Any]: wallet_id, days, and the wallet_info, eth_transfers, top_tokens and
+                usdc_transactions sections, each shaped like the matching CryptoClient method;
+                partial is True when some sections are None because they missed the deadline
+
+        Raises:
+            BigQueryQueryTooLarge: If a section queried on its own would process too much data
+        """
+        wallet_id = normalize_address(wallet_id)
+        days, limit = self._validate_limits(
+            self.DEFAULT_DAYS_TO_LOOK_BACK if days is None else days,
+            self.DEFAULT_TRANSACTION_LIMIT if limit is None else limit
+        )
+        profile = self.profiles.get(wallet_id)
+        if profile is None or not profile.covers(days, self.cache.ttl_seconds):
+            try:
+                profile = await self.load_wallet_profile(wallet_id, days)
+            except BigQueryQueryTooLarge:
+                profile = None
+
+        if profile is None or profile.truncated:
+            return {"wallet_id": wallet_id, "days": days, **await self._query_profile_sections(wallet_id, days, limit)}
+        return {
+            "wallet_id": wallet_id,
+            "days": days,
+            "wallet_info": profile.wallet_info(days),
+            "eth_transfers": profile.eth_transfers(days, limit),
+            "top_tokens": profile.top_tokens(days, limit),
+            "usdc_transactions": profile.usdc_transactions(days, limit),
+            "partial": False,
+        }
+
+    async def _query_profile_sections(self, wallet_id: str, days: int, limit: int) -> Dict[str, Any]:
+        """
+        Query the sections of get_wallet_profile on their own, concurrently.
+
+        Args:
+            wallet_id (str): The normalized wallet address
+            days (int): Number of days to look back
+            limit (int): Maximum number of rows per section
+
+        Returns:
+            Dict[str, Any]: The sections, None for those cancelled at the deadline, and partial
+
+        Raises:
+            BigQueryQueryTooLarge: If a section would process too much data
+        """
+        tasks = {
+            "wallet_info": asyncio.ensure_future(self.get_wallet_info(wallet_id, days, limit)),
+            "eth_transfers": asyncio.ensure_future(self.get_eth_transfers(wallet_id, days, limit)),
+            "top_tokens": asyncio.ensure_future(self.get_top_tokens(wallet_id, days, limit)),
+            "usdc_transactions": asyncio.ensure_future(self.get_usdc_transactions(wallet_id, days, limit)),
+        }
+        seconds_left = remaining()
+        try:
+            await asyncio.wait(tasks.values(), timeout=None if seconds_left is None
+                               else max(0.0, seconds_left - self.PARTIAL_RESULT_MARGIN_SECONDS))
+        finally:
+            # Cancelling a section still running cancels its BigQuery job
+            for task in tasks.values():
+                task.cancel()
+        errors = [task.exception() for task in tasks.values() if task.done() and not task.cancelled() and task.exception()]
+        if errors:
+            raise errors[0]
+        sections = {name: task.result() if task.done() else None for name, task in tasks.items()}
+        sections["partial"] = any(section is None for section in sections.values())
+        return sections
+
+    def _profile_rows(self, kind: str, wallet_id: str, days: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Derive a query kind's rows from a loaded profile, if one covers the request.
+
+        Args:
+            kind (str): Query kind, one of QUERY_BUILDERS
+            wallet_id (str): The normalized wallet address
+            days (int): Number of days to look back
+            limit (int): Maximum number of rows
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: The rows, or None if no loaded profile can serve them
+        """
+        view = self.PROFILE_VIEWS.get(kind)
+        profile = self.profiles.get(wallet_id)
+        if view is None or profile is None or not profile.covers(days, self.cache.ttl_seconds):
+            return None
+        return view(profile, days, limit)
+
@@ -1,167 +1,280 @@
-from typing import Dict
+from datetime import datetime
+from typing import List, Optional
+from query_builder import (
+    Query, QueryParameter, TransferTable, time_filter, wallet_transfers, window_parameters
+)
 
 class CryptoQueries:
+    """
+    Builders for the parameterized wallet queries.
+
+    Every builder takes a list of wallets (already normalized with
+    normalize_address) and returns rows with a wallet_id column, so the same
+    query serves single-wallet and batched calls.
+    """
     # USDC token address
     USDC_TOKEN_ADDRESS = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
 
-    # Base query template for USDC transactions
-    USDC_TRANSACTIONS = """
-        SELECT 
-            block_timestamp,
-            from_address,
-            to_address,
-            token_address,
-            CAST(value AS NUMERIC) / 1e6 as value_eth,  -- Convert to USDC
-            transaction_hash
-        FROM 
-            bigquery-public-data.crypto_ethereum.token_transfers
-        WHERE 
-            token_address = LOWER('0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48')  -- USDC
-            AND (
-                from_address = '{wallet_id}' 
-                OR to_address = '{wallet_id}'
-            )
-            AND block_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY)
-        ORDER BY 
-            block_timestamp DESC
-        LIMIT {limit};
-    """
+    TOKEN_TRANSFERS = TransferTable(
+        "`bigquery-public-data.crypto_ethereum.token_transfers`", "from_address", "to_address"
+    )
+    TRANSACTIONS = TransferTable(
+        "`bigquery-public-data.crypto_ethereum.transactions`", "from_address", "to_address"
+    )
+    SOL_TOKEN_TRANSFERS = TransferTable(
+        "`bigquery-public-data.crypto_solana_mainnet_us.Token Transfers`", "source", "destination"
+    )
+    # Raw token volume columns of the sent and received branches of a token transfer query
+    TOKEN_SENT_COLUMNS = ("token_address, CAST(value AS FLOAT64) AS sent_raw, "
+                          "IF(to_address = from_address, CAST(value AS FLOAT64), 0.0) AS received_raw")
+    TOKEN_RECEIVED_COLUMNS = "token_address, 0.0 AS sent_raw, CAST(value AS FLOAT64) AS received_raw"
+    TOKENS_TABLE = "`bigquery-public-data.crypto_ethereum.tokens`"
+    CONTRACTS_TABLE = "`bigquery-public-data.crypto_ethereum.contracts`"
 
-    # Query for ETH transfers
-    ETH_TRANSFERS = """
-        SELECT 
-            block_timestamp,
-            from_address,
-            to_address,
-            value / 1e18 as value_eth,  -- Convert from Wei to ETH
-            `hash`,
-            gas_price / 1e9 as gas_price_gwei,  -- Convert from Wei to Gwei
-            receipt_gas_used as gas_used
-        FROM 
-            bigquery-public-data.crypto_ethereum.transactions
-        WHERE 
-            (
-                from_address = '{wallet_id}' 
-                OR to_address = '{wallet_id}'
-            )
-            AND block_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY)
-        ORDER BY 
-            block_timestamp DESC
-        LIMIT {limit};
-    """
+    @staticmethod
+    def _transfer_list(
+        shape: str,
+        table: TransferTable,
+        columns: str,
+        wallet_ids: List[str],
+        days: int,
+        limit: int,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        extra_filter: str = "",
+        extra_parameters: tuple = ()
+    ) -> Query:
+        """
+        Build a newest-first transfer list query with a per-wallet limit applied server-side.
 
-    SOL_TRANSFERS = """
-        SELECT 
-            block_timestamp,
-            source,
-            destination,
-            value / 1e9 as value_sol,  -- Convert to SOL
-            tx_signature
-        FROM 
-            `bigquery-public-data.crypto_solana_mainnet_us.Token Transfers`
-        WHERE 
-            (
-                source = '{wallet_id}' 
-                OR destination = '{wallet_id}'
-            )
-            AND block_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY)
-        ORDER BY 
-            block_timestamp DESC
-        LIMIT {limit};
-    """
-    
-    # Query for getting top tokens by volume
-    TOP_TOKENS = """
-    WITH token_metadata AS (
-    SELECT 
-        LOWER(address) AS address,
-        name,
-        symbol,
-        CAST(decimals AS INT64) AS decimals
-    FROM 
-        `bigquery-public-data.crypto_ethereum.tokens`
-    ),
-
-    filtered_transfers AS (
+        Args:
+            shape (str): Name of the query shape
+            table (TransferTable): The transfer table to read
+            columns (str): Columns to select
+            wallet_ids (List[str]): The wallet addresses to query
+            days (int): Number of days to look back
+            limit (int): Maximum number of transfers per wallet
+            since (Optional[datetime]): Narrower lower bound on block_timestamp
+            until (Optional[datetime]): Exclusive upper bound on block_timestamp
+            extra_filter (str, optional): Additional predicate. Defaults to "".
+            extra_parameters (tuple, optional): Parameters used by extra_filter. Defaults to ().
+
+        Returns:
+            Query: The parameterized query
+        """
+        window = window_parameters(days, since, until)
+        sql = f"""
+        WITH matched AS ({wallet_transfers(table, columns, time_filter(window), extra_filter)})
+        SELECT *
+        FROM matched
+        WHERE TRUE
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY wallet_id ORDER BY block_timestamp DESC) <= @limit
+        ORDER BY wallet_id, block_timestamp DESC
+        """
+        parameters = (
+            QueryParameter("wallet_ids", "STRING", tuple(wallet_ids)),
+            *window,
+            QueryParameter("limit", "INT64", limit),
+            *extra_parameters
+        )
+        return Query(sql, parameters, shape)
+
+    @classmethod
+    def usdc_transactions(cls, wallet_ids: List[str], days: int, limit: int,
+                          since: Optional[datetime] = None, until: Optional[datetime] = None) -> Query:
+        """
+        Build the USDC token transfer query.
+
+        Args:
+            wallet_ids (List[str]): The Ethereum wallet addresses to query
+            days (int): Number of days to look back
+            limit (int): Maximum number of transactions per wallet
+            since (Optional[datetime]): Narrower lower bound on block_timestamp. Defaults to None.
+            until (Optional[datetime]): Exclusive upper bound on block_timestamp. Defaults to None.
+
+        Returns:
+            Query: The parameterized query
+        """
+        columns = """block_timestamp,
+                from_address,
+                to_address,
+                token_address,
+                CAST(value AS NUMERIC) / 1e6 AS value_eth,  -- Convert to USDC
+                transaction_hash"""
+        return cls._transfer_list("usdc_transactions", cls.TOKEN_TRANSFERS, columns,
+            wallet_ids, days, limit, since, until,
+            extra_filter="token_address = @token_address",
+            extra_parameters=(QueryParameter("token_address", "STRING", cls.USDC_TOKEN_ADDRESS),)
+        )
+
+    @classmethod
+    def eth_transfers(cls, wallet_ids: List[str], days: int, limit: int,
+                      since: Optional[datetime] = None, until: Optional[datetime] = None) -> Query:
+        """
+        Build the ETH transfer query.
+
+        Args:
+            wallet_ids (List[str]): The Ethereum wallet addresses to query
+            days (int): Number of days to look back
+            limit (int): Maximum number of transfers per wallet
+            since (Optional[datetime]): Narrower lower bound on block_timestamp. Defaults to None.
+            until (Optional[datetime]): Exclusive upper bound on block_timestamp. Defaults to None.
+
+        Returns:
+            Query: The parameterized query
+        """
+        columns = """block_timestamp,
+                from_address,
+                to_address,
+                value / 1e18 AS value_eth,  -- Convert from Wei to ETH
+                `hash`,
+                gas_price / 1e9 AS gas_price_gwei,  -- Convert from Wei to Gwei
+                receipt_gas_used AS gas_used"""
+        return cls._transfer_list("eth_transfers", cls.TRANSACTIONS, columns,
+            wallet_ids, days, limit, since, until)
+
+    @classmethod
+    def sol_transfers(cls, wallet_ids: List[str], days: int, limit: int,
+                      since: Optional[datetime] = None, until: Optional[datetime] = None) -> Query:
+        """
+        Build the Solana token transfer query.
+
+        Args:
+            wallet_ids (List[str]): The Solana wallet addresses to query
+            days (int): Number of days to look back
+            limit (int): Maximum number of transfers per wallet
+            since (Optional[datetime]): Narrower lower bound on block_timestamp. Defaults to None.
+            until (Optional[datetime]): Exclusive upper bound on block_timestamp. Defaults to None.
+
+        Returns:
+            Query: The parameterized query
+        """
+        columns = """block_timestamp,
+                source,
+                destination,
+                value / 1e9 AS value_sol,  -- Convert to SOL
+                tx_signature"""
+        return cls._transfer_list("sol_transfers", cls.SOL_TOKEN_TRANSFERS, columns,
+            wallet_ids, days, limit, since, until)
+
+    @classmethod
+    def top_tokens(cls, wallet_ids: List[str], days: int, limit: int,
+                   since: Optional[datetime] = None, until: Optional[datetime] = None) -> Query:
+        """
+        Build the per-token raw volume query behind the top tokens.
+
+        Every token a wallet moved comes back with its raw (unscaled) sent and
+        received totals; decimals scaling, labels and the ranking are applied
+        on the client from the token index (see token_index.py), because raw
+        values of tokens with different decimals cannot be ranked server-side.
+
+        Args:
+            wallet_ids (List[str]): The Ethereum wallet addresses to query
+            days (int): Number of days to look back
+            limit (int): Unused; the top tokens are picked on the client
+            since (Optional[datetime]): Narrower lower bound on block_timestamp. Defaults to None.
+            until (Optional[datetime]): Exclusive upper bound on block_timestamp. Defaults to None.
+
+        Returns:
+            Query: The parameterized query
+        """
+        window = window_parameters(days, since, until)
+        transfers = wallet_transfers(cls.TOKEN_TRANSFERS, cls.TOKEN_SENT_COLUMNS, time_filter(window),
+                                     received_columns=cls.TOKEN_RECEIVED_COLUMNS)
+        sql = f"""
+        WITH matched AS ({transfers})
         SELECT
+            wallet_id,
             token_address,
-            LOWER(from_address) AS from_address,
-            LOWER(to_address) AS to_address,
-            CAST(value AS FLOAT64) AS raw_value,
-            block_timestamp
-        FROM
-            `bigquery-public-data.crypto_ethereum.token_transfers`
-        WHERE
-            (LOWER(from_address) = '{wallet_id}' OR LOWER(to_address) = '{wallet_id}')
-            AND block_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY)
-    )
+            COUNT(*) AS transaction_count,
+            SUM(sent_raw) AS sent_raw,
+            SUM(received_raw) AS received_raw
+        FROM matched
+        GROUP BY wallet_id, token_address
+        ORDER BY wallet_id
+        """
+        parameters = (QueryParameter("wallet_ids", "STRING", tuple(wallet_ids)), *window)
+        return Query(sql, parameters, "top_tokens")
 
-    SELECT 
-        ft.token_address,
-        tm.name,
-        tm.symbol,
-        tm.decimals,
-        COUNT(*) AS transaction_count,
-        SUM(
-            CASE 
-                WHEN ft.from_address = '{wallet_id}' THEN ft.raw_value / POW(10, tm.decimals)
-                ELSE 0 
-            END
-        ) AS sent,
-        SUM(
-            CASE 
-                WHEN ft.to_address = '{wallet_id}' THEN ft.raw_value / POW(10, tm.decimals)
-                ELSE 0 
-            END
-        ) AS received
-    FROM 
-        filtered_transfers ft
-    LEFT JOIN 
-        token_metadata tm
-    ON 
-        ft.token_address = tm.address
-    GROUP BY 
-        ft.token_address, tm.name, tm.symbol, tm.decimals
-    HAVING
-        (sent + received) > 0.001
-    ORDER BY 
-        (sent + received) DESC
-    LIMIT {limit};
-    """
+    @classmethod
+    def token_metadata(cls, since: Optional[datetime] = None) -> Query:
+        """
+        Build the token metadata query that loads the local token index.
 
-    WALLET_INFO = """
-        WITH wallet_stats AS (
-            SELECT
-                MIN(block_timestamp) as first_seen,
-                COUNT(*) as total_transactions
-            FROM `bigquery-public-data.crypto_ethereum.transactions`
-            WHERE from_address = '{wallet_id}' OR to_address = '{wallet_id}' 
-            AND block_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY)
-        ),
-        contract_check AS (
-            SELECT COUNT(*) > 0 as is_contract
-            FROM `bigquery-public-data.crypto_ethereum.contracts`
-            WHERE address = '{wallet_id}'
-            AND block_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY)
-        )
+        Args:
+            since (Optional[datetime]): Only tokens created at or after this time, for an
+                incremental refresh. Defaults to None (the whole table).
+
+        Returns:
+            Query: The parameterized query
+        """
+        sql = f"""
         SELECT
-            ws.first_seen,
-            ws.total_transactions,
-            cc.is_contract
-        FROM wallet_stats ws, contract_check cc
-        LIMIT {limit};
-    """
+            LOWER(address) AS address,
+            ANY_VALUE(name) AS name,
+            ANY_VALUE(symbol) AS symbol,
+            ANY_VALUE(SAFE_CAST(decimals AS INT64)) AS decimals,
+            MAX(block_timestamp) AS indexed_through
+        FROM {cls.TOKENS_TABLE}
+        {"WHERE block_timestamp >= @since" if since is not None else ""}
+        GROUP BY 1
+        """
+        parameters = (QueryParameter("since", "TIMESTAMP", since),) if since is not None else ()
+        return Query(sql, parameters, "token_metadata")
 
     @classmethod
-    def format_query(cls, query_template: str, **kwargs) -> str:
+    def wallet_info(cls, wallet_ids: List[str], days: int, limit: Optional[int] = None,
+                    since: Optional[datetime] = None, until: Optional[datetime] = None) -> Query:
         """
-        Format a query with the given parameters.
-        
+        Build the wallet info query (first seen, transaction count, contract status).
+
         Args:
-            query_template (str): The query template to format
-            **kwargs: Named parameters to use in formatting
-            
+            wallet_ids (List[str]): The Ethereum wallet addresses to query
+            days (int): Number of days to look back
+            limit (Optional[int]): Unused; there is one row per wallet. Defaults to None.
+            since (Optional[datetime]): Narrower lower bound on block_timestamp. Defaults to None.
+            until (Optional[datetime]): Exclusive upper bound on block_timestamp. Defaults to None.
+
         Returns:
-            str: Formatted SQL query
+            Query: The parameterized query
         """
-        return query_template.format(**kwargs) 
\ No newline at end of file
+        window = window_parameters(days, since, until)
+        transactions = wallet_transfers(cls.TRANSACTIONS, "block_timestamp", time_filter(window))
+        sql = f"""
+        WITH matched AS ({transactions}),
+
+        wallet_stats AS (
+            SELECT
+                wallet_id,
+                MIN(block_timestamp) AS first_seen,
+                COUNT(*) AS total_transactions
+            FROM matched
+            GROUP BY wallet_id
+        ),
+
+        contracts AS (
+            SELECT DISTINCT address
+            FROM {cls.CONTRACTS_TABLE}
+            WHERE address IN UNNEST(@wallet_ids)
+                AND {time_filter(window)}
+        )
+
+        SELECT
+            wallet_id,
+            ws.first_seen,
+            IFNULL(ws.total_transactions, 0) AS total_transactions,
+            wallet_id IN (SELECT address FROM contracts) AS is_contract
+        FROM UNNEST(@wallet_ids) AS wallet_id
+        LEFT JOIN wallet_stats ws USING (wallet_id)
+        """
+        parameters = (QueryParameter("wallet_ids", "STRING", tuple(wallet_ids)), *window)
+        return Query(sql, parameters, "wallet_info")
+
+# Query builder for each query kind served by CryptoClient
+QUERY_BUILDERS = {
+    "usdc_transactions": CryptoQueries.usdc_transactions,
+    "eth_transfers": CryptoQueries.eth_transfers,
+    "sol_transfers": CryptoQueries.sol_transfers,
+    "top_tokens": CryptoQueries.top_tokens,
+    "wallet_info": CryptoQueries.wallet_info,
+}
@@ -0,0 +1,118 @@
+from crypto_queries import QUERY_BUILDERS
+from query_builder import normalize_address
+from typing import List, Dict, Any, AsyncIterator, Optional
+
+class CryptoStreamingMixin:
+    """
+    Paginated and streaming variants of the CryptoClient transfer queries.
+
+    These bypass the result cache and allow much deeper windows and limits
+    than the list-returning methods: rows are delivered a page at a time, so
+    neither memory nor the response size grows with the history length.
+    Queries go to the configured backend; only BigQuery issues cursors, and
+    the local backend returns all rows as one page.
+    """
+    STREAMING_KINDS = ("usdc_transactions", "eth_transfers", "sol_transfers")
+    MAX_PAGINATED_DAYS_TO_LOOK_BACK = 3650
+    MAX_PAGINATED_TRANSACTION_LIMIT = 100000
+    DEFAULT_PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 1000
+
+    def _paginated_query(self, kind: str, wallet_id: str, days: Optional[int], limit: Optional[int]):
+        """
+        Build the single-wallet query for a paginated or streaming call.
+
+        Args:
+            kind (str): Query kind, one of STREAMING_KINDS
+            wallet_id (str): The wallet address to query
+            days (Optional[int]): Number of days to look back, or None for the default
+            limit (Optional[int]): Maximum number of transfers, or None for the default
+
+        Returns:
+            Query: The parameterized query
+
+        Raises:
+            ValueError: If the kind does not support pagination
+        """
+        if kind not in self.STREAMING_KINDS:
+            raise ValueError(f"Pagination is not supported for {kind}")
+        chain = "solana" if kind == "sol_transfers" else "ethereum"
+        days = min(self.DEFAULT_DAYS_TO_LOOK_BACK if days is None else days, self.MAX_PAGINATED_DAYS_TO_LOOK_BACK)
+        limit = min(self.DEFAULT_TRANSACTION_LIMIT if limit is None else limit, self.MAX_PAGINATED_TRANSACTION_LIMIT)
+        return QUERY_BUILDERS[kind]([normalize_address(wallet_id, chain)], days, limit)
+
+    async def _finish_page(self, kind: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop the wallet_id column of a page and label its token transfers."""
+        for row in rows:
+            row.pop("wallet_id", None)
+        return await self._label_token_transfers(rows) if kind in self.LABELED_KINDS else rows
+
+    async def get_transfers_page(
+        self,
+        kind: str,
+        wallet_id: Optional[str] = None,
+        days: Optional[int] = None,
+        limit: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of a wallet's transfers, newest first.
+
+        Without a cursor the query runs and its first page is returned. With a
+        cursor, the next page is read from the earlier query's results; the
+        wallet, days and limit are then ignored.
+
+        Args:
+            kind (str): Query kind, one of STREAMING_KINDS
+            wallet_id (Optional[str]): The wallet address to query; required without a cursor
+            days (Optional[int]): Number of days to look back. Defaults to DEFAULT_DAYS_TO_LOOK_BACK.
+            limit (Optional[int]): Maximum number of transfers over all pages. Defaults to DEFAULT_TRANSACTION_LIMIT.
+            page_size (int, optional): Rows per page. Defaults to DEFAULT_PAGE_SIZE.
+            cursor (Optional[str]): Cursor returned with the previous page. Defaults to None.
+
+        Returns:
+            Dict[str, Any]: The page's "rows", and "next_cursor" (None after the last page)
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+            ValueError: If the cursor is malformed, was not issued by this server or the kind does not support pagination
+        """
+        page_size = max(1, min(page_size, self.MAX_PAGE_SIZE))
+        if cursor is not None:
+            rows, next_cursor = await self.backend.fetch_page(cursor, page_size)
+        elif wallet_id is None:
+            raise ValueError("wallet_id is required to start paginating")
+        else:
+            query = self._paginated_query(kind, wallet_id, days, limit)
+            rows, next_cursor = await self.backend.execute_query_page(query, page_size)
+        return {"rows": await self._finish_page(kind, rows), "next_cursor": next_cursor}
+
+    async def stream_transfers(
+        self,
+        kind: str,
+        wallet_id: str,
+        days: Optional[int] = None,
+        limit: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream a wallet's transfers, newest first, one page at a time.
+
+        Args:
+            kind (str): Query kind, one of STREAMING_KINDS
+            wallet_id (str): The wallet address to query
+            days (Optional[int]): Number of days to look back. Defaults to DEFAULT_DAYS_TO_LOOK_BACK.
+            limit (Optional[int]): Maximum number of transfers. Defaults to DEFAULT_TRANSACTION_LIMIT.
+            page_size (int, optional): Rows per page. Defaults to DEFAULT_PAGE_SIZE.
+
+        Yields:
+            List[Dict[str, Any]]: The transfers in each page
+
+        Raises:
+            BigQueryQueryTooLarge: If the query would process too much data
+            ValueError: If the kind does not support pagination
+        """
+        query = self._paginated_query(kind, wallet_id, days, limit)
+        async for rows in self.backend.execute_query_stream(query, page_size):
+            yield await self._finish_page(kind, rows)
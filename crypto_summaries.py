@@ -0,0 +1,65 @@
+import functools
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from summary_state import SummaryState, load_state, split_window
+from telemetry import record
+
+logger = logging.getLogger(__name__)
+
+class CryptoSummariesMixin:
+    """
+    Top tokens and wallet info from our precomputed summary tables (see summary_tables.py).
+
+    A query is answered from the summaries instead of the raw tables when
+    they reach back to the window's start and their last refresh is recent
+    enough. The summaries answer the window's whole days up to the last
+    refresh; its partial first day and the time since are still read from
+    the raw tables, so the results are the raw query's. Otherwise, and for
+    windows bounded by since or until, the raw tables are queried as before.
+    """
+    SUMMARY_KINDS = ("top_tokens", "wallet_info")
+    # How long the summaries' extent is trusted before it is read again
+    SUMMARY_STATE_TTL_SECONDS = 300
+    # Daily refreshes, with a day of slack for a late or failed run; the days since are read from the raw tables
+    DEFAULT_SUMMARY_MAX_STALENESS_SECONDS = 2 * 86400
+
+    async def _summary_state(self) -> Optional[SummaryState]:
+        """The summaries' extent, read at most every SUMMARY_STATE_TTL_SECONDS; None if unavailable."""
+        loaded_at, state = self._summary_state_cache
+        if time.monotonic() - loaded_at < self.SUMMARY_STATE_TTL_SECONDS:
+            return state
+        try:
+            state = await load_state(self.backend, self.summaries)
+        except Exception as e:
+            # Raw tables answer until the summaries can be read
+            logger.warning("Reading the summary tables' state failed: %s", e)
+            state = None
+        self._summary_state_cache = (time.monotonic(), state)
+        return state
+
+    async def _summary_builder(self, kind: str, days: int, since: Optional[datetime],
+                               until: Optional[datetime]) -> Optional[Callable]:
+        """
+        The summary query builder answering a request, if the summaries cover it.
+
+        Args:
+            kind (str): Query kind, one of QUERY_BUILDERS
+            days (int): Number of days to look back
+            since (Optional[datetime]): Narrower lower bound on block_timestamp
+            until (Optional[datetime]): Exclusive upper bound on block_timestamp
+
+        Returns:
+            Optional[Callable]: A builder with the signature of QUERY_BUILDERS[kind], or None to query the raw tables
+        """
+        if self.summaries is None or kind not in self.SUMMARY_KINDS or since is not None or until is not None:
+            return None
+        state = await self._summary_state()
+        now = datetime.now(timezone.utc)
+        if (state is None or state.coverage_start > now - timedelta(days=days)
+                or now - state.refreshed_through > self.summary_max_staleness
+                or split_window(days, state.refreshed_through) is None):
+            return None
+        record("summary_queries")
+        return functools.partial(getattr(self.summaries, kind), refreshed_through=state.refreshed_through)
@@ -0,0 +1,94 @@
+from typing import List, Dict, Any
+from token_index import TokenMetadata
+
+class CryptoTokensMixin:
+    """
+    Token labels and decimals for CryptoClient results, from the local token index.
+
+    Queries return raw token values and addresses only; names, symbols and
+    decimals scaling are added here, so no query joins the tokens table.
+    """
+    # Result rows below this scaled volume are left out of the top tokens
+    MIN_TOKEN_VOLUME = 0.001
+    # Transfer kinds whose rows carry a token_address to label
+    LABELED_KINDS = ("usdc_transactions",)
+
+    @staticmethod
+    def _label_transfers(rows: List[Dict[str, Any]], tokens: Dict[str, TokenMetadata]) -> None:
+        """Add token_name, token_symbol and token_decimals to transfer rows, in place."""
+        for row in rows:
+            token = tokens.get(row["token_address"])
+            row["token_name"] = token.name if token else None
+            row["token_symbol"] = token.symbol if token else None
+            row["token_decimals"] = token.decimals if token else None
+
+    async def _label_token_transfers(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Label token transfer rows (token_name, token_symbol, token_decimals) from the index.
+
+        Args:
+            rows (List[Dict[str, Any]]): Rows with a token_address column, labeled in place
+
+        Returns:
+            List[Dict[str, Any]]: The same rows
+        """
+        self._label_transfers(rows, await self.tokens.lookup(row["token_address"] for row in rows))
+        return rows
+
+    def _scale_top_tokens(self, rows: List[Dict[str, Any]], tokens: Dict[str, TokenMetadata],
+                          limit: int) -> List[Dict[str, Any]]:
+        """
+        Rank a wallet's raw per-token totals by scaled volume.
+
+        Tokens without known decimals cannot be scaled and are left out.
+
+        Args:
+            rows (List[Dict[str, Any]]): Rows of the top_tokens query for one wallet
+            tokens (Dict[str, TokenMetadata]): Metadata of the tokens in the rows
+            limit (int): Number of top tokens to keep
+
+        Returns:
+            List[Dict[str, Any]]: The top tokens with name, symbol, decimals and scaled sent/received
+        """
+        scaled = []
+        for row in rows:
+            token = tokens.get(row["token_address"])
+            if token is None or token.decimals is None:
+                continue
+            scale = 10.0 ** token.decimals
+            sent, received = (row["sent_raw"] or 0.0) / scale, (row["received_raw"] or 0.0) / scale
+            if sent + received > self.MIN_TOKEN_VOLUME:
+                scaled.append({
+                    "token_address": row["token_address"],
+                    "name": token.name,
+                    "symbol": token.symbol,
+                    "decimals": token.decimals,
+                    "transaction_count": row["transaction_count"],
+                    "sent": sent,
+                    "received": received,
+                })
+        scaled.sort(key=lambda token: token["sent"] + token["received"], reverse=True)
+        return scaled[:limit]
+
+    async def _apply_token_index(self, kind: str, grouped: Dict[str, List[Dict[str, Any]]],
+                                 limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Finish the per-wallet rows of a query kind with token metadata.
+
+        Args:
+            kind (str): Query kind, one of QUERY_BUILDERS
+            grouped (Dict[str, List[Dict[str, Any]]]): Raw rows per wallet
+            limit (int): Maximum number of rows per wallet
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Top tokens scaled and ranked, token transfers labeled,
+                other kinds unchanged
+        """
+        if kind != "top_tokens" and kind not in self.LABELED_KINDS:
+            return grouped
+        tokens = await self.tokens.lookup(row["token_address"] for rows in grouped.values() for row in rows)
+        if kind == "top_tokens":
+            return {wallet_id: self._scale_top_tokens(rows, tokens, limit) for wallet_id, rows in grouped.items()}
+        for rows in grouped.values():
+            self._label_transfers(rows, tokens)
+        return grouped
@@ -0,0 +1,58 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Monotonic time by which the current tool call must answer
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Set the deadline of the work done in the block; it follows tasks and BigQuery worker threads.
+
+    A nested deadline can only shorten the current one.
+
+    Args:
+        seconds (Optional[float]): Time allowed from now, or None (or 0) for no deadline
+    """
+    current = _deadline.get()
+    if seconds:
+        at = time.monotonic() + seconds
+        current = at if current is None else min(current, at)
+    token = _deadline.set(current)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left until the current deadline.
+
+    Returns:
+        Optional[float]: The time left (0 once passed), or None without a deadline
+    """
+    at = _deadline.get()
+    return None if at is None else max(0.0, at - time.monotonic())
+
+def deadline_at() -> Optional[float]:
+    """
+    The current deadline.
+
+    Returns:
+        Optional[float]: Its monotonic time, or None without a deadline
+    """
+    return _deadline.get()
+
+def move_deadline(context: contextvars.Context, at: Optional[float]) -> None:
+    """
+    Set the deadline of work running in another context, e.g. a task shared with callers arriving while it runs.
+
+    Only what starts after the move sees it: a BigQuery job already submitted keeps its timeout.
+
+    Args:
+        context (contextvars.Context): The work's context; not the current one
+        at (Optional[float]): Monotonic time of the new deadline, or None for none
+    """
+    context.run(_deadline.set, at)
@@ -0,0 +1,160 @@
+import asyncio
+import importlib.util
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from crypto_queries import CryptoQueries
+from query_backend import QueryBackend, QueryResult
+from query_builder import Query
+from telemetry import record, timed
+
+try:
+    import duckdb
+except ImportError:  # duckdb is optional; only needed for the local backend
+    duckdb = None
+
+# Results are read through Arrow, so the local backend needs both
+HAS_DUCKDB = duckdb is not None and importlib.util.find_spec("pyarrow") is not None
+
+# Local view name of each BigQuery table read by crypto_queries.py
+LOCAL_TABLES = {
+    CryptoQueries.TRANSACTIONS.table: "transactions",
+    CryptoQueries.TOKEN_TRANSFERS.table: "token_transfers",
+    CryptoQueries.SOL_TOKEN_TRANSFERS.table: "sol_token_transfers",
+    CryptoQueries.TOKENS_TABLE: "tokens",
+    CryptoQueries.CONTRACTS_TABLE: "contracts",
+}
+# Tables the queries read without a time filter; any extract of them covers every window
+UNWINDOWED_TABLES = {"tokens"}
+MANIFEST_FILE = "manifest.json"
+
+# BigQuery-only syntax in the generated SQL and its DuckDB equivalent, applied in order
+DIALECT_REWRITES = [
+    (re.compile(r"FROM UNNEST\(@(\w+)\) AS (\w+)"), r"FROM (SELECT UNNEST($\1) AS \2) AS \1_"),
+    (re.compile(r"IN UNNEST\(@(\w+)\)"), r"IN (SELECT UNNEST($\1))"),
+    (re.compile(r"@(\w+)"), r"$\1"),
+    (re.compile(r"`(\w+)`"), r'"\1"'),
+    (re.compile(r"\bFLOAT64\b"), "DOUBLE"),
+    (re.compile(r"\bINT64\b"), "BIGINT"),
+    # BigQuery timestamps are points in time (UTC)
+    (re.compile(r"\bTIMESTAMP\b"), "TIMESTAMPTZ"),
+    (re.compile(r"\bNUMERIC\b"), "DOUBLE"),
+    (re.compile(r"\bSAFE_CAST\("), "TRY_CAST("),
+]
+
+def to_duckdb_sql(sql: str) -> str:
+    """
+    Translate a query from crypto_queries.py to DuckDB SQL over the local views.
+
+    Args:
+        sql (str): BigQuery standard SQL
+
+    Returns:
+        str: The DuckDB SQL
+    """
+    for table, view in LOCAL_TABLES.items():
+        sql = sql.replace(table, view)
+    for pattern, replacement in DIALECT_REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+class DuckDBBackend(QueryBackend):
+    """
+    Run the wallet queries locally with DuckDB over Parquet extracts.
+
+    Each table is read from <parquet_dir>/<view>/*.parquet (see LOCAL_TABLES).
+    The manifest written by extract_parquet.py records the time range and,
+    for hot-wallet extracts, the wallets each extract holds; covers() uses it
+    to tell which queries can be answered locally. A window must end by the
+    extract's end, so open-ended windows (up to now) go to BigQuery rather
+    than miss the rows newer than the extract.
+    """
+    name = "duckdb"
+
+    def __init__(self, parquet_dir: str):
+        if not HAS_DUCKDB:
+            raise ImportError("The local backend needs duckdb and pyarrow (pip install .[local])")
+        self.parquet_dir = parquet_dir
+        self.connection = duckdb.connect()
+        # Day boundaries (CAST(... AS DATE)) fall on UTC midnight, as in BigQuery
+        self.connection.execute("SET TimeZone = 'UTC'")
+        for view in LOCAL_TABLES.values():
+            path = os.path.join(parquet_dir, view)
+            if os.path.isdir(path):
+                self.connection.execute(
+                    f"CREATE VIEW {view} AS SELECT * FROM read_parquet('{path}/*.parquet')"
+                )
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Read the extent of each extract from the manifest, if there is one."""
+        path = os.path.join(self.parquet_dir, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            manifest = json.load(f)
+        return {
+            view: {
+                "start": datetime.fromisoformat(extract["start"]),
+                "end": datetime.fromisoformat(extract["end"]),
+                "wallets": None if extract.get("wallets") is None else set(extract["wallets"]),
+            }
+            for view, extract in manifest.items()
+        }
+
+    def covers(self, query: Query) -> bool:
+        """
+        Whether the local extracts hold every row a query reads.
+
+        Args:
+            query (Query): The parameterized query
+
+        Returns:
+            bool: True if every table read has an extract spanning the query's window (up to its
+                end_time, or now) and wallets
+        """
+        views = [view for table, view in LOCAL_TABLES.items() if table in query.sql]
+        values = {parameter.name: parameter.value for parameter in query.parameters}
+        start_time: Optional[datetime] = values.get("start_time")
+        end_time = values.get("end_time") or datetime.now(timezone.utc)
+        wallet_ids = set(values.get("wallet_ids", ()))
+        for view in views:
+            extract = self.manifest.get(view)
+            if extract is None:
+                return False
+            if view in UNWINDOWED_TABLES:
+                continue
+            if start_time is None or start_time < extract["start"] or end_time > extract["end"]:
+                return False
+            if extract["wallets"] is not None and not wallet_ids <= extract["wallets"]:
+                return False
+        return bool(views)
+
+    def _run(self, query: Query) -> QueryResult:
+        """Run a query on a cursor of the shared connection (blocking)."""
+        parameters = {
+            parameter.name: list(parameter.value) if parameter.is_array else parameter.value
+            for parameter in query.parameters
+        }
+        cursor = self.connection.cursor()
+        try:
+            with timed("local_query_seconds"):
+                table = cursor.execute(to_duckdb_sql(query.sql), parameters).to_arrow_table()
+            with timed("conversion_seconds"):
+                return QueryResult(table.to_pylist())
+        finally:
+            cursor.close()
+
+    async def execute_query(self, query: Query) -> QueryResult:
+        """
+        Execute a query against the local extracts, off the event loop.
+
+        Args:
+            query (Query): The parameterized query to execute
+
+        Returns:
+            QueryResult: List of dictionaries containing query results (no bytes are billed)
+        """
+        return await asyncio.to_thread(self._run, query)
@@ -0,0 +1,66 @@
+import math
+import time
+from datetime import datetime, timezone
+from typing import Dict, Hashable, Optional, Tuple
+from query_builder import Query
+
+class EstimateCache:
+    """
+    Dry-run byte estimates keyed by query template and window length.
+
+    The bytes a query scans depend on the tables and partitions it reads, not
+    on the wallet literals, so one estimate serves every wallet queried with
+    the same template over a window of the same number of days. Entries
+    expire after a TTL so estimates follow the partitions as they grow.
+    """
+    DEFAULT_TTL_SECONDS = 3600
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, float]] = {}
+        self.counters = {"hits": 0, "misses": 0, "skipped": 0}
+
+    @staticmethod
+    def key(query: Query) -> Hashable:
+        """
+        Identity of a query's scan: its whitespace-normalized SQL and window length in days.
+
+        Args:
+            query (Query): The parameterized query
+
+        Returns:
+            Hashable: The cache key
+        """
+        values = {parameter.name: parameter.value for parameter in query.parameters}
+        window_days = None
+        if "start_time" in values:
+            end_time = values.get("end_time") or datetime.now(timezone.utc)
+            window_days = math.ceil((end_time - values["start_time"]).total_seconds() / 86400)
+        return (" ".join(query.sql.split()), window_days, "end_time" in values)
+
+    def get(self, query: Query) -> Optional[float]:
+        """
+        Get a fresh estimate for a query's template and window.
+
+        Args:
+            query (Query): The parameterized query
+
+        Returns:
+            Optional[float]: Estimated GB processed, or None if unknown or expired
+        """
+        entry = self._entries.get(self.key(query))
+        if entry is None or time.time() - entry[1] > self.ttl_seconds:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return entry[0]
+
+    def put(self, query: Query, usage_gb: float) -> None:
+        """
+        Record a dry-run estimate.
+
+        Args:
+            query (Query): The query that was dry-run
+            usage_gb (float): Estimated GB processed
+        """
+        self._entries[self.key(query)] = (usage_gb, time.time())
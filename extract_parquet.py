@@ -0,0 +1,110 @@
+import argparse
+import glob
+import json
+import os
+from datetime import datetime, timezone
+from typing import List, Optional
+from google.cloud import bigquery
+import pyarrow.parquet as pq
+from bigquery_client import bigquery_client, BigQueryQueryTooLarge
+from crypto_queries import CryptoQueries
+from settings import getenv
+from duckdb_backend import LOCAL_TABLES, MANIFEST_FILE, UNWINDOWED_TABLES
+
+# Columns holding the wallet a row belongs to, per local view
+WALLET_COLUMNS = {
+    "transactions": (CryptoQueries.TRANSACTIONS.from_column, CryptoQueries.TRANSACTIONS.to_column),
+    "token_transfers": (CryptoQueries.TOKEN_TRANSFERS.from_column, CryptoQueries.TOKEN_TRANSFERS.to_column),
+    "sol_token_transfers": (CryptoQueries.SOL_TOKEN_TRANSFERS.from_column, CryptoQueries.SOL_TOKEN_TRANSFERS.to_column),
+    "contracts": ("address",),
+}
+
+def extract_table(view: str, out_dir: str, start: datetime, end: datetime, wallet_ids: Optional[List[str]]) -> int:
+    """
+    Export one table's rows in a window (optionally only those of some wallets) to Parquet.
+
+    Args:
+        view (str): Local view name, one of LOCAL_TABLES' values
+        out_dir (str): Directory holding one sub-directory per view
+        start (datetime): Inclusive start of the window
+        end (datetime): Exclusive end of the window
+        wallet_ids (Optional[List[str]]): Normalized wallet addresses to keep, or None for all rows
+
+    Returns:
+        int: Number of rows written
+
+    Raises:
+        BigQueryQueryTooLarge: If the export would process more than max_query_size_gb GB
+    """
+    table = next(table for table, name in LOCAL_TABLES.items() if name == view)
+    filters, parameters = [], []
+    if view not in UNWINDOWED_TABLES:
+        filters.append("block_timestamp >= @start_time AND block_timestamp < @end_time")
+        parameters += [
+            bigquery.ScalarQueryParameter("start_time", "TIMESTAMP", start),
+            bigquery.ScalarQueryParameter("end_time", "TIMESTAMP", end),
+        ]
+    if wallet_ids is not None and view in WALLET_COLUMNS:
+        filters.append("(" + " OR ".join(f"{column} IN UNNEST(@wallet_ids)" for column in WALLET_COLUMNS[view]) + ")")
+        parameters.append(bigquery.ArrayQueryParameter("wallet_ids", "STRING", wallet_ids))
+    sql = f"SELECT * FROM {table}" + (f" WHERE {' AND '.join(filters)}" if filters else "")
+
+    dry_run = bigquery_client.client.query(
+        sql, job_config=bigquery.QueryJobConfig(query_parameters=parameters, dry_run=True, use_query_cache=False)
+    )
+    usage = dry_run.total_bytes_processed / 1_000_000_000
+    if usage > bigquery_client.max_query_size_gb:
+        raise BigQueryQueryTooLarge(f"Extracting {view} would process {usage:.2f} GB")
+    print(f"Extracting {view} ({usage:.2f} GB)")
+
+    rows = bigquery_client.client.query(sql, job_config=bigquery.QueryJobConfig(query_parameters=parameters)).to_arrow()
+    view_dir = os.path.join(out_dir, view)
+    os.makedirs(view_dir, exist_ok=True)
+    # One extract per view: replace the previous one so the manifest describes all its files
+    for old_file in glob.glob(os.path.join(view_dir, "*.parquet")):
+        os.remove(old_file)
+    pq.write_table(rows, os.path.join(view_dir, "part-0.parquet"))
+    return rows.num_rows
+
+def update_manifest(out_dir: str, views: List[str], start: datetime, end: datetime, wallet_ids: Optional[List[str]]) -> None:
+    """
+    Record the window and wallets of freshly written extracts in the manifest.
+
+    Args:
+        out_dir (str): Directory holding the extracts
+        views (List[str]): The views that were extracted
+        start (datetime): Inclusive start of the window
+        end (datetime): Exclusive end of the window
+        wallet_ids (Optional[List[str]]): Wallets the extracts were limited to, or None for all
+    """
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+    for view in views:
+        manifest[view] = {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "wallets": wallet_ids if view in WALLET_COLUMNS else None,
+        }
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export BigQuery tables to Parquet for the local DuckDB backend")
+    parser.add_argument("--start", required=True, help="Window start (ISO date or timestamp, UTC)")
+    parser.add_argument("--end", help="Window end (ISO date or timestamp, UTC). Defaults to now.")
+    parser.add_argument("--wallets", help="Comma-separated normalized wallet addresses to keep (hot wallets)")
+    parser.add_argument("--tables", default=",".join(LOCAL_TABLES.values()), help="Comma-separated local views to extract")
+    parser.add_argument("--out", default=getenv("LOCAL_PARQUET_DIR", "parquet"))
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    start = datetime.fromisoformat(args.start).replace(tzinfo=timezone.utc)
+    end = min(datetime.fromisoformat(args.end).replace(tzinfo=timezone.utc), now) if args.end else now
+    wallet_ids = [wallet.strip() for wallet in args.wallets.split(",")] if args.wallets else None
+    views = [view.strip() for view in args.tables.split(",")]
+    for view in views:
+        print(f"{view}: {extract_table(view, args.out, start, end, wallet_ids)} rows")
+    update_manifest(args.out, views, start, end, wallet_ids)
@@ -0,0 +1,281 @@
+import functools
+import itertools
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+@dataclass
+class FakeProfile:
+    """Latencies and data sizes emulated by FakeBigQueryClient."""
+    rows_per_wallet: int = 200
+    dry_run_latency_seconds: float = 0.15
+    job_latency_seconds: float = 1.0
+    page_latency_seconds: float = 0.05
+    page_size: int = 10000
+    # GB one day (partition) of a public transfer table scans
+    gb_per_day: float = 0.5
+    # Share of jobs that stall (e.g. stuck in the queue) and how long they take
+    slow_job_fraction: float = 0.0
+    slow_job_latency_seconds: float = 10.0
+    # Share of jobs that fail as soon as they are submitted (a backend error), billing nothing
+    failed_job_fraction: float = 0.0
+    seed: int = 0
+
+def _parameters(job_config) -> Dict[str, Any]:
+    """Values of a job config's query parameters, by name."""
+    return {
+        parameter.name: getattr(parameter, "values", None) or getattr(parameter, "value", None)
+        for parameter in job_config.query_parameters
+    }
+
+def _address(rng: random.Random) -> str:
+    return "0x" + "".join(rng.choices("0123456789abcdef", k=40))
+
+def _transfer_rows(shape: str, wallet_id: str, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Synthetic newest-first rows of one transfer-list or profile shape."""
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        timestamp = now - timedelta(minutes=37 * i + rng.randint(0, 30))
+        other = _address(rng)
+        sender, recipient = (wallet_id, other) if rng.random() < 0.5 else (other, wallet_id)
+        if shape == "sol_transfers":
+            rows.append({"wallet_id": wallet_id, "block_timestamp": timestamp, "source": sender,
+                         "destination": recipient, "value_sol": rng.uniform(0, 50), "tx_signature": _address(rng)})
+        elif shape == "eth_transfers":
+            rows.append({"wallet_id": wallet_id, "block_timestamp": timestamp, "from_address": sender,
+                         "to_address": recipient, "value_eth": rng.uniform(0, 5), "hash": _address(rng),
+                         "gas_price_gwei": rng.uniform(5, 80), "gas_used": 21000})
+        elif shape == "usdc_transactions":
+            rows.append({"wallet_id": wallet_id, "block_timestamp": timestamp, "from_address": sender,
+                         "to_address": recipient, "token_address": "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48",
+                         "value_eth": rng.uniform(0, 10000), "transaction_hash": _address(rng)})
+        else:  # wallet_profile
+            is_token = rng.random() < 0.6
+            rows.append({"wallet_id": wallet_id, "block_timestamp": timestamp, "from_address": sender,
+                         "to_address": recipient, "token_address": f"0x{rng.randint(0, 20):040x}" if is_token else None,
+                         "value": rng.uniform(0, 1e21), "transaction_hash": _address(rng),
+                         "gas_price": None if is_token else rng.uniform(5e9, 8e10),
+                         "gas_used": None if is_token else 21000, "wallet_is_contract": False})
+    return rows
+
+def _top_token_rows(wallet_id: str, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    return [{"wallet_id": wallet_id, "token_address": f"0x{i:040x}", "transaction_count": rng.randint(1, 500),
+             "sent_raw": rng.uniform(0, 1e24), "received_raw": rng.uniform(0, 1e24)} for i in range(count)]
+
+def _counterparty_rows(wallet_id: str, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Counterparties drawn from a shared pool of 1000 addresses, so expanded graphs overlap."""
+    return [{"wallet_id": wallet_id, "counterparty": f"0xc{n:039x}", "transfer_count": rng.randint(1, 50),
+             "sent": rng.uniform(0, 100), "received": rng.uniform(0, 100)}
+            for n in rng.sample(range(1000), min(count, 1000)) if f"0xc{n:039x}" != wallet_id]
+
+def _token_metadata_rows(wallet_id: str, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """The tokens every other generator refers to: USDC and 0x00..00 to 0x00..(count - 1)."""
+    created = datetime.now(timezone.utc) - timedelta(days=30)
+    usdc = {"address": "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48", "name": "USD Coin", "symbol": "USDC",
+            "decimals": 6, "indexed_through": created}
+    return [usdc] + [{"address": f"0x{i:040x}", "name": f"Token {i}", "symbol": f"T{i}", "decimals": 18,
+                      "indexed_through": created} for i in range(count)]
+
+def _approximate_top_token_rows(wallet_id: str, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Top tokens as a 10% sample would see them."""
+    return [{"wallet_id": wallet_id, "token_address": f"0x{i:040x}", "sampled_transfers": rng.randint(1, 50),
+             "sent_raw": rng.uniform(0, 1e23), "received_raw": rng.uniform(0, 1e23)} for i in range(count)]
+
+def _approximate_wallet_info_rows(wallet_id: str, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    return [{"wallet_id": wallet_id, "first_seen": datetime.now(timezone.utc) - timedelta(days=rng.randint(1, 90)),
+             "sampled_transactions": rng.randint(0, 1000), "sampled_counterparties": rng.randint(0, 200),
+             "is_contract": False}]
+
+def _wallet_info_rows(wallet_id: str, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    return [{"wallet_id": wallet_id, "first_seen": datetime.now(timezone.utc) - timedelta(days=rng.randint(1, 90)),
+             "total_transactions": rng.randint(0, 10000), "is_contract": False}]
+
+# How to recognize each query shape in SQL, checked in order
+SHAPE_MARKERS = [
+    ("top_tokens_approximate", "sampled_transfers"),
+    ("wallet_info_approximate", "sampled_transactions"),
+    ("counterparty_graph", "counterparty_edges"),
+    ("token_metadata", "indexed_through"),
+    ("wallet_profile", "wallet_is_contract"),
+    ("sol_transfers", "value_sol"),
+    ("usdc_transactions", "@token_address"),
+    ("eth_transfers", "gas_price_gwei"),
+    ("top_tokens", "transaction_count"),
+    ("wallet_info", "is_contract"),
+]
+
+# Synthetic row generator of each query shape
+ROW_GENERATORS: Dict[str, Callable[[str, int, random.Random], List[Dict[str, Any]]]] = {
+    **{shape: functools.partial(_transfer_rows, shape)
+       for shape in ("wallet_profile", "sol_transfers", "usdc_transactions", "eth_transfers")},
+    "top_tokens": _top_token_rows,
+    "counterparty_graph": _counterparty_rows,
+    "token_metadata": _token_metadata_rows,
+    "wallet_info": _wallet_info_rows,
+    "top_tokens_approximate": _approximate_top_token_rows,
+    "wallet_info_approximate": _approximate_wallet_info_rows,
+}
+
+# A table read, up to the next read or UNION branch, and the partition filters that prune it
+_TABLE_READ = re.compile(r"FROM\s+`([^`]+)`(?:\s+TABLESAMPLE SYSTEM \(([\d.]+) PERCENT\))?(.*?)(?=\bFROM\s+`|\bUNION\b|$)",
+                         re.DOTALL)
+_PARTITION_FILTER = re.compile(r"\b(?:block_timestamp|day)\s*>=\s*(?:CAST\()?@(\w+)")
+_PARTITION_END = re.compile(r"\b(?:block_timestamp|day)\s*<\s*(?:CAST\()?@(\w+)")
+# Days of history a read without a partition filter scans
+FULL_HISTORY_DAYS = 3650
+# Size of tables relative to a public transfer table: token metadata, and our own summary tables
+TOKENS_TABLE_SCALE = 0.001
+SUMMARY_TABLE_SCALE = 0.001
+
+def _read_days(clauses: str, parameters: Dict[str, Any]) -> float:
+    """Days of partitions a table read scans: between its partition filter's bounds, or the whole history."""
+    start = _PARTITION_FILTER.search(clauses)
+    if start is None or start.group(1) not in parameters:
+        return FULL_HISTORY_DAYS
+    end = _PARTITION_END.search(clauses)
+    end_time = (end and parameters.get(end.group(1))) or datetime.now(timezone.utc)
+    return max(1.0, (end_time - parameters[start.group(1)]).total_seconds() / 86400)
+
+class _Table:
+    def __init__(self, table_id: str):
+        self.project, self.dataset_id, self.table_id = table_id.split(".")
+
+class FakeQueryJob:
+    """A query job whose results are ready job_latency_seconds after submission."""
+
+    def __init__(self, client: "FakeBigQueryClient", rows: List[Dict[str, Any]], bytes_processed: int, ready_at: float):
+        self._client = client
+        self._rows = rows
+        self._ready_at = ready_at
+        self.total_bytes_processed = bytes_processed
+        self.total_bytes_billed = bytes_processed
+        self.slot_millis = int(max(0.0, ready_at - time.monotonic()) * 1000)
+        self.error_result = None
+        self.destination = _Table(f"fake.results.job_{id(self):x}")
+
+    def done(self) -> bool:
+        return time.monotonic() >= self._ready_at
+
+    def cancel(self) -> bool:
+        if not self.done():
+            self._ready_at = time.monotonic()
+            self.error_result = {"reason": "stopped", "message": "Job execution was cancelled"}
+            with self._client._lock:
+                self._client.counters["cancelled"] += 1
+        return True
+
+    def result(self, page_size: Optional[int] = None) -> "FakeRowIterator":
+        time.sleep(max(0.0, self._ready_at - time.monotonic()))
+        if self.error_result:
+            raise RuntimeError(self.error_result["message"])
+        return FakeRowIterator(self._rows, page_size or self._client.profile.page_size,
+                               self._client.profile.page_latency_seconds)
+
+class FakeRowIterator:
+    """Rows delivered in pages, each page costing page_latency_seconds."""
+
+    def __init__(self, rows: List[Dict[str, Any]], page_size: int, page_latency_seconds: float):
+        self._rows = rows
+        self._page_size = page_size
+        self._page_latency_seconds = page_latency_seconds
+        self.total_rows = len(rows)
+
+    @property
+    def pages(self) -> Iterator[List[Dict[str, Any]]]:
+        for start in range(0, len(self._rows), self._page_size):
+            time.sleep(self._page_latency_seconds)
+            yield self._rows[start:start + self._page_size]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (row for page in self.pages for row in page)
+
+class FakeBigQueryClient:
+    """
+    Stand-in for bigquery.Client that serves synthetic rows with emulated latencies.
+
+    Rows are generated per wallet from a seeded generator, so runs are
+    reproducible. Jobs, dry runs and bytes processed are counted for the
+    benchmark report.
+    """
+    profile = FakeProfile()
+
+    def __init__(self, project: Optional[str] = None, **kwargs):
+        self.project = project
+        self._results: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.counters = {"dry_runs": 0, "jobs": 0, "cancelled": 0, "bytes_processed": 0}
+        self._stalls = random.Random(self.profile.seed)
+
+    def _bytes_processed(self, sql: str, parameters: Dict[str, Any]) -> int:
+        """
+        Bytes a query scans: every table read costs the days of partitions it reads.
+
+        A read filtered on its partitioning column reads the days between
+        its bounds (at least one), any other read the whole history; sampled
+        reads bill only the sampled blocks. So a template losing its
+        partition filter shows up in the estimates, as it would on BigQuery.
+        """
+        total = 0.0
+        for table, sample, clauses in _TABLE_READ.findall(sql):
+            days = _read_days(clauses, parameters)
+            scale = (TOKENS_TABLE_SCALE if table.endswith(".tokens")
+                     else 1.0 if table.startswith("bigquery-public-data.") else SUMMARY_TABLE_SCALE)
+            total += days * scale * (float(sample) / 100 if sample else 1.0)
+        return int(max(total, 1.0) * self.profile.gb_per_day * 1_000_000_000)
+
+    def _rows(self, sql: str, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        shape = next((shape for shape, marker in SHAPE_MARKERS if marker in sql), "eth_transfers")
+        count = min(self.profile.rows_per_wallet, parameters.get("limit") or self.profile.rows_per_wallet)
+        rows = []
+        # Queries without wallets (the token metadata load) are generated once
+        for wallet_id in parameters.get("wallet_ids") or ("",):
+            rng = random.Random(zlib.crc32(f"{self.profile.seed}:{shape}:{wallet_id}".encode()))
+            rows += ROW_GENERATORS[shape](wallet_id, count, rng)
+        return rows
+
+    def query(self, sql: str, job_config=None) -> FakeQueryJob:
+        parameters = _parameters(job_config)
+        bytes_processed = self._bytes_processed(sql, parameters)
+        with self._lock:
+            self.counters["dry_runs" if job_config.dry_run else "jobs"] += 1
+            if not job_config.dry_run:
+                self.counters["bytes_processed"] += bytes_processed
+        if job_config.dry_run:
+            time.sleep(self.profile.dry_run_latency_seconds)
+            return FakeQueryJob(self, [], bytes_processed, time.monotonic())
+        with self._lock:
+            stalled = self._stalls.random() < self.profile.slow_job_fraction
+            failed = bool(self.profile.failed_job_fraction) and self._stalls.random() < self.profile.failed_job_fraction
+        if failed:
+            job = FakeQueryJob(self, [], 0, time.monotonic())
+            job.error_result = {"reason": "backendError", "message": "Backend error"}
+            return job
+        latency = self.profile.slow_job_latency_seconds if stalled else self.profile.job_latency_seconds
+        job = FakeQueryJob(self, self._rows(sql, parameters), bytes_processed, time.monotonic() + latency)
+        destination = job.destination
+        self._results[f"{destination.project}.{destination.dataset_id}.{destination.table_id}"] = job._rows
+        return job
+
+    def list_rows(self, table_id: str, start_index: int = 0, max_results: Optional[int] = None) -> FakeRowIterator:
+        rows = self._results[table_id]
+        page = list(itertools.islice(rows, start_index, start_index + (max_results or len(rows))))
+        iterator = FakeRowIterator(page, len(page) or 1, self.profile.page_latency_seconds)
+        iterator.total_rows = len(rows)
+        return iterator
+
+def install(profile: FakeProfile) -> None:
+    """
+    Replace bigquery.Client with FakeBigQueryClient; call before importing bigquery_client.
+
+    Args:
+        profile (FakeProfile): Latencies and data sizes to emulate
+    """
+    from google.cloud import bigquery
+    FakeBigQueryClient.profile = profile
+    bigquery.Client = FakeBigQueryClient
@@ -0,0 +1,196 @@
+from mcp.server.fastmcp import FastMCP
+from crypto_client import crypto_client, BigQueryQueryTooLarge
+from bigquery_errors import BigQueryBudgetExceeded
+from bigquery_client import bigquery_client
+from budget_governor import DEFAULT_CALLER
+from telemetry import metrics, timed
+from deadlines import deadline
+from compact_format import dumps, encode
+from settings import getenv
+from contextlib import asynccontextmanager
+from pydantic import Field
+from typing import Annotated, Any, AsyncIterator, Optional
+import asyncio
+import functools
+import inspect
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+# Background warm-up after startup (see CryptoClient.warm_up); the delay lets the handshake finish first
+WARM_UP = getenv("WARM_UP", "true").lower() == "true"
+WARM_UP_DELAY_SECONDS = float(getenv("WARM_UP_DELAY_SECONDS", "1.0"))
+_warm_up_task: Optional[asyncio.Task] = None
+
+async def _warm_up() -> None:
+    await asyncio.sleep(WARM_UP_DELAY_SECONDS)
+    try:
+        await crypto_client.warm_up()
+        logger.info("Warm-up done")
+    except Exception as e:
+        # The first tool call will report the same problem to the client
+        logger.warning("Warm-up failed: %s", e)
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Start the warm-up once the server is running, without holding up the handshake."""
+    global _warm_up_task
+    if WARM_UP and _warm_up_task is None:
+        _warm_up_task = asyncio.create_task(_warm_up())
+    yield
+
+# Shared server instance; tool modules register on it and mcp_server.py runs it
+mcp = FastMCP(lifespan=lifespan)
+
+TOO_LARGE_SUGGESTION = "Try reducing the time window or using a more specific query"
+DEADLINE_SUGGESTION = "Try a shorter time window, a smaller limit, or fewer wallets"
+APPROXIMATE_TOO_LARGE_SUGGESTION = "Try a shorter time window; approximate answers are not cut down to the window that fits"
+BUDGET_SUGGESTION = "Retry after retry_after_seconds, or check the remaining budget with get_budget"
+
+# Time a tool call may take before its queries are cancelled (0: no deadline); tool() can override it per tool
+TOOL_DEADLINE_SECONDS = float(getenv("TOOL_DEADLINE_SECONDS", "120"))
+
+# Whether tools answer in the compact layout (see compact_format.py) when a call does not say, and its float precision
+COMPACT_RESPONSES = getenv("COMPACT_RESPONSES", "false").lower() == "true"
+COMPACT_FLOAT_DIGITS = int(getenv("COMPACT_FLOAT_DIGITS", "6"))
+
+# Share of tool calls whose response is serialized once more to record its size; FastMCP serializes every response itself
+RESPONSE_SIZE_SAMPLE_RATE = float(getenv("TELEMETRY_RESPONSE_SIZE_SAMPLE_RATE", "0.05"))
+
+# Added to every tool's parameters by tool()
+_COMPACT_PARAMETER = inspect.Parameter("compact", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Annotated[
+    Optional[bool],
+    Field(description="Answer in the compact columnar layout: tables as columns, addresses as indexes into "
+                      "a shared dictionary, timestamps as seconds before time_base, rounded numbers. "
+                      "Saves most of the response size on row lists. Defaults to the server setting."),
+])
+
+def current_caller() -> str:
+    """
+    Identify the MCP session making the current request, for per-caller budgets.
+
+    Returns:
+        str: The client id sent by the client, else an id of its session, or DEFAULT_CALLER outside a request
+    """
+    try:
+        ctx = mcp.get_context()
+        return ctx.client_id or f"session-{id(ctx.session):x}"
+    except (LookupError, ValueError):
+        return DEFAULT_CALLER
+
+bigquery_client.governor.resolve_caller = current_caller
+
+def _row_count(result: Any) -> int:
+    """Rows in a tool result: a list of rows, or a dict carrying them under "rows"."""
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict) and isinstance(result.get("rows"), list):
+        return len(result["rows"])
+    return 0
+
+def tool(deadline_seconds: Optional[float] = None):
+    """
+    Register an MCP tool whose calls are traced (see telemetry.py) and bounded by a deadline.
+
+    Besides what the call records while it runs, the trace gets the rows
+    returned, the time spent encoding a compact response and, for a sample
+    of calls, the size of the serialized response. A call still
+    running at its deadline is cancelled, which cancels its BigQuery jobs
+    (see deadlines.py), and answers with an error, as does a call over its
+    caller's byte budget or job rate (with the seconds until it may retry).
+    Every tool also takes a compact flag, answering in the compact layout of
+    compact_format.py.
+
+    Args:
+        deadline_seconds (Optional[float]): Time allowed per call, 0 for none. Defaults to TOOL_DEADLINE_SECONDS.
+
+    Returns:
+        Decorator registering the tool on the shared server
+    """
+    seconds = TOOL_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+
+    def register(func):
+        @functools.wraps(func)
+        async def traced(*args, compact: Optional[bool] = None, **kwargs):
+            with metrics.trace(func.__name__) as trace:
+                try:
+                    with deadline(seconds):
+                        async with asyncio.timeout(seconds or None) as timeout:
+                            result = await func(*args, **kwargs)
+                except TimeoutError:
+                    if not timeout.expired():
+                        raise
+                    result = {
+                        "error": f"{func.__name__} did not finish within {seconds:g}s; its queries were cancelled",
+                        "suggestion": DEADLINE_SUGGESTION,
+                    }
+                    trace.error = "deadline_exceeded"
+                except BigQueryBudgetExceeded as e:
+                    result = {"error": str(e), "retry_after_seconds": e.retry_after_seconds,
+                              "suggestion": BUDGET_SUGGESTION}
+                    trace.error = "budget_exceeded"
+                if trace.error is None and isinstance(result, dict) and "error" in result:
+                    trace.error = "error_result"
+                trace.add("rows", _row_count(result))
+                if (COMPACT_RESPONSES if compact is None else compact) and trace.error is None:
+                    with timed("serialization_seconds"):
+                        result = encode(result, COMPACT_FLOAT_DIGITS)
+                if random.random() < RESPONSE_SIZE_SAMPLE_RATE:
+                    trace.add("sampled_responses")
+                    trace.add("response_bytes", len(dumps(result)))
+            return result
+        signature = inspect.signature(func)
+        traced.__signature__ = signature.replace(parameters=[*signature.parameters.values(), _COMPACT_PARAMETER])
+        return mcp.tool()(traced)
+    return register
+
+def window_kwargs(days: Optional[int], limit: Optional[int]) -> dict:
+    """
+    Build keyword arguments for a CryptoClient call, leaving unset values to the client defaults.
+
+    Args:
+        days (Optional[int]): Number of days to look back
+        limit (Optional[int]): Maximum number of rows
+
+    Returns:
+        dict: Keyword arguments containing only the values that were set
+    """
+    kwargs = {}
+    if days is not None:
+        kwargs["days"] = days
+    if limit is not None:
+        kwargs["limit"] = limit
+    return kwargs
+
+async def adaptive_window(kind: str, wallet_id: str, days: Optional[int], limit: Optional[int], error: BigQueryQueryTooLarge,
+                          mode: Optional[str] = None) -> dict:
+    """
+    Answer an over-size request with the largest window that fits, flagged as truncated.
+
+    An approximate request gets the error instead, rather than exact rows it did not ask for.
+
+    Args:
+        kind (str): Query kind, one of QUERY_BUILDERS
+        wallet_id (str): The wallet address requested
+        days (Optional[int]): Number of days requested
+        limit (Optional[int]): Maximum number of rows
+        error (BigQueryQueryTooLarge): The error of the full-window request
+        mode (Optional[str], optional): The mode requested, "exact" or "approximate". Defaults to None (exact).
+
+    Returns:
+        dict: The adaptive result (see CryptoClient.fetch_adaptive_window), or the original
+            error with a suggestion in approximate mode or if not even a one-day window fits
+    """
+    if mode == "approximate":
+        return {"error": str(error), "mode": mode, "suggestion": APPROXIMATE_TOO_LARGE_SUGGESTION}
+    try:
+        result = await crypto_client.fetch_adaptive_window(kind, wallet_id, days, limit)
+    except BigQueryQueryTooLarge:
+        return {"error": str(error), "suggestion": TOO_LARGE_SUGGESTION}
+    if result["truncated"]:
+        result["note"] = (
+            f"Only the most recent {result['from_days_ago']} days fit the query size limit; "
+            f"call get_older_window with kind={kind!r} and offset_days={result['next_offset_days']} for older data"
+        )
+    return result
@@ -0,0 +1,116 @@
+from mcp_app import tool, window_kwargs, TOO_LARGE_SUGGESTION
+from crypto_client import crypto_client, BigQueryQueryTooLarge
+from typing import Optional
+
+@tool()
+async def get_usdc_transactions_batch(
+    wallet_ids: list[str],
+    days: Optional[int] = None,
+    limit: Optional[int] = None
+) -> dict:
+    """Get the latest USDC transactions for several wallet addresses in a single query. Prefer this over repeated get_usdc_transactions calls when profiling many wallets.
+    Args:
+        wallet_ids (list[str]): The Ethereum wallet addresses to query
+        days (int, optional): Number of days to look back. Defaults to None.
+        limit (int, optional): Maximum number of transactions per wallet. Defaults to None.
+    Returns:
+        dict: Transactions keyed by wallet address
+    Raises:
+        BigQueryQueryTooLarge: If the query would process too much data
+    """
+    try:
+        return await crypto_client.get_usdc_transactions_batch(wallet_ids, **window_kwargs(days, limit))
+    except BigQueryQueryTooLarge as e:
+        return {"error": str(e), "suggestion": TOO_LARGE_SUGGESTION}
+    except ValueError as e:
+        return {"error": str(e)}
+
+@tool()
+async def get_eth_transfers_batch(
+    wallet_ids: list[str],
+    days: Optional[int] = None,
+    limit: Optional[int] = None
+) -> dict:
+    """Get ETH transfers for several wallets in a single query. Prefer this over repeated get_eth_transfers calls when profiling many wallets.
+    Args:
+        wallet_ids (list[str]): The Ethereum wallet addresses to query
+        days (int, optional): Number of days to look back. Defaults to None.
+        limit (int, optional): Maximum number of transfers per wallet. Defaults to None.
+    Returns:
+        dict: ETH transfers keyed by wallet address
+    Raises:
+        BigQueryQueryTooLarge: If the query would process too much data
+    """
+    try:
+        return await crypto_client.get_eth_transfers_batch(wallet_ids, **window_kwargs(days, limit))
+    except BigQueryQueryTooLarge as e:
+        return {"error": str(e), "suggestion": TOO_LARGE_SUGGESTION}
+    except ValueError as e:
+        return {"error": str(e)}
+
+@tool()
+async def get_sol_transfers_batch(
+    wallet_ids: list[str],
+    days: Optional[int] = None,
+    limit: Optional[int] = None
+) -> dict:
+    """Get SOL transfers for several wallets in a single query. Prefer this over repeated get_sol_transfers calls when profiling many wallets.
+    Args:
+        wallet_ids (list[str]): The Solana wallet addresses to query
+        days (int, optional): Number of days to look back. Defaults to None.
+        limit (int, optional): Maximum number of transfers per wallet. Defaults to None.
+    Returns:
+        dict: SOL transfers keyed by wallet address
+    Raises:
+        BigQueryQueryTooLarge: If the query would process too much data
+    """
+    try:
+        return await crypto_client.get_sol_transfers_batch(wallet_ids, **window_kwargs(days, limit))
+    except BigQueryQueryTooLarge as e:
+        return {"error": str(e), "suggestion": TOO_LARGE_SUGGESTION}
+    except ValueError as e:
+        return {"error": str(e)}
+
+@tool()
+async def get_top_tokens_batch(
+    wallet_ids: list[str],
+    days: Optional[int] = None,
+    limit: Optional[int] = None
+) -> dict:
+    """Get top tokens by volume for several wallets in a single query. Prefer this over repeated get_top_tokens calls when profiling many wallets.
+    Args:
+        wallet_ids (list[str]): The Ethereum wallet addresses to query
+        days (int, optional): Number of days to look back. Defaults to None.
+        limit (int, optional): Number of top tokens per wallet. Defaults to None.
+    Returns:
+        dict: Top tokens keyed by wallet address
+    Raises:
+        BigQueryQueryTooLarge: If the query would process too much data
+    """
+    try:
+        return await crypto_client.get_top_tokens_batch(wallet_ids, **window_kwargs(days, limit))
+    except BigQueryQueryTooLarge as e:
+        return {"error": str(e), "suggestion": TOO_LARGE_SUGGESTION}
+    except ValueError as e:
+        return {"error": str(e)}
+
+@tool()
+async def get_wallet_info_batch(
+    wallet_ids: list[str],
+    days: Optional[int] = None
+) -> dict:
+    """Get basic information about several wallets in a single query. Prefer this over repeated get_wallet_info calls when profiling many wallets.
+    Args:
+        wallet_ids (list[str]): The Ethereum wallet addresses to query
+        days (int, optional): Number of days to look back. Defaults to None.
+    Returns:
+        dict: Wallet information keyed by wallet address
+    Raises:
+        BigQueryQueryTooLarge: If the query would process too much data
+    """
+    try:
+        return await crypto_client.get_wallet_info_batch(wallet_ids, **window_kwargs(days, None))
+    except BigQueryQueryTooLarge as e:
+        return {"error": str(e), "suggestion": TOO_LARGE_SUGGESTION}
+    except ValueError as e:
+        return {"error": str(e)}
@@ -0,0 +1,79 @@
+from mcp_app import tool, TOO_LARGE_SUGGESTION
+from crypto_client import crypto_client, BigQueryQueryTooLarge, CryptoClient
+from typing import Optional
+
+@tool()
+async def get_wallet_profile(
+    wallet_id: str,
+    days: Optional[int] = None,
+    limit: Optional[int] = None
+) -> dict:
+    """Get an Ethereum wallet's info, ETH transfers, top tokens and USDC transactions in one call. Prefer it over calling get_wallet_info, get_eth_transfers, get_top_tokens and get_usdc_transactions one after another for the same wallet. Use default values for days and limit unless specified or needed.
+    Args:
+        wallet_id (str): The Ethereum wallet address to query
+        days (int, optional): Number of days to look back. Defaults to None.
+        limit (int, optional): Maximum number of rows per section. Defaults to None.
+    Returns:
+        dict: wallet_info, eth_transfers, top_tokens and usdc_transactions, each shaped like the matching tool's result;
+            when partial is true, the sections that are null did not finish in time
+    Raises:
+        BigQueryQueryTooLarge: If the query would process too much data
+    """
+    try:
+        return await crypto_client.get_wallet_profile(wallet_id, days, limit)
+    except BigQueryQueryTooLarge as e:
+        return {"error": str(e), "suggestion": TOO_LARGE_SUGGESTION}
+
+@tool()
+async def get_counterparty_graph(
+    wallet_id: str,
+    hops: Optional[int] = None,
+    min_value: Optional[float] = None,
+    max_nodes: Optional[int] = None,
+    asset: Optional[str] = None,
+    days: Optional[int] = None
+) -> dict:
+    """Get the network of wallets around a wallet: its counterparties, theirs, and so on, with the volume moved between each pair. Use it instead of fetching the transfers of each counterparty one by one.
+    Args:
+        wallet_id (str): The Ethereum wallet address to start from
+        hops (int, optional): How many steps away from the wallet to go (1 to 3). Defaults to None.
+        min_value (float, optional): Minimum volume between two wallets, in ETH or USDC, to count as an edge. Defaults to None.
+        max_nodes (int, optional): Maximum wallets in the graph; the weakest counterparties are left out beyond it. Defaults to None.
+        asset (str, optional): "eth" or "usdc" transfers. Defaults to None.
+        days (int, optional): Number of days to look back. Defaults to None.
+    Returns:
+        dict: Nodes (address, hop, degree, volume) and edges (source, target, transfer_count, sent and received from the source's side)
+    Raises:
+        BigQueryQueryTooLarge: If the query would process too much data
+    """
+    options = {"hops": hops, "min_value": min_value, "max_nodes": max_nodes, "asset": asset, "days": days}
+    try:
+        return await crypto_client.get_counterparty_graph(
+            wallet_id, **{name: value for name, value in options.items() if value is not None}
+        )
+    except BigQueryQueryTooLarge as e:
+        return {"error": str(e), "suggestion": TOO_LARGE_SUGGESTION}
+    except ValueError as e:
+        return {"error": str(e)}
+
+@tool()
+async def load_wallet_profile(
+    wallet_id: str,
+    days: Optional[int] = None,
+    limit: Optional[int] = None
+) -> dict:
+    """Load an Ethereum wallet's full activity for a window in one query and summarize it. Later get_usdc_transactions, get_eth_transfers, get_top_tokens and get_wallet_info calls for this wallet and window are answered from the loaded profile without new queries.
+    Args:
+        wallet_id (str): The Ethereum wallet address to query
+        days (int, optional): Number of days to look back. Defaults to None.
+        limit (int, optional): Number of top tokens and counterparties to list. Defaults to None.
+    Returns:
+        dict: Wallet info, ETH totals, top tokens, counterparties and daily activity
+    Raises:
+        BigQueryQueryTooLarge: If the query would process too much data
+    """
+    try:
+        profile = await crypto_client.load_wallet_profile(wallet_id, days)
+        return profile.summary(CryptoClient.DEFAULT_TRANSACTION_LIMIT if limit is None else limit)
+    except BigQueryQueryTooLarge as e:
+        return {"error": str(e), "suggestion": TOO_LARGE_SUGGESTION}
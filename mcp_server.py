@@ -1,143 +1,229 @@
-from mcp.server.fastmcp import FastMCP
+from mcp_app import mcp, tool, window_kwargs, adaptive_window, current_caller, TOO_LARGE_SUGGESTION
 from crypto_client import crypto_client, BigQueryQueryTooLarge, CryptoClient
-import os
-from dotenv import load_dotenv
+from bigquery_client import bigquery_client
+from telemetry import metrics
+import mcp_batch_tools  # noqa: F401  (registers the batch tools)
+from mcp_profile_tools import get_wallet_profile, get_counterparty_graph, load_wallet_profile  # noqa: F401
+from settings import getenv
+import logging
+import sys
 from typing import Optional
 
-load_dotenv()
-PROJECT_ID = os.getenv("PROJECT_ID")
+PROJECT_ID = getenv("PROJECT_ID")
 
-mcp = FastMCP()
-
-@mcp.tool()
+@tool()
 async def get_usdc_transactions(
     wallet_id: str, 
     days: Optional[int] = None, 
-    limit: Optional[int] = None
-) -> list:
+    limit: Optional[int] = None,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> list | dict:
     """Get all the latest USDC transactions for a given wallet address. Use default values for days and limit unless specified or needed.
     Args:
         wallet_id (str): The Ethereum wallet address to query
         days (int, optional): Number of days to look back. Defaults to None.
         limit (int, optional): Maximum number of transactions to return. Defaults to None.
+        page_size (int, optional): Return one page of this many rows plus a cursor, allowing much larger days and limit. Defaults to None.
+        cursor (str, optional): next_cursor from a previous page, to fetch the following page. Defaults to None.
     Returns:
         list: A list of dictionaries containing the transaction details
+            (or, when paginating, a dict with "rows" and "next_cursor")
     Raises:
-        BigQueryQueryTooLarge: If the query would process too much data
+        BigQueryQueryTooLarge: If the query would process too much data; the largest window that fits is returned instead, flagged as truncated
     """
     try:
-        kwargs = {}
-        if days is not None:
-            kwargs["days"] = days
-        if limit is not None:
-            kwargs["limit"] = limit
+        kwargs = window_kwargs(days, limit)
+        if page_size is not None or cursor is not None:
+            return await crypto_client.get_transfers_page("usdc_transactions", wallet_id,
+                page_size=page_size or CryptoClient.DEFAULT_PAGE_SIZE, cursor=cursor, **kwargs)
         return await crypto_client.get_usdc_transactions(wallet_id, **kwargs)
     except BigQueryQueryTooLarge as e:
-        return {"error": str(e), "suggestion": "Try reducing the time window or using a more specific query"}
+        return await adaptive_window("usdc_transactions", wallet_id, days, limit, e)
+    except ValueError as e:
+        return {"error": str(e)}
 
-@mcp.tool()
+@tool()
 async def get_wallet_info(
     wallet_id: str, 
     days: Optional[int] = None, 
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    mode: Optional[str] = None
 ) -> dict:
     """Get basic information about a wallet. Use default values for days and limit unless specified or needed.
     Args:
         wallet_id (str): The Ethereum wallet address to query
         days (int, optional): Number of days to look back. Defaults to None.
         limit (int, optional): Maximum number of transactions to return. Defaults to None.
+        mode (str, optional): "approximate" for a quick, cheap estimate from a sample with error bounds, "exact" otherwise. Defaults to None.
     Returns:
         dict: A summary of the wallet's information including first seen, total transactions, and contract status
     Raises:
-        BigQueryQueryTooLarge: If the query would process too much data
+        BigQueryQueryTooLarge: If the query would process too much data; the largest window that fits is returned instead, flagged as truncated (in approximate mode, an error with a suggestion)
     """
     try:
-        kwargs = {}
-        if days is not None:
-            kwargs["days"] = days
-        if limit is not None:
-            kwargs["limit"] = limit
-        return await crypto_client.get_wallet_info(wallet_id, **kwargs)
+        kwargs = window_kwargs(days, limit)
+        return await crypto_client.get_wallet_info(wallet_id, **kwargs, mode=mode or "exact")
     except BigQueryQueryTooLarge as e:
-        return {"error": str(e), "suggestion": "Try reducing the time window or using a more specific query"}
+        return await adaptive_window("wallet_info", wallet_id, days, limit, e, mode)
+    except ValueError as e:
+        return {"error": str(e)}
 
-@mcp.tool()
+@tool()
 async def get_top_tokens(
     wallet_id: str, 
     days: Optional[int] = None, 
-    limit: Optional[int] = None
-) -> list:
+    limit: Optional[int] = None,
+    mode: Optional[str] = None
+) -> list | dict:
     """Get top tokens by volume for a given wallet. Use default values for days and limit unless specified or needed.
     Args:
         wallet_id (str): The Ethereum wallet address to query
         days (int, optional): Number of days to look back. Defaults to None.
         limit (int, optional): Number of top tokens to return. Defaults to None.
+        mode (str, optional): "approximate" for a quick, cheap estimate from a sample with error bounds, "exact" otherwise. Defaults to None.
     Returns:
         list: List of top tokens with transaction counts and volumes
+            (or, in approximate mode, a dict with the estimates under "rows")
     Raises:
-        BigQueryQueryTooLarge: If the query would process too much data
+        BigQueryQueryTooLarge: If the query would process too much data; the largest window that fits is returned instead, flagged as truncated (in approximate mode, an error with a suggestion)
     """
     try:
-        kwargs = {}
-        if days is not None:
-            kwargs["days"] = days
-        if limit is not None:
-            kwargs["limit"] = limit
-        return await crypto_client.get_top_tokens(wallet_id, **kwargs)
+        kwargs = window_kwargs(days, limit)
+        return await crypto_client.get_top_tokens(wallet_id, **kwargs, mode=mode or "exact")
     except BigQueryQueryTooLarge as e:
-        return {"error": str(e), "suggestion": "Try reducing the time window or using a more specific query"}
+        return await adaptive_window("top_tokens", wallet_id, days, limit, e, mode)
+    except ValueError as e:
+        return {"error": str(e)}
 
-@mcp.tool()
+@tool()
 async def get_eth_transfers(
     wallet_id: str, 
     days: Optional[int] = None, 
-    limit: Optional[int] = None
-) -> list:
+    limit: Optional[int] = None,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> list | dict:
     """Get ETH transfers for a given wallet. Use default values for days and limit unless specified or needed.
     Args:
         wallet_id (str): The Ethereum wallet address to query
         days (int, optional): Number of days to look back. Defaults to None.
         limit (int, optional): Maximum number of transactions to return. Defaults to None.
+        page_size (int, optional): Return one page of this many rows plus a cursor, allowing much larger days and limit. Defaults to None.
+        cursor (str, optional): next_cursor from a previous page, to fetch the following page. Defaults to None.
     Returns:
         list: List of ETH transfers with gas costs and direction
+            (or, when paginating, a dict with "rows" and "next_cursor")
     Raises:
-        BigQueryQueryTooLarge: If the query would process too much data
+        BigQueryQueryTooLarge: If the query would process too much data; the largest window that fits is returned instead, flagged as truncated
     """
     try:
-        kwargs = {}
-        if days is not None:
-            kwargs["days"] = days
-        if limit is not None:
-            kwargs["limit"] = limit
+        kwargs = window_kwargs(days, limit)
+        if page_size is not None or cursor is not None:
+            return await crypto_client.get_transfers_page("eth_transfers", wallet_id,
+                page_size=page_size or CryptoClient.DEFAULT_PAGE_SIZE, cursor=cursor, **kwargs)
         return await crypto_client.get_eth_transfers(wallet_id, **kwargs)
     except BigQueryQueryTooLarge as e:
-        return {"error": str(e), "suggestion": "Try reducing the time window or using a more specific query"}
+        return await adaptive_window("eth_transfers", wallet_id, days, limit, e)
+    except ValueError as e:
+        return {"error": str(e)}
 
-@mcp.tool()
+@tool()
 async def get_sol_transfers(
     wallet_id: str, 
     days: Optional[int] = None, 
-    limit: Optional[int] = None
-) -> list:
+    limit: Optional[int] = None,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> list | dict:
     """Get SOL transfers for a given wallet. Use default values for days and limit unless specified or needed.
     Args:
         wallet_id (str): The Solana wallet address to query
         days (int, optional): Number of days to look back. Defaults to None.
         limit (int, optional): Maximum number of transactions to return. Defaults to None.
+        page_size (int, optional): Return one page of this many rows plus a cursor, allowing much larger days and limit. Defaults to None.
+        cursor (str, optional): next_cursor from a previous page, to fetch the following page. Defaults to None.
     Returns:
         list: List of SOL transfers with transaction details
+            (or, when paginating, a dict with "rows" and "next_cursor")
     Raises:
-        BigQueryQueryTooLarge: If the query would process too much data
+        BigQueryQueryTooLarge: If the query would process too much data; the largest window that fits is returned instead, flagged as truncated
     """
     try:
-        kwargs = {}
-        if days is not None:
-            kwargs["days"] = days
-        if limit is not None:
-            kwargs["limit"] = limit
+        kwargs = window_kwargs(days, limit)
+        if page_size is not None or cursor is not None:
+            return await crypto_client.get_transfers_page("sol_transfers", wallet_id,
+                page_size=page_size or CryptoClient.DEFAULT_PAGE_SIZE, cursor=cursor, **kwargs)
         return await crypto_client.get_sol_transfers(wallet_id, **kwargs)
     except BigQueryQueryTooLarge as e:
-        return {"error": str(e), "suggestion": "Try reducing the time window or using a more specific query"}
+        return await adaptive_window("sol_transfers", wallet_id, days, limit, e)
+    except ValueError as e:
+        return {"error": str(e)}
+
+@tool()
+async def get_older_window(
+    kind: str,
+    wallet_id: str,
+    offset_days: int,
+    days: Optional[int] = None,
+    limit: Optional[int] = None
+) -> dict:
+    """Continue a truncated result with the next older window that fits the query size limit. Use the kind and offset_days given in the truncated result, and the same days and limit as the original call.
+    Args:
+        kind (str): One of usdc_transactions, eth_transfers, sol_transfers, top_tokens, wallet_info
+        wallet_id (str): The wallet address to query
+        offset_days (int): next_offset_days from the truncated result
+        days (int, optional): Number of days to look back in total. Defaults to None.
+        limit (int, optional): Maximum number of rows. Defaults to None.
+    Returns:
+        dict: Rows of the older window, the days it covers, and next_offset_days if still truncated
+    Raises:
+        BigQueryQueryTooLarge: If not even a one-day window fits
+    """
+    try:
+        return await crypto_client.fetch_adaptive_window(kind, wallet_id, days, limit, offset_days)
+    except BigQueryQueryTooLarge as e:
+        return {"error": str(e), "suggestion": TOO_LARGE_SUGGESTION}
+    except ValueError as e:
+        return {"error": str(e)}
+
+@tool()
+async def get_cache_stats() -> dict:
+    """Get result cache counters (hits, misses, bytes saved) for capacity planning.
+    Returns:
+        dict: Cache hit/miss counters, bytes of scans avoided, current memory usage,
+            how many duplicate in-flight queries were collapsed, dry-run estimate cache and token index counters
+    """
+    return {
+        **crypto_client.cache.stats(),
+        "single_flight": bigquery_client.single_flight.counters,
+        "estimates": bigquery_client.estimates.counters,
+        "token_index": crypto_client.tokens.counters,
+    }
+
+@tool()
+async def get_budget() -> dict:
+    """Get the remaining BigQuery byte budget and job rate limits for this session. Check it before planning many or large queries.
+    Returns:
+        dict: Remaining GB in the rolling window, the budgets and rate limits, and this session's job and byte counters
+    """
+    return bigquery_client.governor.report(current_caller())
+
+@mcp.tool()
+async def get_metrics() -> dict:
+    """Get per-tool latency and cost metrics, to tell whether time goes to BigQuery jobs, dry runs, queueing or local processing.
+    Returns:
+        dict: Per tool: calls, errors, mean seconds and summed dry-run, queue, job, fetch, conversion and
+            serialization seconds, slot-ms, bytes processed/billed, cache hits and rows; plus the most recent call traces
+    """
+    return metrics.snapshot()
+
+@mcp.resource("metrics://prometheus", mime_type="text/plain")
+def prometheus_metrics() -> str:
+    """Per-tool metrics in the Prometheus text exposition format."""
+    return metrics.prometheus()
 
 if __name__ == "__main__":
+    # stdout carries the stdio transport, so logs go to stderr
+    logging.basicConfig(stream=sys.stderr, level=getenv("LOG_LEVEL", "INFO").upper())
     mcp.run()
\ No newline at end of file
@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from deadlines import deadline, deadline_at
+from telemetry import Trace, detached_trace, record_share
+
+# Contexts of the callers waiting on the batch being run, so per-caller accounting can split it between them
+_batch_waiters: contextvars.ContextVar[Tuple[contextvars.Context, ...]] = contextvars.ContextVar(
+    "batch_waiters", default=()
+)
+
+def batch_waiters() -> Tuple[contextvars.Context, ...]:
+    """
+    The callers the current work is done for, when it runs in a merged batch.
+
+    Returns:
+        Tuple[contextvars.Context, ...]: A copy of each waiting caller's context, or () outside a batch
+    """
+    return _batch_waiters.get()
+
+def serve(callers: Tuple[contextvars.Context, ...]) -> None:
+    """
+    Mark the rest of the current task's work as done for these callers, e.g. a batch merged from their requests.
+
+    Args:
+        callers (Tuple[contextvars.Context, ...]): A copy of each caller's context
+    """
+    _batch_waiters.set(callers)
+
+def _own_copy(result: Any) -> Any:
+    """A result for one caller: new row dictionaries for a list of rows, else the result itself."""
+    if isinstance(result, list):
+        return [dict(row) if isinstance(row, dict) else row for row in result]
+    return result
+
+class _PendingBatch:
+    """Wallets collected for one batch, with the futures their callers await."""
+
+    def __init__(self, run_batch: Callable[[List[str]], Awaitable[Dict[str, Any]]]):
+        self.run_batch = run_batch
+        self.futures: Dict[str, asyncio.Future] = {}
+        self.waiters = 0
+        self.contexts: List[contextvars.Context] = []
+        # Monotonic deadline of each caller, None for a caller without one
+        self.deadlines: List[Optional[float]] = []
+        self.task: Optional[asyncio.Task] = None
+        self.trace: Optional[Trace] = None
+        self.served = 0
+
+    def deadline_seconds(self) -> Optional[float]:
+        """Time left until the latest deadline of the callers, or None if any of them has none."""
+        if not self.deadlines or None in self.deadlines:
+            return None
+        return max(0.001, max(self.deadlines) - time.monotonic())
+
+class MicroBatcher:
+    """
+    Hold same-kind requests for a short window and run them as one batch.
+
+    Requests are grouped by a key (e.g. query kind, days and limit). The first
+    request of a group opens a window; every request arriving within it joins
+    the batch, which is flushed when the window closes or the batch is full.
+    A batch whose callers have all been cancelled is dropped, and its query
+    cancelled if it is already running.
+
+    A batch runs in a context of its own rather than its first caller's: its
+    deadline is the latest of its callers', and what it records (jobs,
+    bytes, time) is shared out evenly between the traces of the callers it
+    serves; budgets are split the same way through batch_waiters.
+    """
+    DEFAULT_WINDOW_MS = 25
+    DEFAULT_MAX_BATCH_SIZE = 100
+
+    def __init__(self, window_ms: float = DEFAULT_WINDOW_MS, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[Hashable, _PendingBatch] = {}
+        self.counters = {"requests": 0, "batches": 0}
+
+    async def submit(
+        self,
+        group_key: Hashable,
+        wallet_id: str,
+        run_batch: Callable[[List[str]], Awaitable[Dict[str, Any]]]
+    ) -> Any:
+        """
+        Add a wallet to the open batch for its group and wait for its result.
+
+        Args:
+            group_key (Hashable): Requests with equal keys can share a batch
+            wallet_id (str): The wallet address requested
+            run_batch: Coroutine function taking the batched wallet addresses and returning
+                results keyed by wallet address; the first request of a batch provides it
+
+        Returns:
+            Any: The result for this wallet, with row dictionaries of its own if it is a list of rows
+        """
+        loop = asyncio.get_running_loop()
+        self.counters["requests"] += 1
+        batch = self._pending.get(group_key)
+        if batch is None:
+            batch = _PendingBatch(run_batch)
+            self._pending[group_key] = batch
+            loop.call_later(self.window_seconds, self._flush, group_key, batch)
+
+        future = batch.futures.get(wallet_id)
+        if future is None:
+            future = batch.futures[wallet_id] = loop.create_future()
+        batch.waiters += 1
+        batch.contexts.append(contextvars.copy_context())
+        batch.deadlines.append(deadline_at())
+        if len(batch.futures) >= self.max_batch_size:
+            self._flush(group_key, batch)
+        try:
+            # Shield so one cancelled caller doesn't cancel a future shared with others; callers of the same
+            # wallet share the future, so each gets rows of its own
+            return _own_copy(await asyncio.shield(future))
+        except asyncio.CancelledError:
+            batch.waiters -= 1
+            if batch.waiters == 0:
+                if self._pending.get(group_key) is batch:
+                    del self._pending[group_key]
+                if batch.task is not None:
+                    batch.task.cancel()
+            raise
+        finally:
+            if future.done() and batch.served:
+                record_share(batch.trace, 1 / batch.served)
+
+    def _flush(self, group_key: Hashable, batch: _PendingBatch) -> None:
+        """Close a batch to new requests and start running it."""
+        if self._pending.get(group_key) is not batch:
+            return
+        del self._pending[group_key]
+        self.counters["batches"] += 1
+        # Not in the context of the caller that happens to flush it (or opened its window)
+        batch.task = asyncio.get_running_loop().create_task(self._run(batch), context=contextvars.Context())
+
+    @staticmethod
+    async def _run(batch: _PendingBatch) -> None:
+        """Run a closed batch and hand each caller its result."""
+        serve(tuple(batch.contexts))
+        try:
+            with deadline(batch.deadline_seconds()), detached_trace("micro_batch") as batch.trace:
+                results = await batch.run_batch(list(batch.futures))
+        except Exception as e:
+            batch.served = batch.waiters
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        batch.served = batch.waiters
+        for wallet_id, future in batch.futures.items():
+            if not future.done():
+                future.set_result(results[wallet_id])
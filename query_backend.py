@@ -0,0 +1,187 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional, Tuple
+from query_builder import Query
+
+class QueryResult(list):
+    """List of result rows that also carries statistics of the job that produced them."""
+
+    def __init__(self, rows=(), bytes_processed: int = 0):
+        super().__init__(rows)
+        self.bytes_processed = bytes_processed
+
+    def copy_rows(self) -> "QueryResult":
+        """A result with new row dictionaries."""
+        return QueryResult([dict(row) for row in self], self.bytes_processed)
+
+class QueryBackend(ABC):
+    """An engine that runs the parameterized queries built in crypto_queries.py."""
+    name = ""
+
+    @abstractmethod
+    async def execute_query(self, query: Query) -> QueryResult:
+        """
+        Execute a query.
+
+        Args:
+            query (Query): The parameterized query to execute
+
+        Returns:
+            QueryResult: List of dictionaries containing query results
+        """
+
+    async def execute_query_stream(self, query: Query, page_size: int = 100) -> AsyncIterator[list]:
+        """
+        Execute a query and yield its rows page by page.
+
+        Backends without paged results yield all rows as one page.
+
+        Args:
+            query (Query): The parameterized query to execute
+            page_size (int, optional): Rows per page, where the backend pages results. Defaults to 100.
+
+        Yields:
+            list: Dictionaries of the rows in each page
+        """
+        yield await self.execute_query(query)
+
+    async def execute_query_page(self, query: Query, page_size: int = 100) -> Tuple[list, Optional[str]]:
+        """
+        Execute a query and return its first page with a cursor to the rest.
+
+        Backends without cursors return all rows as one page.
+
+        Args:
+            query (Query): The parameterized query to execute
+            page_size (int, optional): Rows per page, where the backend issues cursors. Defaults to 100.
+
+        Returns:
+            Tuple[list, Optional[str]]: Rows of the first page, and a cursor for the next page
+                or None if there are no more rows
+        """
+        return await self.execute_query(query), None
+
+    async def fetch_page(self, cursor: str, page_size: int = 100) -> Tuple[list, Optional[str]]:
+        """
+        Fetch the page a cursor points to.
+
+        Args:
+            cursor (str): Cursor returned with the previous page
+            page_size (int, optional): Rows per page. Defaults to 100.
+
+        Returns:
+            Tuple[list, Optional[str]]: Rows of the page, and a cursor for the next page
+                or None if there are no more rows
+
+        Raises:
+            ValueError: Always; this backend issues no cursors
+        """
+        raise ValueError(f"The {self.name} backend does not issue pagination cursors")
+
+    async def fits(self, query: Query) -> bool:
+        """
+        Whether a query stays under this backend's size limit.
+
+        Backends without a size limit accept every query.
+
+        Args:
+            query (Query): The parameterized query
+
+        Returns:
+            bool: True if the query may run
+        """
+        return True
+
+    def covers(self, query: Query) -> bool:
+        """
+        Whether this backend holds all the data a query reads.
+
+        Args:
+            query (Query): The parameterized query
+
+        Returns:
+            bool: True if the query can be answered here
+        """
+        return True
+
+class RoutingBackend(QueryBackend):
+    """Serve queries from a local backend when it covers them, and from a remote one otherwise."""
+    name = "auto"
+
+    def __init__(self, local: QueryBackend, remote: QueryBackend):
+        self.local = local
+        self.remote = remote
+        self.counters = {"local": 0, "remote": 0}
+
+    async def execute_query(self, query: Query) -> QueryResult:
+        """
+        Execute a query on the local backend if it covers the query, else on the remote one.
+
+        Args:
+            query (Query): The parameterized query to execute
+
+        Returns:
+            QueryResult: List of dictionaries containing query results
+        """
+        if self.local.covers(query):
+            self.counters["local"] += 1
+            return await self.local.execute_query(query)
+        self.counters["remote"] += 1
+        return await self.remote.execute_query(query)
+
+    async def execute_query_stream(self, query: Query, page_size: int = 100) -> AsyncIterator[list]:
+        """
+        Stream a query's pages from the local backend if it covers the query, else from the remote one.
+
+        Args:
+            query (Query): The parameterized query to execute
+            page_size (int, optional): Rows per page. Defaults to 100.
+
+        Yields:
+            list: Dictionaries of the rows in each page
+        """
+        backend = self.local if self.local.covers(query) else self.remote
+        self.counters["local" if backend is self.local else "remote"] += 1
+        async for page in backend.execute_query_stream(query, page_size):
+            yield page
+
+    async def fits(self, query: Query) -> bool:
+        """
+        Whether a query fits: always where the local backend covers it, else under the remote one's limit.
+
+        Args:
+            query (Query): The parameterized query
+
+        Returns:
+            bool: True if the query may run
+        """
+        return self.local.covers(query) or await self.remote.fits(query)
+
+    async def execute_query_page(self, query: Query, page_size: int = 100) -> Tuple[list, Optional[str]]:
+        """
+        Return a query's first page from the local backend if it covers the query, else from the remote one.
+
+        Args:
+            query (Query): The parameterized query to execute
+            page_size (int, optional): Rows per page. Defaults to 100.
+
+        Returns:
+            Tuple[list, Optional[str]]: Rows of the first page, and a cursor for the next page
+                or None if there are no more rows
+        """
+        backend = self.local if self.local.covers(query) else self.remote
+        self.counters["local" if backend is self.local else "remote"] += 1
+        return await backend.execute_query_page(query, page_size)
+
+    async def fetch_page(self, cursor: str, page_size: int = 100) -> Tuple[list, Optional[str]]:
+        """
+        Fetch the page a cursor points to from the remote backend, the only one issuing cursors.
+
+        Args:
+            cursor (str): Cursor returned with the previous page
+            page_size (int, optional): Rows per page. Defaults to 100.
+
+        Returns:
+            Tuple[list, Optional[str]]: Rows of the page, and a cursor for the next page
+                or None if there are no more rows
+        """
+        return await self.remote.fetch_page(cursor, page_size)
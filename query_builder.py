@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Hashable, List, Optional, Tuple
+
+@dataclass(frozen=True)
+class QueryParameter:
+    """A typed query parameter. Array parameters hold their values as a tuple."""
+    name: str
+    type: str  # BigQuery standard SQL type, e.g. "STRING", "INT64", "TIMESTAMP"
+    value: Any
+
+    @property
+    def is_array(self) -> bool:
+        return isinstance(self.value, tuple)
+
+@dataclass(frozen=True)
+class Query:
+    """Parameterized SQL plus the name of the query shape it was built from."""
+    sql: str
+    parameters: Tuple[QueryParameter, ...] = ()
+    shape: str = ""
+
+    def key(self) -> Hashable:
+        """Identity of the query: whitespace-normalized SQL and its parameter values."""
+        return (" ".join(self.sql.split()), self.parameters)
+
+@dataclass(frozen=True)
+class TransferTable:
+    """A partitioned transfer table and the columns holding the two parties of a transfer."""
+    table: str
+    from_column: str
+    to_column: str
+
+def normalize_address(address: str, chain: str = "ethereum") -> str:
+    """
+    Normalize a wallet address on the client so the query can compare raw columns.
+
+    Ethereum addresses are stored lowercase in the public dataset; Solana
+    addresses are base58 and case-sensitive, so they are only trimmed.
+
+    Args:
+        address (str): The wallet address
+        chain (str, optional): The chain the address belongs to. Defaults to "ethereum".
+
+    Returns:
+        str: The normalized address
+    """
+    address = address.strip()
+    return address if chain == "solana" else address.lower()
+
+def window_parameters(
+    days: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> List[QueryParameter]:
+    """
+    Build the block_timestamp bounds of a query window.
+
+    The start is truncated to the minute so identical requests made moments
+    apart produce identical parameters.
+
+    Args:
+        days (int): Number of days to look back
+        since (Optional[datetime]): Narrower lower bound, e.g. a sync high-water mark
+        until (Optional[datetime]): Exclusive upper bound, or None for no upper bound
+
+    Returns:
+        List[QueryParameter]: The @start_time and, if bounded, @end_time parameters
+    """
+    start_time = (datetime.now(timezone.utc) - timedelta(days=days)).replace(second=0, microsecond=0)
+    if since is not None:
+        start_time = max(start_time, since)
+    parameters = [QueryParameter("start_time", "TIMESTAMP", start_time)]
+    if until is not None:
+        parameters.append(QueryParameter("end_time", "TIMESTAMP", until))
+    return parameters
+
+def time_filter(parameters: List[QueryParameter], column: str = "block_timestamp") -> str:
+    """
+    Partition filter for the window built by window_parameters.
+
+    Args:
+        parameters (List[QueryParameter]): The window parameters
+        column (str, optional): The partitioning column. Defaults to "block_timestamp".
+
+    Returns:
+        str: SQL predicate on the partitioning column
+    """
+    predicate = f"{column} >= @start_time"
+    if any(parameter.name == "end_time" for parameter in parameters):
+        predicate += f" AND {column} < @end_time"
+    return predicate
+
+def wallet_transfers(
+    table: TransferTable,
+    columns: str,
+    window_filter: str,
+    extra_filter: str = "",
+    received_columns: Optional[str] = None,
+    all_wallets: bool = False
+) -> str:
+    """
+    Select a table's rows involving any wallet in @wallet_ids, one row per matched wallet.
+
+    Instead of `from = w OR to = w`, each party column gets its own branch with
+    a plain equality filter, so clustering on that column can prune blocks. The
+    second branch skips self-transfers, which the first branch already returned.
+
+    Args:
+        table (TransferTable): The transfer table to read
+        columns (str): Columns selected, in the sent (from) branch by default
+        window_filter (str): Partition filter from time_filter
+        extra_filter (str, optional): Additional predicate applied to both branches. Defaults to "".
+        received_columns (Optional[str]): Columns for the received (to) branch, if they differ
+        all_wallets (bool, optional): Match every wallet instead of @wallet_ids, e.g. to build
+            the summary tables. Defaults to False.
+
+    Returns:
+        str: SQL yielding a wallet_id column followed by the selected columns
+    """
+    extra = f"AND {extra_filter}" if extra_filter else ""
+    match = "IS NOT NULL" if all_wallets else "IN UNNEST(@wallet_ids)"
+    return f"""
+            SELECT {table.from_column} AS wallet_id, {columns}
+            FROM {table.table}
+            WHERE {table.from_column} {match}
+                AND {window_filter}
+                {extra}
+            UNION ALL
+            SELECT {table.to_column} AS wallet_id, {received_columns or columns}
+            FROM {table.table}
+            WHERE {table.to_column} {match}
+                AND {table.to_column} IS DISTINCT FROM {table.from_column}
+                AND {window_filter}
+                {extra}
+    """
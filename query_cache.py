@@ -0,0 +1,221 @@
+import hashlib
+import os
+import pickle
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from telemetry import record
+
+@dataclass
+class CacheEntry:
+    """A cached query result for one (kind, wallet) pair."""
+    kind: str
+    wallet_id: str
+    days: int
+    limit: int
+    rows: List[Dict[str, Any]]
+    time_ordered: bool
+    bytes_processed: int = 0
+    fetched_at: float = field(default_factory=time.time)
+    size: int = 0
+
+    def answer(self, days: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer a request from this entry if its window and limit cover it.
+
+        Time-ordered transfer lists (newest first) can serve any narrower window
+        by filtering on block_timestamp locally. Ranked aggregates only serve
+        the same window with an equal or smaller limit. Each answer has row
+        dictionaries of its own, so callers changing them leave the entry intact.
+
+        Args:
+            days (int): Requested number of days to look back
+            limit (int): Requested maximum number of rows
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Rows answering the request, or None if not covered
+        """
+        complete = len(self.rows) < self.limit
+        if limit > self.limit and not complete:
+            return None
+        if days == self.days:
+            return [dict(row) for row in self.rows[:limit]]
+        if not self.time_ordered or days > self.days:
+            return None
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        return [dict(row) for row in self.rows if row["block_timestamp"] >= cutoff][:limit]
+
+class QueryCache:
+    """
+    Two-tier (memory LRU + on-disk) cache of query results with TTL and size-based eviction.
+    """
+    DEFAULT_TTL_SECONDS = 300
+    DEFAULT_MAX_MEMORY_MB = 64
+    DEFAULT_MAX_DISK_MB = 512
+    DEFAULT_CACHE_DIR = ".query_cache"
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_memory_mb: float = DEFAULT_MAX_MEMORY_MB,
+        max_disk_mb: float = DEFAULT_MAX_DISK_MB
+    ):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = int(max_memory_mb * 1_000_000)
+        self.max_disk_bytes = int(max_disk_mb * 1_000_000)
+        self._memory: "OrderedDict[Tuple[str, str], List[CacheEntry]]" = OrderedDict()
+        self._memory_bytes = 0
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "subsumed_hits": 0,
+            "misses": 0,
+            "bytes_saved": 0,
+            "evictions": 0,
+        }
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.fetched_at < self.ttl_seconds
+
+    def _disk_path(self, group: Tuple[str, str]) -> str:
+        digest = hashlib.sha256("\0".join(group).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def _read_disk(self, group: Tuple[str, str]) -> List[CacheEntry]:
+        if not self.cache_dir:
+            return []
+        try:
+            with open(self._disk_path(group), "rb") as f:
+                return [entry for entry in pickle.load(f) if self._is_fresh(entry)]
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return []
+
+    def _write_disk(self, group: Tuple[str, str], entries: List[CacheEntry]) -> None:
+        if not self.cache_dir:
+            return
+        with open(self._disk_path(group), "wb") as f:
+            pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Remove the least recently written files until the disk tier fits its size limit."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+            self.counters["evictions"] += 1
+
+    def _store_memory(self, group: Tuple[str, str], entries: List[CacheEntry]) -> None:
+        self._memory_bytes -= sum(entry.size for entry in self._memory.pop(group, []))
+        if entries:
+            self._memory[group] = entries
+            self._memory_bytes += sum(entry.size for entry in entries)
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= sum(entry.size for entry in evicted)
+            self.counters["evictions"] += 1
+
+    def get(self, kind: str, wallet_id: str, days: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up a cached result that answers the request, checking memory first, then disk.
+
+        Args:
+            kind (str): Query kind, e.g. "eth_transfers"
+            wallet_id (str): The wallet address
+            days (int): Number of days to look back
+            limit (int): Maximum number of rows
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Cached rows, or None on a miss
+        """
+        group = (kind, wallet_id)
+        tier = "memory_hits"
+        entries = [entry for entry in self._memory.get(group, []) if self._is_fresh(entry)]
+        if group in self._memory:
+            self._memory.move_to_end(group)
+        if not entries:
+            tier = "disk_hits"
+            entries = self._read_disk(group)
+            if entries:
+                self._store_memory(group, entries)
+
+        for entry in entries:
+            rows = entry.answer(days, limit)
+            if rows is not None:
+                self.counters[tier] += 1
+                self.counters["bytes_saved"] += entry.bytes_processed
+                record("cache_hits")
+                if (entry.days, entry.limit) != (days, limit):
+                    self.counters["subsumed_hits"] += 1
+                return rows
+
+        self.counters["misses"] += 1
+        record("cache_misses")
+        return None
+
+    def put(
+        self,
+        kind: str,
+        wallet_id: str,
+        days: int,
+        limit: int,
+        rows: List[Dict[str, Any]],
+        time_ordered: bool,
+        bytes_processed: int = 0
+    ) -> None:
+        """
+        Store a copy of a query result in both tiers.
+
+        Args:
+            kind (str): Query kind, e.g. "eth_transfers"
+            wallet_id (str): The wallet address
+            days (int): Number of days the query looked back
+            limit (int): Row limit the query used
+            rows (List[Dict[str, Any]]): Query results
+            time_ordered (bool): Whether rows are ordered newest first by block_timestamp
+            bytes_processed (int, optional): Bytes the query processed. Defaults to 0.
+        """
+        group = (kind, wallet_id)
+        entry = CacheEntry(kind, wallet_id, days, limit, [dict(row) for row in rows], time_ordered, bytes_processed)
+        entry.size = len(pickle.dumps(entry.rows, protocol=pickle.HIGHEST_PROTOCOL))
+
+        # Drop entries the new one makes redundant
+        entries = [
+            existing for existing in self._memory.get(group, []) or self._read_disk(group)
+            if self._is_fresh(existing) and not (
+                existing.limit <= limit
+                and (existing.days == days or (time_ordered and existing.days <= days))
+            )
+        ]
+        entries.insert(0, entry)
+        self._store_memory(group, entries)
+        self._write_disk(group, entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss and size counters for capacity planning.
+
+        Returns:
+            Dict[str, Any]: Counters plus current memory usage and entry count
+        """
+        lookups = sum(self.counters[key] for key in ("memory_hits", "disk_hits", "misses"))
+        hits = lookups - self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_bytes": self._memory_bytes,
+            "memory_entries": sum(len(entries) for entries in self._memory.values()),
+        }
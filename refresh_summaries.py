@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from query_backend import QueryBackend
+from settings import getenv
+from summary_state import SummaryState, load_state
+from summary_tables import SummaryTables
+
+DEFAULT_INITIAL_DAYS = 100
+# Days merged per job; bounds the bytes one refresh job processes
+DEFAULT_CHUNK_DAYS = 7
+# Whole days left unsummarized, for rows still arriving late; queries read them from the raw tables
+DEFAULT_LAG_DAYS = 1
+
+async def refresh(backend: QueryBackend, tables: SummaryTables, initial_days: int = DEFAULT_INITIAL_DAYS,
+                  chunk_days: int = DEFAULT_CHUNK_DAYS, lag_days: int = DEFAULT_LAG_DAYS,
+                  now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Bring the summary tables up to lag_days before the last midnight, reading only the days not summarized yet.
+
+    Run it on a schedule, e.g. daily after midnight UTC. The first run
+    creates the tables and summarizes initial_days; later runs merge the
+    days since the last one, chunk_days per job. The last lag_days whole
+    days are left to the raw tables, as rows of a day can still arrive
+    after its midnight and a summarized day is not read again. Each chunk
+    is recorded in summary_refresh once merged, so an interrupted run
+    resumes after the last recorded chunk.
+
+    Args:
+        backend (QueryBackend): Where the raw and summary tables are (BigQuery, or DuckDB as a local stand-in)
+        tables (SummaryTables): The summary tables
+        initial_days (int, optional): Days summarized by the first run. Defaults to DEFAULT_INITIAL_DAYS.
+        chunk_days (int, optional): Days merged per job. Defaults to DEFAULT_CHUNK_DAYS.
+        lag_days (int, optional): Whole days before the last midnight left unsummarized. Defaults to DEFAULT_LAG_DAYS.
+        now (Optional[datetime], optional): Current time, for tests. Defaults to now.
+
+    Returns:
+        Dict[str, Any]: The summarized days and the number of chunks merged
+
+    Raises:
+        BigQueryQueryTooLarge: If a chunk would process too much data
+    """
+    for query in tables.create_queries():
+        await backend.execute_query(query)
+    today = (now or datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+    through = today - timedelta(days=lag_days)
+    state = await load_state(backend, tables) or SummaryState(
+        through - timedelta(days=initial_days), through - timedelta(days=initial_days)
+    )
+    chunks = 0
+    while state.refreshed_through < through:
+        end = min(state.refreshed_through + timedelta(days=chunk_days), through)
+        for query in tables.refresh_queries(state.refreshed_through, end):
+            await backend.execute_query(query)
+        state = SummaryState(state.coverage_start, end)
+        await backend.execute_query(tables.mark_refreshed(state))
+        chunks += 1
+    return {
+        "coverage_start": state.coverage_start.isoformat(),
+        "refreshed_through": state.refreshed_through.isoformat(),
+        "chunks": chunks,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the per-wallet summary tables with the days not summarized yet")
+    parser.add_argument("--dataset", default=getenv("SUMMARY_DATASET"), help="Dataset of the summary tables (project.dataset)")
+    parser.add_argument("--initial-days", type=int, default=DEFAULT_INITIAL_DAYS, help="Days summarized by the first run")
+    parser.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS, help="Days merged per job")
+    parser.add_argument("--lag-days", type=int, default=DEFAULT_LAG_DAYS,
+                        help="Whole days before the last midnight left unsummarized, for late-arriving rows")
+    parser.add_argument("--local", action="store_true",
+                        help="Dry run of the refresh SQL on DuckDB over the Parquet extracts of LOCAL_PARQUET_DIR")
+    args = parser.parse_args()
+
+    if args.local:
+        from duckdb_backend import DuckDBBackend
+        backend, tables = DuckDBBackend(getenv("LOCAL_PARQUET_DIR", "parquet")), SummaryTables("", partitioned=False)
+    else:
+        if not args.dataset:
+            parser.error("--dataset or SUMMARY_DATASET is required")
+        from bigquery_client import bigquery_client
+        backend, tables = bigquery_client, SummaryTables(args.dataset)
+    print(json.dumps(asyncio.run(refresh(backend, tables, args.initial_days, args.chunk_days, args.lag_days))))
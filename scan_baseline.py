@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List
+import fake_bigquery
+from bigquery_client import BigQueryClient, bigquery_client
+from crypto_queries import QUERY_BUILDERS
+
+# Fixed, fully historical window so estimates are stable between runs. Estimates
+# depend on the tables and partitions read, not on the wallet literal.
+REFERENCE_START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+REFERENCE_END = datetime(2026, 1, 8, tzinfo=timezone.utc)
+REFERENCE_WALLETS = {
+    "ethereum": "0x28c6c06298d514db089934071355e5743bf21d60",
+    "solana": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
+}
+DEFAULT_BASELINE_PATH = "scan_baseline.json"
+# Baseline of the emulated client, checked by tests/test_scan_baseline.py
+EMULATED_BASELINE_PATH = "tests/scan_baseline.json"
+DEFAULT_TOLERANCE = 0.05
+
+async def measure_scan_estimates(client: BigQueryClient = bigquery_client) -> Dict[str, float]:
+    """
+    Dry-run every query shape over the reference window.
+
+    Args:
+        client (BigQueryClient, optional): The client to dry-run with. Defaults to the bigquery_client singleton.
+
+    Returns:
+        Dict[str, float]: Estimated GB processed per query shape
+    """
+    days = (datetime.now(timezone.utc) - REFERENCE_START).days + 1
+    estimates = {}
+    for kind, build in QUERY_BUILDERS.items():
+        wallet_id = REFERENCE_WALLETS["solana" if kind == "sol_transfers" else "ethereum"]
+        query = build([wallet_id], days, 10, since=REFERENCE_START, until=REFERENCE_END)
+        estimates[kind] = await client.estimate_query_usage(query)
+    return estimates
+
+def find_regressions(baseline: Dict[str, float], estimates: Dict[str, float], tolerance: float) -> List[str]:
+    """
+    Compare estimates with a recorded baseline.
+
+    Args:
+        baseline (Dict[str, float]): Recorded GB per query shape
+        estimates (Dict[str, float]): Current GB per query shape
+        tolerance (float): Allowed relative increase, e.g. 0.05 for 5%
+
+    Returns:
+        List[str]: A message per query shape that scans more than the baseline allows
+    """
+    regressions = []
+    for kind, estimate in estimates.items():
+        recorded = baseline.get(kind)
+        if recorded is None:
+            regressions.append(f"{kind}: no baseline recorded (now {estimate:.3f} GB)")
+        elif estimate > recorded * (1 + tolerance):
+            regressions.append(f"{kind}: {estimate:.3f} GB, baseline {recorded:.3f} GB")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check dry-run scan estimates against a recorded baseline")
+    parser.add_argument("--record", action="store_true", help="Record the current estimates as the baseline")
+    parser.add_argument("--baseline", help=f"Defaults to {DEFAULT_BASELINE_PATH}, or {EMULATED_BASELINE_PATH} with --emulated")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--emulated", action="store_true",
+                        help="Dry-run against the emulated client of fake_bigquery.py instead of BigQuery")
+    args = parser.parse_args()
+    args.baseline = args.baseline or (EMULATED_BASELINE_PATH if args.emulated else DEFAULT_BASELINE_PATH)
+    if args.emulated:
+        fake_bigquery.install(fake_bigquery.FakeProfile(dry_run_latency_seconds=0))
+
+    estimates = asyncio.run(measure_scan_estimates())
+    if args.record:
+        with open(args.baseline, "w") as f:
+            json.dump(estimates, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        regressions = find_regressions(json.load(f), estimates, args.tolerance)
+    for regression in regressions:
+        print(f"Scan regression: {regression}")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,19 @@
+import os
+from typing import Optional
+from dotenv import load_dotenv
+
+# Read .env once, before any module reads its configuration
+load_dotenv()
+
+def getenv(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Read a configuration value from the environment or .env.
+
+    Args:
+        name (str): Variable name
+        default (Optional[str], optional): Value when the variable is unset. Defaults to None.
+
+    Returns:
+        Optional[str]: The value
+    """
+    return os.getenv(name, default)
@@ -0,0 +1,94 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from deadlines import deadline_at, move_deadline
+from micro_batcher import batch_waiters, serve
+from telemetry import Trace, detached_trace, record_share
+
+class _Flight:
+    """One call in flight, with the callers waiting on it."""
+
+    def __init__(self, callers: Tuple[contextvars.Context, ...], deadline: Optional[float]):
+        self.waiters = 1
+        self.deadline = deadline
+        # Not the first caller's context: the call is done for every caller waiting on it
+        self.context = contextvars.Context()
+        self.context.run(serve, callers)
+        move_deadline(self.context, deadline)
+        self.task: Optional[asyncio.Task] = None
+        self.trace: Optional[Trace] = None
+        self.served = 0
+
+    def join(self, deadline: Optional[float]) -> None:
+        """Add a caller, pushing the call's deadline back to the caller's if it is later."""
+        self.waiters += 1
+        if self.deadline is not None and (deadline is None or deadline > self.deadline):
+            self.deadline = deadline
+            move_deadline(self.context, deadline)
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one in-flight task.
+
+    Later callers with the same key await the task already running and share
+    its result. The task is cancelled only once every caller waiting on it has
+    been cancelled.
+
+    Like a merged batch (see micro_batcher.py), the task runs in a context of
+    its own rather than its first caller's: its deadline is the latest of its
+    callers', pushed back as later callers join, and what it records is
+    shared out evenly between the traces of the callers it serves.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self.counters = {"executed": 0, "deduplicated": 0}
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    @staticmethod
+    async def _run(flight: _Flight, func: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            with detached_trace("single_flight") as flight.trace:
+                return await func()
+        finally:
+            flight.served = flight.waiters
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run func once per key among concurrent callers.
+
+        Args:
+            key (Hashable): Identity of the call
+            func: Coroutine function to run if no identical call is in flight
+
+        Returns:
+            Tuple[Any, bool]: The result, and whether it was shared from another caller's call
+        """
+        flight = self._in_flight.get(key)
+        shared = flight is not None
+        if shared:
+            self.counters["deduplicated"] += 1
+            flight.join(deadline_at())
+        else:
+            self.counters["executed"] += 1
+            # A call made for a merged batch is still done for the batch's callers
+            flight = _Flight(batch_waiters() or (contextvars.copy_context(),), deadline_at())
+            flight.task = asyncio.get_running_loop().create_task(self._run(flight, func), context=flight.context)
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda done: self._forget(key, flight))
+
+        try:
+            return await asyncio.shield(flight.task), shared
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                flight.waiters -= 1
+                if flight.waiters == 0:
+                    self._forget(key, flight)
+                    flight.task.cancel()
+            raise
+        finally:
+            if flight.task.done() and flight.served:
+                record_share(flight.trace, 1 / flight.served)
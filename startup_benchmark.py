@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+import fake_bigquery
+
+# Modules the server should only import on first use, not at startup
+HEAVY_MODULES = ["google.cloud.bigquery", "pyarrow", "numpy", "duckdb"]
+DEFAULT_RUNS = 5
+
+def probe(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Time one cold start in this (fresh) process: importing the server, then its first tool calls.
+
+    The first call runs against the emulated BigQuery; importing the real
+    client library, which the first call pays in production, is timed on
+    its own as bigquery_import_seconds.
+    """
+    os.environ.update({
+        "PROJECT_ID": "benchmark",
+        "QUERY_BACKEND": "bigquery",
+        "QUERY_CACHE_DIR": tempfile.mkdtemp(prefix="benchmark-cache-"),
+        "TOKEN_INDEX_PATH": os.path.join(tempfile.mkdtemp(prefix="benchmark-tokens-"), "tokens.db"),
+        "MICRO_BATCH_WINDOW_MS": "0",
+        "WARM_UP": "false",
+    })
+    os.environ.pop("WALLET_HISTORY_DB", None)
+
+    started = time.perf_counter()
+    import mcp_server
+    import_seconds = time.perf_counter() - started
+    heavy_modules = [module for module in HEAVY_MODULES if module in sys.modules]
+
+    started = time.perf_counter()
+    fake_bigquery.install(fake_bigquery.FakeProfile(
+        dry_run_latency_seconds=args.dry_run_latency,
+        job_latency_seconds=args.job_latency,
+        page_latency_seconds=0,
+    ))
+    bigquery_import_seconds = time.perf_counter() - started
+
+    async def calls() -> List[float]:
+        if args.warm_up:
+            from crypto_client import crypto_client
+            await crypto_client.warm_up()
+        seconds = []
+        for wallet in ("0x" + "1" * 40, "0x" + "2" * 40):
+            started = time.perf_counter()
+            await mcp_server.get_eth_transfers(wallet)
+            seconds.append(time.perf_counter() - started)
+        return seconds
+
+    first_call_seconds, second_call_seconds = asyncio.run(calls())
+    return {
+        "import_seconds": import_seconds,
+        "heavy_modules_at_import": heavy_modules,
+        "bigquery_import_seconds": bigquery_import_seconds,
+        "first_call_seconds": first_call_seconds,
+        "second_call_seconds": second_call_seconds,
+    }
+
+def run_probes(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run args.runs cold starts, each in a new interpreter, and take the median of each timing."""
+    command = [sys.executable, __file__, "--probe",
+               "--dry-run-latency", str(args.dry_run_latency), "--job-latency", str(args.job_latency)]
+    if args.warm_up:
+        command.append("--warm-up")
+    probes = []
+    for _ in range(args.runs):
+        completed = subprocess.run(command, capture_output=True, text=True, check=True)
+        probes.append(json.loads(completed.stdout))
+    report = {
+        metric: round(statistics.median(probe[metric] for probe in probes), 4)
+        for metric in ("import_seconds", "bigquery_import_seconds", "first_call_seconds", "second_call_seconds")
+    }
+    report["heavy_modules_at_import"] = sorted({module for probe in probes for module in probe["heavy_modules_at_import"]})
+    return report
+
+def find_regressions(report: Dict[str, Any], max_import_seconds: float) -> List[str]:
+    """
+    Startup problems in a report.
+
+    Args:
+        report (Dict[str, Any]): Median timings from run_probes
+        max_import_seconds (float): Allowed import time of mcp_server, or 0 for no limit
+
+    Returns:
+        List[str]: A message per problem found
+    """
+    regressions = [f"{module} is imported at startup" for module in report["heavy_modules_at_import"]]
+    if max_import_seconds and report["import_seconds"] > max_import_seconds:
+        regressions.append(f"importing mcp_server took {report['import_seconds']:.2f}s (limit {max_import_seconds:.2f}s)")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure server import time and first-call latency")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Cold starts to take the median of")
+    parser.add_argument("--dry-run-latency", type=float, default=fake_bigquery.FakeProfile.dry_run_latency_seconds)
+    parser.add_argument("--job-latency", type=float, default=fake_bigquery.FakeProfile.job_latency_seconds)
+    parser.add_argument("--warm-up", action="store_true", help="Run the background warm-up before the first call")
+    parser.add_argument("--max-import-seconds", type=float, default=0, help="Fail if importing the server takes longer")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(args)))
+        sys.exit(0)
+
+    report = run_probes(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    regressions = find_regressions(report, args.max_import_seconds)
+    for regression in regressions:
+        print(f"Startup regression: {regression}")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, List, Optional
+from query_backend import QueryBackend
+from query_builder import QueryParameter, window_parameters
+
+if TYPE_CHECKING:
+    from summary_tables import SummaryTables
+
+@dataclass(frozen=True)
+class SummaryState:
+    """The days the summary tables hold: from coverage_start up to refreshed_through (a UTC midnight)."""
+    coverage_start: datetime
+    refreshed_through: datetime
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def split_window(days: int, refreshed_through: datetime) -> Optional[List[QueryParameter]]:
+    """
+    Window parameters of a query reading whole days from the summaries and the rest from the raw tables.
+
+    Args:
+        days (int): Number of days to look back
+        refreshed_through (datetime): How far the summaries reach (a UTC midnight)
+
+    Returns:
+        Optional[List[QueryParameter]]: @start_time, @summary_start (the first midnight of the window)
+            and @summary_end (refreshed_through), or None if the summaries hold no whole day of the window
+    """
+    start = window_parameters(days)[0]
+    summary_start = start.value.replace(hour=0, minute=0)
+    if summary_start < start.value:
+        summary_start += timedelta(days=1)
+    if refreshed_through <= summary_start:
+        return None
+    return [start, QueryParameter("summary_start", "TIMESTAMP", summary_start),
+            QueryParameter("summary_end", "TIMESTAMP", refreshed_through)]
+
+async def load_state(backend: QueryBackend, tables: "SummaryTables") -> Optional[SummaryState]:
+    """
+    Read how far the summary tables reach.
+
+    Args:
+        backend (QueryBackend): The backend holding the tables
+        tables (SummaryTables): The summary tables
+
+    Returns:
+        Optional[SummaryState]: The summarized days, or None before the first refresh
+    """
+    rows = await backend.execute_query(tables.state_query())
+    if not rows or rows[0]["refreshed_through"] is None:
+        return None
+    return SummaryState(_utc(rows[0]["coverage_start"]), _utc(rows[0]["refreshed_through"]))
@@ -0,0 +1,257 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+from crypto_queries import CryptoQueries
+from query_builder import Query, QueryParameter, TransferTable, wallet_transfers
+from summary_state import SummaryState, split_window
+
+# Columns of each summary table, and the columns it is clustered by
+SUMMARY_SCHEMAS = {
+    "wallet_daily": ("wallet_id STRING, day DATE, first_seen TIMESTAMP, last_seen TIMESTAMP, transactions INT64",
+                     "wallet_id"),
+    "wallet_token_daily": ("wallet_id STRING, day DATE, token_address STRING, transaction_count INT64, "
+                           "sent_raw FLOAT64, received_raw FLOAT64", "wallet_id, token_address"),
+    "wallet_contracts": ("address STRING, created_at TIMESTAMP", "address"),
+    "summary_refresh": ("coverage_start TIMESTAMP, refreshed_through TIMESTAMP, refreshed_at TIMESTAMP", ""),
+}
+
+# The two stretches of a window read from the raw tables: the partial first day, and the time since the last refresh
+RAW_HEAD_FILTER = "block_timestamp >= @start_time AND block_timestamp < @summary_start"
+RAW_TAIL_FILTER = "block_timestamp >= @summary_end"
+SUMMARY_DAYS_FILTER = "day >= CAST(@summary_start AS DATE) AND day < CAST(@summary_end AS DATE)"
+
+def _raw_transfers(table: TransferTable, columns: str, received_columns: Optional[str] = None) -> str:
+    """The rows of a window's wallets outside the summarized days (see split_window)."""
+    return "UNION ALL".join(wallet_transfers(table, columns, window_filter, received_columns=received_columns)
+                            for window_filter in (RAW_HEAD_FILTER, RAW_TAIL_FILTER))
+
+class SummaryTables:
+    """
+    Builders for our per-wallet summary tables: their DDL, the incremental refresh and the queries they answer.
+
+    wallet_daily and wallet_token_daily hold one row per wallet and day
+    (and token), partitioned by day and clustered by address, so a wallet's
+    summary over a window reads a few small blocks instead of the raw
+    transfer tables. Only whole days are summarized; summary_refresh
+    records how far they reach. The queries they answer read the partial
+    first day of a window and the days since the last refresh from the raw
+    tables, so they return what the raw queries would.
+
+    Args:
+        dataset (str): The dataset holding the tables ("project.dataset"), or "" for unqualified names
+        partitioned (bool, optional): Whether to create the tables partitioned and clustered (BigQuery). Defaults to True.
+    """
+
+    def __init__(self, dataset: str, partitioned: bool = True):
+        self.dataset = dataset
+        self.partitioned = partitioned
+
+    def table(self, name: str) -> str:
+        return f"`{self.dataset}.{name}`" if self.dataset else name
+
+    def create_queries(self) -> List[Query]:
+        """The CREATE TABLE IF NOT EXISTS statements of every summary table."""
+        queries = []
+        for name, (columns, cluster) in SUMMARY_SCHEMAS.items():
+            options = ""
+            if self.partitioned and cluster:
+                options = f"{'PARTITION BY day ' if 'day DATE' in columns else ''}CLUSTER BY {cluster}"
+            queries.append(Query(f"CREATE TABLE IF NOT EXISTS {self.table(name)} ({columns}) {options}",
+                                 shape=f"summary_create_{name}"))
+        return queries
+
+    def state_query(self) -> Query:
+        sql = f"""
+        SELECT MIN(coverage_start) AS coverage_start, MAX(refreshed_through) AS refreshed_through
+        FROM {self.table("summary_refresh")}
+        """
+        return Query(sql, shape="summary_state")
+
+    def _merge(self, name: str, fresh: str, keys: List[str], columns: List[str], window: List[QueryParameter]) -> Query:
+        """
+        MERGE rows computed from the raw tables into a summary table.
+
+        Matched rows are replaced rather than added to, so merging a window again (a rerun after a failed
+        refresh) leaves the same result.
+        """
+        target = self.table(name)
+        on = " AND ".join(f"summary.{key} = fresh.{key}" for key in keys)
+        if "day" in keys:
+            on += " AND summary.day >= CAST(@start_time AS DATE)"
+        updates = ", ".join(f"{column} = fresh.{column}" for column in columns if column not in keys)
+        sql = f"""
+        MERGE INTO {target} AS summary
+        USING ({fresh}) AS fresh
+        ON {on}
+        WHEN MATCHED THEN UPDATE SET {updates}
+        WHEN NOT MATCHED THEN INSERT ({", ".join(columns)}) VALUES ({", ".join(f"fresh.{column}" for column in columns)})
+        """
+        return Query(sql, tuple(window), f"summary_refresh_{name}")
+
+    def refresh_queries(self, start: datetime, end: datetime) -> List[Query]:
+        """
+        The MERGE statements summarizing the raw rows of whole days [start, end).
+
+        Args:
+            start (datetime): First day to summarize (a UTC midnight)
+            end (datetime): Day after the last one to summarize (a UTC midnight)
+
+        Returns:
+            List[Query]: One MERGE per summary table
+        """
+        window = [QueryParameter("start_time", "TIMESTAMP", start), QueryParameter("end_time", "TIMESTAMP", end)]
+        window_filter = "block_timestamp >= @start_time AND block_timestamp < @end_time"
+        transactions = wallet_transfers(CryptoQueries.TRANSACTIONS, "block_timestamp", window_filter, all_wallets=True)
+        token_transfers = wallet_transfers(CryptoQueries.TOKEN_TRANSFERS, CryptoQueries.TOKEN_SENT_COLUMNS + ", block_timestamp",
+                                           window_filter, received_columns=CryptoQueries.TOKEN_RECEIVED_COLUMNS + ", block_timestamp",
+                                           all_wallets=True)
+        return [
+            self._merge("wallet_daily", f"""
+                WITH matched AS ({transactions})
+                SELECT wallet_id, CAST(block_timestamp AS DATE) AS day, MIN(block_timestamp) AS first_seen,
+                    MAX(block_timestamp) AS last_seen, COUNT(*) AS transactions
+                FROM matched
+                GROUP BY 1, 2
+            """, ["wallet_id", "day"], ["wallet_id", "day", "first_seen", "last_seen", "transactions"], window),
+            self._merge("wallet_token_daily", f"""
+                WITH matched AS ({token_transfers})
+                SELECT wallet_id, CAST(block_timestamp AS DATE) AS day, token_address, COUNT(*) AS transaction_count,
+                    SUM(sent_raw) AS sent_raw, SUM(received_raw) AS received_raw
+                FROM matched
+                GROUP BY 1, 2, 3
+            """, ["wallet_id", "day", "token_address"],
+                ["wallet_id", "day", "token_address", "transaction_count", "sent_raw", "received_raw"], window),
+            self._merge("wallet_contracts", f"""
+                SELECT address, MIN(block_timestamp) AS created_at
+                FROM {CryptoQueries.CONTRACTS_TABLE}
+                WHERE {window_filter}
+                GROUP BY address
+            """, ["address"], ["address", "created_at"], window),
+        ]
+
+    def mark_refreshed(self, state: SummaryState) -> Query:
+        sql = f"""
+        INSERT INTO {self.table("summary_refresh")} (coverage_start, refreshed_through, refreshed_at)
+        VALUES (@coverage_start, @refreshed_through, @refreshed_at)
+        """
+        parameters = (
+            QueryParameter("coverage_start", "TIMESTAMP", state.coverage_start),
+            QueryParameter("refreshed_through", "TIMESTAMP", state.refreshed_through),
+            QueryParameter("refreshed_at", "TIMESTAMP", datetime.now(timezone.utc)),
+        )
+        return Query(sql, parameters, "summary_mark_refreshed")
+
+    def top_tokens(self, wallet_ids: List[str], days: int, limit: int, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None, refreshed_through: Optional[datetime] = None) -> Query:
+        """
+        Build the per-token raw volume query of CryptoQueries.top_tokens over wallet_token_daily.
+
+        Whole days up to refreshed_through come from wallet_token_daily, the rest from the raw transfers.
+
+        Args:
+            wallet_ids (List[str]): The Ethereum wallet addresses to query
+            days (int): Number of days to look back
+            limit (int): Unused; the top tokens are picked on the client
+            since (Optional[datetime]): Unused; summaries only answer whole windows. Defaults to None.
+            until (Optional[datetime]): Unused; summaries only answer whole windows. Defaults to None.
+            refreshed_through (Optional[datetime]): How far the summaries reach (see load_state)
+
+        Returns:
+            Query: The parameterized query; the raw tables' query if the summaries hold no whole day of the window
+        """
+        window = split_window(days, refreshed_through)
+        if window is None:
+            return CryptoQueries.top_tokens(wallet_ids, days, limit)
+        transfers = _raw_transfers(CryptoQueries.TOKEN_TRANSFERS, CryptoQueries.TOKEN_SENT_COLUMNS,
+                                   CryptoQueries.TOKEN_RECEIVED_COLUMNS)
+        sql = f"""
+        WITH matched AS ({transfers}),
+
+        token_days AS (
+            SELECT wallet_id, token_address, transaction_count, sent_raw, received_raw
+            FROM {self.table("wallet_token_daily")}
+            WHERE wallet_id IN UNNEST(@wallet_ids)
+                AND {SUMMARY_DAYS_FILTER}
+            UNION ALL
+            SELECT wallet_id, token_address, 1 AS transaction_count, sent_raw, received_raw
+            FROM matched
+        )
+
+        SELECT
+            wallet_id,
+            token_address,
+            SUM(transaction_count) AS transaction_count,
+            SUM(sent_raw) AS sent_raw,
+            SUM(received_raw) AS received_raw
+        FROM token_days
+        GROUP BY wallet_id, token_address
+        ORDER BY wallet_id
+        """
+        parameters = (QueryParameter("wallet_ids", "STRING", tuple(wallet_ids)), *window)
+        return Query(sql, parameters, "top_tokens_summary")
+
+    def wallet_info(self, wallet_ids: List[str], days: int, limit: Optional[int] = None, since: Optional[datetime] = None,
+                    until: Optional[datetime] = None, refreshed_through: Optional[datetime] = None) -> Query:
+        """
+        Build the query of CryptoQueries.wallet_info over wallet_daily and wallet_contracts.
+
+        Whole days up to refreshed_through come from the summaries, the rest from the raw tables.
+
+        Args:
+            wallet_ids (List[str]): The Ethereum wallet addresses to query
+            days (int): Number of days to look back
+            limit (Optional[int]): Unused; there is one row per wallet. Defaults to None.
+            since (Optional[datetime]): Unused; summaries only answer whole windows. Defaults to None.
+            until (Optional[datetime]): Unused; summaries only answer whole windows. Defaults to None.
+            refreshed_through (Optional[datetime]): How far the summaries reach (see load_state)
+
+        Returns:
+            Query: The parameterized query; the raw tables' query if the summaries hold no whole day of the window
+        """
+        window = split_window(days, refreshed_through)
+        if window is None:
+            return CryptoQueries.wallet_info(wallet_ids, days, limit)
+        transactions = _raw_transfers(CryptoQueries.TRANSACTIONS, "block_timestamp")
+        sql = f"""
+        WITH matched AS ({transactions}),
+
+        wallet_days AS (
+            SELECT wallet_id, first_seen, transactions
+            FROM {self.table("wallet_daily")}
+            WHERE wallet_id IN UNNEST(@wallet_ids)
+                AND {SUMMARY_DAYS_FILTER}
+            UNION ALL
+            SELECT wallet_id, block_timestamp AS first_seen, 1 AS transactions
+            FROM matched
+        ),
+
+        wallet_stats AS (
+            SELECT
+                wallet_id,
+                MIN(first_seen) AS first_seen,
+                SUM(transactions) AS total_transactions
+            FROM wallet_days
+            GROUP BY wallet_id
+        ),
+
+        contracts AS (
+            SELECT address
+            FROM {self.table("wallet_contracts")}
+            WHERE address IN UNNEST(@wallet_ids)
+                AND created_at >= @start_time
+            UNION ALL
+            SELECT address
+            FROM {CryptoQueries.CONTRACTS_TABLE}
+            WHERE address IN UNNEST(@wallet_ids)
+                AND {RAW_TAIL_FILTER}
+        )
+
+        SELECT
+            wallet_id,
+            ws.first_seen,
+            IFNULL(ws.total_transactions, 0) AS total_transactions,
+            wallet_id IN (SELECT address FROM contracts) AS is_contract
+        FROM UNNEST(@wallet_ids) AS wallet_id
+        LEFT JOIN wallet_stats ws USING (wallet_id)
+        """
+        parameters = (QueryParameter("wallet_ids", "STRING", tuple(wallet_ids)), *window)
+        return Query(sql, parameters, "wallet_info_summary")
@@ -0,0 +1,263 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Deque, Dict, Iterator, Optional
+from settings import getenv
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # opentelemetry is optional; spans are only emitted when it is installed
+    otel_trace = None
+
+HAS_OTEL = otel_trace is not None
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "wallet_profiler"
+# What each tool call records, summed over the work it causes
+TRACE_FIELDS = {
+    "dry_runs": "Dry-run estimates sent to BigQuery",
+    "dry_run_seconds": "Time spent waiting for dry runs",
+    "estimate_cache_hits": "Dry-run estimates served from the estimate cache",
+    "queue_wait_seconds": "Time queued for a job slot or the caller's job rate",
+    "jobs": "Query jobs run",
+    "summary_queries": "Queries answered from the precomputed summary tables instead of the raw tables",
+    "hedged_jobs": "Slow query jobs submitted a second time (hedged)",
+    "jobs_cancelled": "Query jobs cancelled (deadline passed, request cancelled, or a hedge lost)",
+    "job_seconds": "Time from job submission until the job is done",
+    "slot_ms": "Slot milliseconds consumed by query jobs",
+    "bytes_processed": "Bytes processed by query jobs",
+    "bytes_billed": "Bytes billed for query jobs",
+    "fetch_seconds": "Time reading job results, including row conversion",
+    "conversion_seconds": "Time converting result rows to dictionaries",
+    "local_query_seconds": "Time running queries on the local backend",
+    "cache_hits": "Result cache lookups answered from the cache",
+    "cache_misses": "Result cache lookups that missed",
+    "deduplicated": "Queries shared with an identical query already in flight",
+    "rows": "Rows returned to the caller",
+    "serialization_seconds": "Time encoding the response in the compact layout",
+    "sampled_responses": "Responses whose serialized size was measured (TELEMETRY_RESPONSE_SIZE_SAMPLE_RATE)",
+    "response_bytes": "Size of the serialized response, of sampled responses only",
+}
+# Upper bounds (seconds) of the tool latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Trace:
+    """Timings and counts of one tool call."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.time()
+        self.seconds = 0.0
+        self.error: Optional[str] = None
+        self.values: Dict[str, float] = defaultdict(float)
+        # Blocking work records from worker threads
+        self._lock = threading.Lock()
+
+    def add(self, field: str, amount: float = 1) -> None:
+        with self._lock:
+            self.values[field] += amount
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "tool": self.name,
+            "started": self.started,
+            "seconds": self.seconds,
+            "error": self.error,
+            **self.values,
+        }
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+
+def record(field: str, amount: float = 1) -> None:
+    """
+    Add to a field of the current tool call's trace; a no-op outside a traced call.
+
+    Args:
+        field (str): One of TRACE_FIELDS
+        amount (float, optional): Amount to add. Defaults to 1.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(field, amount)
+
+@contextmanager
+def detached_trace(name: str) -> Iterator[Trace]:
+    """
+    Record the work done in the block into a trace of its own rather than the current tool call's.
+
+    For work done for several calls at once, e.g. a merged batch; each
+    call then takes its part with record_share.
+
+    Args:
+        name (str): Name of the work
+
+    Yields:
+        Trace: The work's trace
+    """
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+def record_share(trace: Trace, share: float) -> None:
+    """
+    Add a share of every field of a detached trace to the current tool call's trace.
+
+    Args:
+        trace (Trace): The detached trace
+        share (float): The part of it the current call accounts for, e.g. 1 / number of calls served
+    """
+    for field, value in list(trace.values.items()):
+        record(field, value * share)
+
+@contextmanager
+def timed(field: str) -> Iterator[None]:
+    """
+    Add the time spent in the block to a field of the current trace, as an OpenTelemetry span when enabled.
+
+    Args:
+        field (str): One of TRACE_FIELDS
+    """
+    started = time.perf_counter()
+    with metrics.span(field):
+        try:
+            yield
+        finally:
+            record(field, time.perf_counter() - started)
+
+class _ToolStats:
+    """Totals of every call of one tool."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.totals: Dict[str, float] = defaultdict(float)
+
+class Metrics:
+    """
+    Per-tool totals and recent traces of the MCP tool calls.
+
+    Components call record() and timed() wherever they do work; the values
+    land in the trace of the tool call they run under (context variables
+    follow tasks and the BigQuery worker threads). Finished traces are
+    logged, summed per tool and kept for get_metrics.
+    """
+    DEFAULT_RECENT_TRACES = 100
+
+    def __init__(self, recent_traces: int = DEFAULT_RECENT_TRACES, otel: bool = False):
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=recent_traces)
+        self._tools: Dict[str, _ToolStats] = defaultdict(_ToolStats)
+        self._tracer = otel_trace.get_tracer(METRIC_PREFIX) if otel and HAS_OTEL else None
+
+    def span(self, name: str):
+        """An OpenTelemetry span when spans are enabled, else a no-op context."""
+        return self._tracer.start_as_current_span(name) if self._tracer else nullcontext()
+
+    @contextmanager
+    def trace(self, name: str) -> Iterator[Trace]:
+        """
+        Trace one tool call; work done inside the block records into the yielded trace.
+
+        Args:
+            name (str): The tool name
+
+        Yields:
+            Trace: The call's trace
+        """
+        trace = Trace(name)
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+        try:
+            with self.span(f"tool.{name}") as span:
+                try:
+                    yield trace
+                except Exception as e:
+                    trace.error = type(e).__name__
+                    raise
+                finally:
+                    trace.seconds = time.perf_counter() - started
+                    if span is not None:
+                        span.set_attributes({"error": trace.error or "", **trace.values})
+        finally:
+            _current_trace.reset(token)
+            self._observe(trace)
+
+    def _observe(self, trace: Trace) -> None:
+        stats = self._tools[trace.name]
+        stats.calls += 1
+        stats.errors += trace.error is not None
+        stats.seconds += trace.seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            stats.buckets[i] += trace.seconds <= bound
+        for field, value in trace.values.items():
+            stats.totals[field] += value
+        self.recent.append(trace.as_dict())
+        logger.info("%s %.3fs%s %s", trace.name, trace.seconds, f" error={trace.error}" if trace.error else "",
+                    " ".join(f"{field}={value:g}" for field, value in trace.values.items()))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Totals per tool and the most recent traces.
+
+        Returns:
+            Dict[str, Any]: "tools" maps each tool to its calls, errors, mean seconds and
+                summed TRACE_FIELDS; "recent" lists the latest traces, oldest first
+        """
+        return {
+            "tools": {
+                name: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "mean_seconds": stats.seconds / stats.calls,
+                    **stats.totals,
+                }
+                for name, stats in self._tools.items()
+            },
+            "recent": list(self.recent),
+        }
+
+    def prometheus(self) -> str:
+        """
+        Render the per-tool totals in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text
+        """
+        tools = sorted(self._tools.items())
+        lines = [
+            f"# HELP {METRIC_PREFIX}_tool_calls_total MCP tool calls",
+            f"# TYPE {METRIC_PREFIX}_tool_calls_total counter",
+            *(f'{METRIC_PREFIX}_tool_calls_total{{tool="{name}"}} {stats.calls}' for name, stats in tools),
+            f"# HELP {METRIC_PREFIX}_tool_errors_total MCP tool calls that raised",
+            f"# TYPE {METRIC_PREFIX}_tool_errors_total counter",
+            *(f'{METRIC_PREFIX}_tool_errors_total{{tool="{name}"}} {stats.errors}' for name, stats in tools),
+            f"# HELP {METRIC_PREFIX}_tool_duration_seconds MCP tool call latency",
+            f"# TYPE {METRIC_PREFIX}_tool_duration_seconds histogram",
+        ]
+        for name, stats in tools:
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                lines.append(f'{METRIC_PREFIX}_tool_duration_seconds_bucket{{tool="{name}",le="{bound}"}} {count}')
+            lines += [
+                f'{METRIC_PREFIX}_tool_duration_seconds_bucket{{tool="{name}",le="+Inf"}} {stats.calls}',
+                f'{METRIC_PREFIX}_tool_duration_seconds_sum{{tool="{name}"}} {stats.seconds}',
+                f'{METRIC_PREFIX}_tool_duration_seconds_count{{tool="{name}"}} {stats.calls}',
+            ]
+        for field, description in TRACE_FIELDS.items():
+            metric = f"{METRIC_PREFIX}_{field}_total"
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+            lines += [f'{metric}{{tool="{name}"}} {stats.totals.get(field, 0):g}' for name, stats in tools]
+        return "\n".join(lines) + "\n"
+
+# Create a singleton instance
+metrics = Metrics(
+    recent_traces=int(getenv("TELEMETRY_RECENT_TRACES", Metrics.DEFAULT_RECENT_TRACES)),
+    otel=getenv("TELEMETRY_OTEL", "false").lower() == "true"
+)
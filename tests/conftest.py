@@ -0,0 +1,61 @@
+import dataclasses
+import os
+import tempfile
+import pytest
+
+# Tests run against the emulated BigQuery client (fake_bigquery.py), isolated from local
+# configuration and state; set before any module reads its configuration
+_STATE_DIR = tempfile.mkdtemp(prefix="wallet-profiler-tests-")
+os.environ.update({
+    "PROJECT_ID": "test",
+    "QUERY_BACKEND": "bigquery",
+    "QUERY_CACHE_DIR": os.path.join(_STATE_DIR, "cache"),
+    "TOKEN_INDEX_PATH": os.path.join(_STATE_DIR, "tokens.db"),
+    "MICRO_BATCH_WINDOW_MS": "0",
+    "GOVERNOR_CALLER_BUDGET_GB": "0",
+    "GOVERNOR_GLOBAL_BUDGET_GB": "0",
+    "GOVERNOR_JOBS_PER_MINUTE": "0",
+    "GOVERNOR_MAX_JOBS_PER_CALLER": "0",
+    "TOOL_DEADLINE_SECONDS": "0",
+})
+for _name in ("WALLET_HISTORY_DB", "SUMMARY_DATASET", "BIGQUERY_TRUSTED_SHAPES", "COMPACT_RESPONSES"):
+    os.environ.pop(_name, None)
+
+import fake_bigquery
+
+# Short latencies, so tests exercise the same paths as the benchmark in a fraction of the time
+TEST_PROFILE = fake_bigquery.FakeProfile(rows_per_wallet=50, dry_run_latency_seconds=0.0,
+                                         job_latency_seconds=0.05, page_latency_seconds=0.0, page_size=20)
+fake_bigquery.install(TEST_PROFILE)
+
+@pytest.fixture
+def fake_profile(monkeypatch) -> fake_bigquery.FakeProfile:
+    """The emulated client's latencies and sizes for one test; change its fields before querying."""
+    profile = dataclasses.replace(TEST_PROFILE)
+    monkeypatch.setattr(fake_bigquery.FakeBigQueryClient, "profile", profile)
+    return profile
+
+@pytest.fixture
+def make_bigquery(fake_profile, monkeypatch):
+    """Build a BigQueryClient over the emulated client, with extra environment variables."""
+    from bigquery_client import BigQueryClient
+
+    def make(**env) -> BigQueryClient:
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        return BigQueryClient()
+    return make
+
+@pytest.fixture
+def make_crypto(make_bigquery, monkeypatch, tmp_path):
+    """Build a CryptoClient with its own cache and token index, querying a fresh BigQueryClient."""
+    from crypto_client import CryptoClient
+
+    def make(**env) -> CryptoClient:
+        monkeypatch.setenv("QUERY_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setenv("TOKEN_INDEX_PATH", str(tmp_path / "tokens.db"))
+        backend = make_bigquery(**env)
+        client = CryptoClient()
+        client.backend = client.tokens.backend = backend
+        return client
+    return make
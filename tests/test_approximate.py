@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+
+WALLET = "0x" + "9" * 40
+
+def test_approximate_queries_bill_the_sample(make_crypto):
+    exact, approximate = make_crypto(), make_crypto(APPROXIMATE_SAMPLE_PERCENT=10)
+    asyncio.run(exact.get_top_tokens(WALLET, days=10, limit=5))
+    asyncio.run(approximate.get_top_tokens(WALLET, days=10, limit=5, mode="approximate"))
+    exact_bytes = exact.backend.client.counters["bytes_processed"]
+    sampled_bytes = approximate.backend.client.counters["bytes_processed"]
+    assert sampled_bytes == pytest.approx(exact_bytes / 10, rel=0.2)
+
+def test_top_tokens_are_scaled_up_with_error_bounds(make_crypto):
+    client = make_crypto(APPROXIMATE_SAMPLE_PERCENT=10)
+    result = asyncio.run(client.get_top_tokens(WALLET, days=10, limit=5, mode="approximate"))
+    assert (result["mode"], result["sample_percent"], result["days"]) == ("approximate", 10.0, 10)
+    assert 0 < len(result["rows"]) <= 5
+    counts = [token["transaction_count"] for token in result["rows"]]
+    for token in result["rows"]:
+        # Sample counts are scaled by 1 / 10%
+        assert token["transaction_count"] % 10 == 0
+        assert 0 < token["transaction_count_error"] and 0 < token["volume_relative_error"]
+
+    # Results are cached per day-aligned window, so a second call runs no job
+    jobs = client.backend.client.counters["jobs"]
+    again = asyncio.run(client.get_top_tokens(WALLET, days=10, limit=5, mode="approximate"))
+    assert [token["transaction_count"] for token in again["rows"]] == counts
+    assert client.backend.client.counters["jobs"] == jobs
+
+def test_empty_samples_still_bound_the_total(make_crypto):
+    client = make_crypto(APPROXIMATE_SAMPLE_PERCENT=10)
+    assert client._estimate(0) == (0, 19)
+    assert client._estimate(100) == (1000, 186)
+
+def test_unknown_modes_are_rejected(make_crypto):
+    client = make_crypto()
+    with pytest.raises(ValueError, match="Unsupported mode"):
+        asyncio.run(client.get_wallet_info(WALLET, days=10, mode="sampled"))
+
+def test_oversize_approximate_requests_are_not_answered_with_exact_rows(monkeypatch):
+    import mcp_server
+    from bigquery_client import bigquery_client
+
+    monkeypatch.setattr(bigquery_client, "max_query_size_gb", 0.001)
+    result = asyncio.run(mcp_server.get_top_tokens("0x" + "6" * 40, days=10, mode="approximate"))
+    assert result["mode"] == "approximate" and "error" in result and "truncated" not in result
+    # Exact requests still fall back to the largest window that fits, or its error
+    exact = asyncio.run(mcp_server.get_top_tokens("0x" + "6" * 40, days=10))
+    assert "mode" not in exact
@@ -0,0 +1,29 @@
+import argparse
+import asyncio
+import pytest
+
+pytest.importorskip("numpy")
+
+def test_run_target_summarizes_calls_against_the_emulator(make_crypto):
+    import benchmark
+
+    client = make_crypto()
+    args = argparse.Namespace(requests=6, concurrency=3, wallet_pool=0)
+    result = asyncio.run(benchmark.run_target(client.get_eth_transfers, 0, args, client.backend.client))
+    assert result["jobs_per_request"] == 1 and result["dry_runs_per_request"] <= 1
+    assert result["rows_per_request"] == 50
+    assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+def test_wallet_pool_repeats_wallets_from_the_cache(make_crypto):
+    import benchmark
+
+    client = make_crypto()
+    args = argparse.Namespace(requests=6, concurrency=1, wallet_pool=2)
+    result = asyncio.run(benchmark.run_target(client.get_eth_transfers, 0, args, client.backend.client))
+    assert result["jobs_per_request"] == pytest.approx(2 / 6)
+
+def test_row_conversion_is_measured_per_path():
+    import benchmark
+
+    result = benchmark.measure_row_conversion(100)
+    assert result["pages_us_per_row"] > 0
@@ -0,0 +1,45 @@
+import asyncio
+import time
+from query_builder import Query, QueryParameter
+
+def _query(n: int) -> Query:
+    return Query("SELECT * FROM transfers WHERE wallet_id IN UNNEST(@wallet_ids)",
+                 (QueryParameter("wallet_ids", "STRING", (f"0x{n:040x}",)),), "eth_transfers")
+
+async def _run_all(client, count: int) -> float:
+    started = time.perf_counter()
+    results = await asyncio.gather(*(client.execute_query(_query(n)) for n in range(count)))
+    assert all(len(rows) == 50 for rows in results)
+    return time.perf_counter() - started
+
+def test_concurrent_queries_overlap(make_bigquery, fake_profile):
+    fake_profile.job_latency_seconds = 0.25
+    client = make_bigquery(BIGQUERY_MAX_CONCURRENT_QUERIES=4)
+    # Run one after the other, four jobs would take at least 1s
+    assert asyncio.run(_run_all(client, 4)) < 0.8
+
+def test_concurrent_queries_are_bounded(make_bigquery, fake_profile):
+    fake_profile.job_latency_seconds = 0.25
+    client = make_bigquery(BIGQUERY_MAX_CONCURRENT_QUERIES=2)
+    assert asyncio.run(_run_all(client, 4)) >= 0.5
+
+def test_event_loop_stays_free_while_jobs_run(make_bigquery, fake_profile):
+    fake_profile.job_latency_seconds = 0.3
+    client = make_bigquery()
+
+    async def main() -> int:
+        ticks = 0
+        query = asyncio.ensure_future(client.execute_query(_query(0)))
+        while not query.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        await query
+        return ticks
+
+    assert asyncio.run(main()) > 10
+
+def test_result_carries_bytes_processed(make_bigquery):
+    client = make_bigquery()
+    rows = asyncio.run(client.execute_query(_query(0)))
+    assert rows.bytes_processed > 0
+    assert rows[0]["wallet_id"] == f"0x{0:040x}"
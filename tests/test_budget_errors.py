@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from budget_governor import BudgetGovernor, QuotaExceeded
+
+def test_rate_limited_jobs_report_when_to_retry():
+    governor = BudgetGovernor(caller_budget_gb=0, global_budget_gb=0, jobs_per_minute=1, job_burst=1, max_queue_seconds=5)
+
+    async def main():
+        async with governor.admit(("alice",), 0):
+            pass
+        async with governor.admit(("alice",), 0):
+            pass
+
+    with pytest.raises(QuotaExceeded) as raised:
+        asyncio.run(main())
+    assert 55 < raised.value.retry_after_seconds <= 60
+
+def test_over_budget_jobs_report_when_usage_leaves_the_window():
+    governor = BudgetGovernor(caller_budget_gb=10, global_budget_gb=0, budget_window_seconds=3600, jobs_per_minute=0)
+
+    async def main(estimated_gb):
+        async with governor.admit(("alice",), int(estimated_gb * 1e9)) as reservation:
+            reservation.billed_bytes = int(estimated_gb * 1e9)
+
+    asyncio.run(main(8))
+    with pytest.raises(QuotaExceeded) as raised:
+        asyncio.run(main(5))
+    assert 3590 < raised.value.retry_after_seconds <= 3600
+    # More than the whole budget never fits
+    with pytest.raises(QuotaExceeded) as raised:
+        asyncio.run(main(20))
+    assert raised.value.retry_after_seconds is None
+
+def test_tools_answer_over_budget_calls_with_the_quota_error(monkeypatch):
+    import mcp_server
+    from bigquery_client import bigquery_client
+
+    # 30 GB per 30-day eth_transfers query (see fake_bigquery.py)
+    monkeypatch.setattr(bigquery_client.governor, "caller_budget_bytes", 40_000_000_000)
+    monkeypatch.setattr(bigquery_client.governor, "_callers", {})
+
+    async def main():
+        first = await mcp_server.get_eth_transfers("0x" + "4" * 40, days=30)
+        second = await mcp_server.get_eth_transfers("0x" + "5" * 40, days=30)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert isinstance(first, list)
+    assert "truncated" not in second and "byte budget" in second["error"]
+    assert 0 < second["retry_after_seconds"] <= bigquery_client.governor.budget_window_seconds
+
+def test_callers_with_every_slot_taken_are_turned_away_after_the_queue_time():
+    governor = BudgetGovernor(caller_budget_gb=0, global_budget_gb=0, jobs_per_minute=0,
+                              max_jobs_per_caller=1, max_queue_seconds=0.2)
+
+    async def main():
+        async with governor.admit(("alice",), 0):
+            async with governor.admit(("bob",), 0):
+                pass
+            async with governor.admit(("alice",), 0):
+                pass
+
+    with pytest.raises(QuotaExceeded) as raised:
+        asyncio.run(main())
+    assert "jobs running" in str(raised.value) and raised.value.retry_after_seconds > 0
+    assert governor.report("alice")["rejected"] == 1
+
+def test_rate_limited_callers_do_not_hold_the_shared_job_slots(make_bigquery):
+    import contextvars
+    import time
+    from crypto_queries import QUERY_BUILDERS
+
+    client = make_bigquery(BIGQUERY_MAX_CONCURRENT_QUERIES=1, GOVERNOR_JOBS_PER_MINUTE=60, GOVERNOR_JOB_BURST=1,
+                           GOVERNOR_MAX_QUEUE_SECONDS=5)
+    caller = contextvars.ContextVar("caller")
+    client.governor.resolve_caller = caller.get
+
+    async def run(name, wallet):
+        caller.set(name)
+        started = time.perf_counter()
+        await client.execute_query(QUERY_BUILDERS["eth_transfers"]([wallet], 10, 5))
+        return time.perf_counter() - started
+
+    async def main():
+        await run("alice", "0x" + "1" * 40)
+        # alice's next job waits about a second for her job rate; bob's job must not wait behind it
+        return await asyncio.gather(run("alice", "0x" + "2" * 40), run("bob", "0x" + "3" * 40))
+
+    alice, bob = asyncio.run(main())
+    assert alice > 0.8 and bob < 0.5
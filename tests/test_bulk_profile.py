@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import json
+import pytest
+
+pytest.importorskip("numpy")
+
+WALLETS = ["0x" + f"{n:x}" * 40 for n in range(1, 7)]
+
+def _args(tmp_path, lines, **options) -> argparse.Namespace:
+    source = tmp_path / "wallets.txt"
+    source.write_text("".join(f"{line}\n" for line in lines))
+    values = dict(input=str(source), output=str(tmp_path / "profiles.jsonl"), format="jsonl", checkpoint=None,
+                  days=10, batch_size=2, concurrency=2, workers=1, max_rows=20, top=3)
+    values.update(options)
+    return argparse.Namespace(**values)
+
+@pytest.fixture
+def client(make_crypto, monkeypatch):
+    client = make_crypto()
+    monkeypatch.setattr("crypto_client.crypto_client", client)
+    return client
+
+def test_failed_batches_are_counted_and_left_for_the_next_run(client, tmp_path, monkeypatch):
+    from bulk_profile import run
+
+    fetch = client.fetch_profile_rows
+
+    async def failing(wallet_ids, days, max_rows):
+        if WALLETS[2] in wallet_ids:
+            raise RuntimeError("connection reset")
+        return await fetch(wallet_ids, days, max_rows)
+
+    monkeypatch.setattr(client, "fetch_profile_rows", failing)
+    args = _args(tmp_path, WALLETS)
+    report = asyncio.run(run(args))
+    assert (report["profiled"], report["failed"]) == (4, 2)
+    written = [json.loads(line)["wallet_id"] for line in open(args.output)]
+    assert sorted(written) == sorted(WALLETS[:2] + WALLETS[4:])
+    assert sorted(open(f"{args.output}.checkpoint").read().split()) == sorted(written)
+
+    # The rerun only queries the failed batch
+    monkeypatch.setattr(client, "fetch_profile_rows", fetch)
+    report = asyncio.run(run(args))
+    assert (report["profiled"], report["previously_finished"], report["failed"]) == (2, 4, 0)
+
+def test_batches_in_flight_are_cancelled_before_the_files_are_closed(client, tmp_path, monkeypatch):
+    import bulk_profile
+
+    events = []
+
+    async def slow(wallet_ids, days, max_rows):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+
+    close = bulk_profile.Checkpoint.close
+
+    def closing(checkpoint):
+        events.append("closed")
+        close(checkpoint)
+
+    monkeypatch.setattr(client, "fetch_profile_rows", slow)
+    monkeypatch.setattr(bulk_profile.Checkpoint, "close", closing)
+    args = _args(tmp_path, WALLETS)
+    with pytest.raises(TimeoutError):
+        asyncio.run(asyncio.wait_for(bulk_profile.run(args), 0.5))
+    assert events == ["cancelled", "cancelled", "closed"]
+    assert open(f"{args.output}.checkpoint").read() == ""
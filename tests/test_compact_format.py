@@ -0,0 +1,67 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+from compact_format import COMPACT_FORMAT, decode, dumps, encode
+
+TIME_BASE = datetime(2026, 1, 2, 12, 0, tzinfo=timezone.utc)
+WALLET = "0x" + "d" * 40
+OTHER = "0x" + "e" * 40
+
+def test_nested_results_round_trip():
+    result = {
+        "wallet_id": WALLET,
+        "totals": {"eth_sent": 1.5, "transactions": 3},
+        "transfers": [
+            {"block_timestamp": TIME_BASE - timedelta(hours=1), "from_address": WALLET, "to_address": OTHER,
+             "value": Decimal("2.5"), "symbol": "USDC", "is_contract": False, "note": "first"},
+            {"block_timestamp": TIME_BASE - timedelta(days=2), "from_address": OTHER, "to_address": WALLET,
+             "value": 7, "symbol": "USDC", "is_contract": True, "note": None},
+            # Columns missing from a row come back as None
+            {"block_timestamp": TIME_BASE - timedelta(hours=36), "from_address": WALLET, "to_address": None,
+             "value": 0.25, "symbol": "WETH", "is_contract": None},
+        ],
+        "daily": [{"day": "2026-01-01T00:00:00", "tokens": [{"symbol": "USDC", "count": 2}]}],
+        "empty": [],
+    }
+    compact = encode(result, time_base=TIME_BASE)
+    assert compact["format"] == COMPACT_FORMAT
+    assert compact["dictionary"].count(WALLET) == 1
+
+    transfers = compact["result"]["transfers"]
+    assert transfers["types"] == ["time", "ref", "ref", "float", "ref", "bool", "str"]
+    assert transfers["data"][0] == [3600, 2 * 86400, 36 * 3600]
+
+    decoded = decode(json.loads(dumps(compact)))
+    assert decoded == {
+        **result,
+        "transfers": [
+            {**result["transfers"][0], "value": 2.5},
+            {**result["transfers"][1], "value": 7.0},
+            {**result["transfers"][2], "note": None},
+        ],
+        "daily": [{"day": datetime(2026, 1, 1, tzinfo=timezone.utc), "tokens": [{"symbol": "USDC", "count": 2}]}],
+    }
+
+def test_floats_keep_their_significant_digits():
+    rows = [{"value": 123456.789}, {"value": 0.000123456789}, {"value": 0.0}]
+    decoded = decode(encode(rows, digits=4, time_base=TIME_BASE))
+    assert [row["value"] for row in decoded] == [123500.0, 0.0001235, 0.0]
+
+def test_query_rows_round_trip_within_the_encoding_precision(make_crypto):
+    client = make_crypto()
+    rows = asyncio.run(client.get_eth_transfers("0x" + "7" * 40, days=10, limit=20))
+    compact = encode(rows)
+    assert len(dumps(compact)) < len(dumps(rows))
+
+    decoded = decode(json.loads(dumps(compact)))
+    assert len(decoded) == len(rows)
+    for original, row in zip(rows, decoded):
+        assert row.keys() == original.keys()
+        assert abs(row["block_timestamp"] - original["block_timestamp"]) <= timedelta(seconds=1)
+        for name, value in original.items():
+            if isinstance(value, float):
+                assert row[name] == pytest.approx(value, rel=1e-5)
+            elif name != "block_timestamp":
+                assert row[name] == value
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+
+pytest.importorskip("numpy")
+
+ROOT = "0x" + "a" * 40
+LEFT = "0x" + "1" * 40
+RIGHT = "0x" + "2" * 40
+
+def _edge(wallet_id: str, counterparty: str, sent: float, received: float = 0.0):
+    return {"wallet_id": wallet_id, "counterparty": counterparty, "transfer_count": 1,
+            "sent": sent, "received": received}
+
+def _pairs(graph):
+    return sorted(tuple(sorted((edge["source"], edge["target"]))) for edge in graph["edges"])
+
+def test_pairs_returned_from_both_sides_become_one_edge():
+    from counterparty_graph import GraphBuilder
+
+    builder = GraphBuilder(ROOT, max_nodes=10)
+    assert builder.add_hop([ROOT], [_edge(ROOT, LEFT, 5.0), _edge(ROOT, RIGHT, 3.0)], 1) == [LEFT, RIGHT]
+    builder.add_hop([LEFT, RIGHT], [
+        _edge(LEFT, ROOT, 0.0, 5.0), _edge(LEFT, RIGHT, 2.0),
+        _edge(RIGHT, ROOT, 0.0, 3.0), _edge(RIGHT, LEFT, 0.0, 2.0),
+    ], 2)
+    assert _pairs(builder.build().as_dict()) == sorted([(LEFT, ROOT), (RIGHT, ROOT), (LEFT, RIGHT)])
+
+def test_pairs_cut_from_one_side_are_kept_from_the_other():
+    from counterparty_graph import GraphBuilder
+
+    builder = GraphBuilder(ROOT, max_nodes=10)
+    builder.add_hop([ROOT], [_edge(ROOT, LEFT, 5.0), _edge(ROOT, RIGHT, 3.0)], 1)
+    # LEFT's rows were cut at the limit before RIGHT; RIGHT still returns the pair
+    builder.add_hop([LEFT, RIGHT], [_edge(LEFT, ROOT, 0.0, 5.0), _edge(RIGHT, LEFT, 0.0, 2.0)], 2)
+    graph = builder.build().as_dict()
+    assert _pairs(graph) == sorted([(LEFT, ROOT), (RIGHT, ROOT), (LEFT, RIGHT)])
+    assert [edge for edge in graph["edges"] if {edge["source"], edge["target"]} == {LEFT, RIGHT}] == [
+        {"source": RIGHT, "target": LEFT, "transfer_count": 1, "sent": 0.0, "received": 2.0}
+    ]
+
+def test_pairs_missing_from_the_roots_rows_are_added_later():
+    from counterparty_graph import GraphBuilder
+
+    builder = GraphBuilder(ROOT, max_nodes=10)
+    builder.add_hop([ROOT], [_edge(ROOT, LEFT, 5.0)], 1)
+    # RIGHT is discovered through LEFT, then returns its pair with the root
+    assert builder.add_hop([LEFT], [_edge(LEFT, RIGHT, 4.0)], 2) == [RIGHT]
+    builder.add_hop([RIGHT], [_edge(RIGHT, ROOT, 1.0), _edge(RIGHT, LEFT, 0.0, 4.0)], 3)
+    assert _pairs(builder.build().as_dict()) == sorted([(LEFT, ROOT), (LEFT, RIGHT), (RIGHT, ROOT)])
+
+def test_graph_has_no_duplicate_pairs(make_crypto):
+    client = make_crypto()
+    graph = asyncio.run(client.get_counterparty_graph(ROOT, hops=3, max_nodes=60))
+    pairs = _pairs(graph)
+    assert len(pairs) == len(set(pairs)) > 0
+    assert len(graph["nodes"]) <= 60
+    assert graph["queries"] <= 3
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+
+WALLETS = [f"0x{n:040x}" for n in range(1, 4)]
+
+def test_batch_runs_one_query_for_all_wallets(make_crypto):
+    client = make_crypto()
+    results = asyncio.run(client.get_eth_transfers_batch(WALLETS, days=10, limit=20))
+    assert list(results) == WALLETS
+    assert all(len(rows) == 20 and "wallet_id" not in rows[0] for rows in results.values())
+    assert client.backend.client.counters["jobs"] == 1
+
+def test_batched_wallets_are_cached_for_single_wallet_calls(make_crypto):
+    client = make_crypto()
+
+    async def main():
+        batched = await client.get_eth_transfers_batch(WALLETS, days=10, limit=20)
+        return batched, await client.get_eth_transfers(WALLETS[1].upper(), days=10, limit=20)
+
+    batched, single = asyncio.run(main())
+    assert single == batched[WALLETS[1]]
+    assert client.backend.client.counters["jobs"] == 1
+
+def test_batched_wallet_info_is_cached_for_any_limit(make_crypto):
+    client = make_crypto()
+
+    async def main():
+        batched = await client.get_wallet_info_batch(WALLETS, days=10)
+        return batched, await client.get_wallet_info(WALLETS[1], days=10), await client.get_wallet_info(WALLETS[2], days=10, limit=5)
+
+    batched, default_limit, small_limit = asyncio.run(main())
+    assert (default_limit, small_limit) == (batched[WALLETS[1]], batched[WALLETS[2]])
+    assert client.backend.client.counters["jobs"] == 1
+
+def test_batch_only_queries_uncached_wallets(make_crypto, fake_profile):
+    client = make_crypto()
+
+    async def main():
+        await client.get_eth_transfers(WALLETS[0], days=10, limit=20)
+        await client.get_eth_transfers_batch(WALLETS, days=10, limit=20)
+
+    asyncio.run(main())
+    assert client.backend.client.counters["jobs"] == 2
+
+def test_batch_rejects_too_many_wallets(make_crypto):
+    client = make_crypto()
+    wallets = [f"0x{n:040x}" for n in range(client.MAX_BATCH_WALLETS + 1)]
+    with pytest.raises(ValueError, match=str(client.MAX_BATCH_WALLETS)):
+        asyncio.run(client.get_wallet_info_batch(wallets))
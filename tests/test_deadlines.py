@@ -0,0 +1,100 @@
+import asyncio
+import time
+import pytest
+from crypto_queries import QUERY_BUILDERS
+from budget_governor import DEFAULT_CALLER
+from deadlines import deadline, remaining
+
+WALLET = "0x" + "b" * 40
+
+def test_nested_deadlines_only_shorten():
+    with deadline(10):
+        with deadline(60):
+            assert remaining() <= 10
+        with deadline(1):
+            assert remaining() <= 1
+    assert remaining() is None
+
+def test_jobs_are_cancelled_when_the_call_times_out(make_crypto, fake_profile):
+    fake_profile.job_latency_seconds = 2.0
+    client = make_crypto()
+
+    async def main():
+        try:
+            with deadline(0.3):
+                async with asyncio.timeout(0.3):
+                    await client.get_eth_transfers(WALLET, days=10, limit=5)
+        except TimeoutError:
+            pass
+        # Cancellation runs on the worker pool
+        await asyncio.sleep(0.2)
+
+    asyncio.run(main())
+    assert client.backend.client.counters["cancelled"] == 1
+
+def test_profile_sections_missing_the_deadline_are_left_out(make_crypto, fake_profile):
+    client = make_crypto()
+    # The profile is over size, so its sections are queried on their own (see test_wallet_profile.py)
+    client.backend.max_query_size_gb = 20
+
+    async def main():
+        await client.tokens.refresh()
+        fake_profile.job_latency_seconds = 1.0
+        with deadline(client.PARTIAL_RESULT_MARGIN_SECONDS + 0.2):
+            return await client.get_wallet_profile(WALLET, days=10, limit=5)
+
+    profile = asyncio.run(main())
+    assert profile["partial"]
+    assert all(profile[section] is None for section in ("wallet_info", "eth_transfers", "top_tokens", "usdc_transactions"))
+
+def test_slow_jobs_are_hedged_and_the_loser_cancelled(make_bigquery, fake_profile):
+    # With seed 1 the first job stalls and the next one does not
+    fake_profile.seed, fake_profile.slow_job_fraction, fake_profile.slow_job_latency_seconds = 1, 0.5, 5.0
+    client = make_bigquery(BIGQUERY_HEDGE_PERCENTILE=90)
+    for _ in range(client.latencies.MIN_SAMPLES):
+        client.latencies.add(fake_profile.job_latency_seconds)
+    query = QUERY_BUILDERS["eth_transfers"]([WALLET], 10, 5)
+
+    async def main():
+        started = time.perf_counter()
+        rows = await client.execute_query(query)
+        await asyncio.sleep(0.2)
+        return rows, time.perf_counter() - started
+
+    rows, seconds = asyncio.run(main())
+    assert rows and seconds < 2
+    assert client.client.counters["jobs"] == 2 and client.client.counters["cancelled"] == 1
+    # Both copies are billed to the caller, the cancelled one at its estimate
+    usage = client.governor.report(DEFAULT_CALLER)
+    assert usage["jobs"] == 2 and usage["billed_bytes"] == pytest.approx(client.client.counters["bytes_processed"], rel=1e-6)
+
+def _hedged(make_bigquery, fake_profile, **env):
+    """A client hedging after its job latency samples, over jobs of which some stall (seed 1: the first)."""
+    fake_profile.seed, fake_profile.slow_job_fraction, fake_profile.slow_job_latency_seconds = 1, 0.5, 1.0
+    client = make_bigquery(BIGQUERY_HEDGE_PERCENTILE=90, **env)
+    for _ in range(client.latencies.MIN_SAMPLES):
+        client.latencies.add(fake_profile.job_latency_seconds)
+    return client
+
+def test_hedges_wait_for_a_job_slot_of_their_own(make_bigquery, fake_profile):
+    client = _hedged(make_bigquery, fake_profile, BIGQUERY_MAX_CONCURRENT_QUERIES=1)
+
+    async def main():
+        rows = await client.execute_query(QUERY_BUILDERS["eth_transfers"]([WALLET], 10, 5))
+        await asyncio.sleep(0.2)
+        return rows
+
+    assert asyncio.run(main())
+    # The hedge never got the only slot, so it was never submitted
+    assert client.client.counters["jobs"] == 1 and client.client.counters["cancelled"] == 0
+
+def test_copies_failing_fast_do_not_win(make_bigquery, fake_profile):
+    # With seed 1 the first job stalls and the hedge fails as soon as it is submitted
+    fake_profile.failed_job_fraction = 0.5
+    client = _hedged(make_bigquery, fake_profile)
+    samples = len(client.latencies._samples)
+
+    rows = asyncio.run(client.execute_query(QUERY_BUILDERS["eth_transfers"]([WALLET], 10, 5)))
+    assert rows and client.client.counters["jobs"] == 2
+    # Only the stalled copy's latency is sampled
+    assert len(client.latencies._samples) == samples + 1 and max(client.latencies._samples) >= 1.0
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from crypto_queries import QUERY_BUILDERS
+
+pytest.importorskip("duckdb")
+
+WALLET = "0x" + "6" * 40
+
+@pytest.fixture
+def extract_dir(tmp_path):
+    """A manifest of transaction extracts covering the 30 days up to 10 minutes ago."""
+    from extract_parquet import update_manifest
+
+    now = datetime.now(timezone.utc)
+    update_manifest(str(tmp_path), ["transactions"], now - timedelta(days=30), now - timedelta(minutes=10), None)
+    return str(tmp_path)
+
+def test_windows_up_to_now_are_not_covered_by_an_older_extract(extract_dir):
+    from duckdb_backend import DuckDBBackend
+
+    backend = DuckDBBackend(extract_dir)
+    assert not backend.covers(QUERY_BUILDERS["eth_transfers"]([WALLET], 7, 10))
+
+def test_windows_ending_by_the_extract_end_are_covered(extract_dir):
+    from duckdb_backend import DuckDBBackend
+
+    backend = DuckDBBackend(extract_dir)
+    until = datetime.now(timezone.utc) - timedelta(days=1)
+    assert backend.covers(QUERY_BUILDERS["eth_transfers"]([WALLET], 7, 10, until=until))
+    assert not backend.covers(QUERY_BUILDERS["eth_transfers"]([WALLET], 40, 10, until=until))
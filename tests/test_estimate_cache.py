@@ -0,0 +1,35 @@
+import asyncio
+from crypto_queries import QUERY_BUILDERS
+
+WALLETS = [f"0x{n:040x}" for n in range(1, 6)]
+
+def _query(wallet_id: str, days: int = 30):
+    return QUERY_BUILDERS["eth_transfers"]([wallet_id], days, 10)
+
+def test_estimates_are_shared_by_template_and_window(make_bigquery):
+    client = make_bigquery()
+
+    async def main():
+        for wallet_id in WALLETS[:3]:
+            await client.estimate_cached(_query(wallet_id))
+        await client.estimate_cached(_query(WALLETS[0], days=60))
+
+    asyncio.run(main())
+    assert client.client.counters["dry_runs"] == 2
+
+def test_concurrent_first_lookups_share_one_dry_run(make_bigquery, fake_profile):
+    fake_profile.dry_run_latency_seconds = 0.1
+    client = make_bigquery()
+
+    async def main():
+        return await asyncio.gather(*(client.estimate_cached(_query(wallet_id)) for wallet_id in WALLETS))
+
+    estimates = asyncio.run(main())
+    assert client.client.counters["dry_runs"] == 1
+    assert len(set(estimates)) == 1
+
+def test_trusted_shapes_skip_the_dry_run(make_bigquery):
+    client = make_bigquery(BIGQUERY_TRUSTED_SHAPES="eth_transfers")
+    rows = asyncio.run(client.execute_query(_query(WALLETS[0])))
+    assert rows and client.client.counters["dry_runs"] == 0
+    assert client.estimates.counters["skipped"] == 1
@@ -0,0 +1,104 @@
+import asyncio
+import contextvars
+from deadlines import deadline, remaining
+from micro_batcher import MicroBatcher
+from telemetry import Metrics, record
+
+WALLETS = [f"0x{n:040x}" for n in range(1, 4)]
+
+def test_concurrent_requests_share_one_query(make_crypto):
+    client = make_crypto(MICRO_BATCH_WINDOW_MS=20)
+
+    async def main():
+        return await asyncio.gather(*(client.get_eth_transfers(wallet_id, days=10, limit=20) for wallet_id in WALLETS))
+
+    results = asyncio.run(main())
+    assert [len(rows) for rows in results] == [20, 20, 20]
+    assert client.backend.client.counters["jobs"] == 1
+    assert client.batcher.counters == {"requests": 3, "batches": 1}
+
+def test_callers_of_the_same_wallet_get_their_own_rows(make_crypto):
+    client = make_crypto(MICRO_BATCH_WINDOW_MS=20, QUERY_CACHE_TTL_SECONDS=0)
+
+    async def main():
+        return await asyncio.gather(*(client.get_eth_transfers(WALLETS[0], days=10, limit=20) for _ in range(2)))
+
+    first, second = asyncio.run(main())
+    assert first == second and first[0] is not second[0]
+    assert client.backend.client.counters["jobs"] == 1
+
+def test_batch_runs_until_the_latest_deadline_of_its_callers():
+    batcher = MicroBatcher(window_ms=10)
+    seen = []
+
+    async def run_batch(wallet_ids):
+        seen.append(remaining())
+        return {wallet_id: wallet_id for wallet_id in wallet_ids}
+
+    async def call(wallet_id, seconds):
+        with deadline(seconds):
+            return await batcher.submit("key", wallet_id, run_batch)
+
+    async def main():
+        # The short-deadline caller opens the window; its deadline must not cut the batch short
+        return await asyncio.gather(call(WALLETS[0], 0.5), call(WALLETS[1], 30))
+
+    assert asyncio.run(main()) == WALLETS[:2]
+    assert seen[0] > 20
+
+def test_batch_without_a_deadline_when_a_caller_has_none():
+    batcher = MicroBatcher(window_ms=10)
+    seen = []
+
+    async def run_batch(wallet_ids):
+        seen.append(remaining())
+        return {wallet_id: wallet_id for wallet_id in wallet_ids}
+
+    async def call(wallet_id, seconds):
+        with deadline(seconds):
+            return await batcher.submit("key", wallet_id, run_batch)
+
+    async def main():
+        await asyncio.gather(call(WALLETS[0], 0.5), call(WALLETS[1], None))
+
+    asyncio.run(main())
+    assert seen == [None]
+
+def test_batch_work_is_shared_between_the_callers_traces():
+    batcher = MicroBatcher(window_ms=10)
+    metrics = Metrics()
+
+    async def run_batch(wallet_ids):
+        record("bytes_billed", 100)
+        return {wallet_id: wallet_id for wallet_id in wallet_ids}
+
+    async def call(wallet_id):
+        with metrics.trace(wallet_id) as trace:
+            await batcher.submit("key", wallet_id, run_batch)
+        return trace.values["bytes_billed"]
+
+    async def main():
+        return await asyncio.gather(*(call(wallet_id) for wallet_id in WALLETS[:2]))
+
+    assert asyncio.run(main()) == [50, 50]
+
+def test_batch_bytes_are_billed_to_every_caller(make_crypto):
+    client = make_crypto(MICRO_BATCH_WINDOW_MS=20)
+    caller = contextvars.ContextVar("caller")
+    governor = client.backend.governor
+    governor.resolve_caller = caller.get
+
+    async def call(name, wallet_id):
+        caller.set(name)
+        return await client.get_eth_transfers(wallet_id, days=10, limit=20)
+
+    async def main():
+        await asyncio.gather(call("alice", WALLETS[0]), call("bob", WALLETS[1]))
+
+    asyncio.run(main())
+    alice, bob = governor.report("alice"), governor.report("bob")
+    job_bytes = client.backend.client.counters["bytes_processed"]
+    assert client.backend.client.counters["jobs"] == 1
+    # Shares are rounded up, so a split never bills less than the job
+    assert alice["billed_bytes"] == bob["billed_bytes"] == -(-job_bytes // 2)
+    assert governor.report("default")["billed_bytes"] == 0
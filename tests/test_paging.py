@@ -0,0 +1,53 @@
+import asyncio
+import base64
+import json
+import pytest
+
+WALLET = "0x" + "2" * 40
+
+async def _all_pages(client, page_size: int):
+    page = await client.get_transfers_page("eth_transfers", WALLET, page_size=page_size)
+    pages = [page]
+    while page["next_cursor"] is not None:
+        page = await client.get_transfers_page("eth_transfers", cursor=page["next_cursor"], page_size=page_size)
+        pages.append(page)
+    return pages
+
+def test_cursors_page_through_the_results(make_crypto):
+    client = make_crypto()
+    pages = asyncio.run(_all_pages(client, 20))
+    assert [len(page["rows"]) for page in pages] == [20, 20, 10]
+    assert len({row["hash"] for page in pages for row in page["rows"]}) == 50
+    # Later pages are read from the job's results, not queried again
+    assert client.backend.client.counters["jobs"] == 1
+
+def _forged(table_id: str, offset: int) -> str:
+    state = json.dumps({"table": table_id, "offset": offset}).encode()
+    return base64.urlsafe_b64encode(state).decode()
+
+def test_unsigned_or_altered_cursors_are_refused(make_crypto):
+    client = make_crypto()
+    first = asyncio.run(client.get_transfers_page("eth_transfers", WALLET, page_size=20))
+    state, signature = first["next_cursor"].split(".")
+    table_id = json.loads(base64.urlsafe_b64decode(state))["table"]
+    for cursor in (_forged("bigquery-public-data.other.table", 0), _forged(table_id, 0),
+                   f"{_forged(table_id, 0)}.{signature}", "not a cursor"):
+        with pytest.raises(ValueError, match="Invalid pagination cursor"):
+            asyncio.run(client.get_transfers_page("eth_transfers", cursor=cursor))
+
+def test_cursors_of_another_secret_are_refused(make_bigquery):
+    issuer = make_bigquery(PAGINATION_CURSOR_SECRET="one")
+    cursor = issuer._encode_cursor("fake.results.job", 20)
+    assert make_bigquery(PAGINATION_CURSOR_SECRET="one")._decode_cursor(cursor) == ("fake.results.job", 20)
+    with pytest.raises(ValueError):
+        make_bigquery(PAGINATION_CURSOR_SECRET="two")._decode_cursor(cursor)
+
+def test_local_backend_refuses_cursors(make_crypto, tmp_path):
+    pytest.importorskip("duckdb")
+    from duckdb_backend import DuckDBBackend
+
+    client = make_crypto()
+    cursor = asyncio.run(client.get_transfers_page("eth_transfers", WALLET, page_size=20))["next_cursor"]
+    client.backend = DuckDBBackend(str(tmp_path))
+    with pytest.raises(ValueError, match="does not issue pagination cursors"):
+        asyncio.run(client.get_transfers_page("eth_transfers", cursor=cursor))
@@ -0,0 +1,30 @@
+import asyncio
+import pytest
+
+WALLET = "0x" + "3" * 40
+
+def test_over_size_windows_shrink_to_the_largest_that_fits(make_crypto, fake_profile):
+    # eth_transfers reads both sides of the transactions table: 80 GB per day against the 300 GB limit
+    fake_profile.gb_per_day = 40
+    client = make_crypto()
+    result = asyncio.run(client.fetch_adaptive_window("eth_transfers", WALLET, days=30, limit=20))
+    assert result["truncated"] and result["to_days_ago"] == 0
+    assert result["from_days_ago"] == result["next_offset_days"] == 3
+    assert result["rows"]
+
+def test_trusted_shapes_are_not_estimated(make_crypto, fake_profile):
+    fake_profile.gb_per_day = 50
+    client = make_crypto(BIGQUERY_TRUSTED_SHAPES="eth_transfers")
+    result = asyncio.run(client.fetch_adaptive_window("eth_transfers", WALLET, days=30, limit=20))
+    assert not result["truncated"]
+    assert client.backend.client.counters["dry_runs"] == 0
+
+def test_local_backend_windows_are_not_dry_run(make_crypto, tmp_path):
+    pytest.importorskip("duckdb")
+    from duckdb_backend import DuckDBBackend
+
+    client = make_crypto()
+    bigquery = client.backend
+    client.backend = DuckDBBackend(str(tmp_path))
+    assert asyncio.run(client._fit_window("eth_transfers", WALLET, 0, 30, 20)) == 30
+    assert bigquery.client.counters["dry_runs"] == 0
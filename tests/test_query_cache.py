@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+from query_cache import QueryCache
+
+WALLET = "0x" + "a" * 40
+
+def _transfers(count: int, hours_apart: float = 12):
+    now = datetime.now(timezone.utc)
+    return [{"hash": f"0x{i:064x}", "block_timestamp": now - timedelta(hours=hours_apart * i)} for i in range(count)]
+
+def test_narrower_window_and_smaller_limit_are_subsumed(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    rows = _transfers(100)
+    cache.put("eth_transfers", WALLET, 30, 100, rows, time_ordered=True)
+
+    assert cache.get("eth_transfers", WALLET, 30, 10) == rows[:10]
+    recent = cache.get("eth_transfers", WALLET, 7, 100)
+    assert recent == [row for row in rows if row["block_timestamp"] >= datetime.now(timezone.utc) - timedelta(days=7)]
+    assert cache.counters["subsumed_hits"] == 2
+
+def test_hits_do_not_share_rows_with_the_entry(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    rows = _transfers(10)
+    cache.put("eth_transfers", WALLET, 30, 100, rows, time_ordered=True)
+    rows[0]["hash"] = "changed by the caller that stored it"
+    cache.get("eth_transfers", WALLET, 30, 100)[1]["hash"] = "changed by a caller it answered"
+    assert [row["hash"] for row in cache.get("eth_transfers", WALLET, 30, 100)[:2]] == [f"0x{i:064x}" for i in range(2)]
+
+def test_wider_window_or_larger_limit_miss(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    cache.put("eth_transfers", WALLET, 30, 10, _transfers(10), time_ordered=True)
+    assert cache.get("eth_transfers", WALLET, 60, 10) is None
+    # The cached result hit its limit, so it may be missing rows a larger limit would return
+    assert cache.get("eth_transfers", WALLET, 30, 20) is None
+
+def test_complete_result_answers_a_larger_limit(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    rows = _transfers(5)
+    cache.put("eth_transfers", WALLET, 30, 10, rows, time_ordered=True)
+    assert cache.get("eth_transfers", WALLET, 30, 100) == rows
+
+def test_ranked_results_only_answer_their_own_window(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    tokens = [{"token_address": f"0x{i:040x}", "transaction_count": 10 - i} for i in range(5)]
+    cache.put("top_tokens", WALLET, 30, 5, tokens, time_ordered=False)
+    assert cache.get("top_tokens", WALLET, 30, 3) == tokens[:3]
+    assert cache.get("top_tokens", WALLET, 7, 5) is None
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    rows = _transfers(3)
+    QueryCache(str(tmp_path)).put("eth_transfers", WALLET, 30, 10, rows, time_ordered=True)
+    restarted = QueryCache(str(tmp_path))
+    assert restarted.get("eth_transfers", WALLET, 30, 10) == rows
+    assert restarted.counters["disk_hits"] == 1
+
+def test_expired_entries_miss(tmp_path):
+    cache = QueryCache(str(tmp_path), ttl_seconds=0)
+    cache.put("eth_transfers", WALLET, 30, 10, _transfers(3), time_ordered=True)
+    assert cache.get("eth_transfers", WALLET, 30, 10) is None
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = QueryCache(None, max_memory_mb=0.002)
+    for n in range(3):
+        cache.put("eth_transfers", f"0x{n:040x}", 30, 100, _transfers(10), time_ordered=True)
+    assert cache.get("eth_transfers", f"0x{0:040x}", 30, 100) is None
+    assert cache.get("eth_transfers", f"0x{2:040x}", 30, 100) is not None
+    assert cache.counters["evictions"] > 0
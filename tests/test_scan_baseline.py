@@ -0,0 +1,21 @@
+import asyncio
+import json
+import os
+import crypto_queries
+from scan_baseline import DEFAULT_TOLERANCE, find_regressions, measure_scan_estimates
+
+# Recorded with: python scan_baseline.py --emulated --record
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "scan_baseline.json")
+
+def _regressions(client):
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    return find_regressions(baseline, asyncio.run(measure_scan_estimates(client)), DEFAULT_TOLERANCE)
+
+def test_scan_estimates_stay_within_the_recorded_baseline(make_bigquery):
+    assert _regressions(make_bigquery()) == []
+
+def test_a_template_losing_its_partition_filter_is_caught(make_bigquery, monkeypatch):
+    monkeypatch.setattr(crypto_queries, "time_filter", lambda parameters, column="block_timestamp": "TRUE")
+    regressions = _regressions(make_bigquery())
+    assert {regression.split(":")[0] for regression in regressions} == set(crypto_queries.QUERY_BUILDERS)
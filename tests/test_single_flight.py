@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from crypto_queries import QUERY_BUILDERS
+from deadlines import deadline
+from fake_bigquery import FakeBigQueryClient
+from single_flight import SingleFlight
+from telemetry import Metrics
+
+WALLET = "0x" + "a" * 40
+
+def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.run("key", work) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert results == [("result", False), ("result", True), ("result", True)]
+    assert calls == 1
+    assert flight.counters == {"executed": 1, "deduplicated": 2}
+
+def test_task_is_cancelled_only_with_its_last_caller():
+    flight = SingleFlight()
+
+    async def main():
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(10)
+
+        first = asyncio.ensure_future(flight.run("key", work))
+        second = asyncio.ensure_future(flight.run("key", work))
+        await started.wait()
+        task = flight._in_flight["key"].task
+        first.cancel()
+        await asyncio.sleep(0)
+        assert not task.cancelled()
+        second.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        await asyncio.sleep(0)
+        return task.cancelled()
+
+    assert asyncio.run(main())
+
+def test_every_caller_of_a_shared_query_gets_its_own_rows(make_crypto):
+    # No batching and no result cache, so both calls reach the single-flight path with the same query
+    client = make_crypto(MICRO_BATCH_WINDOW_MS=0, QUERY_CACHE_TTL_SECONDS=0)
+
+    async def main():
+        return await asyncio.gather(client.get_eth_transfers(WALLET, days=10, limit=20),
+                                    client.get_eth_transfers(WALLET, days=10, limit=20))
+
+    first, second = asyncio.run(main())
+    assert len(first) == len(second) == 20
+    assert first == second and first[0] is not second[0]
+    assert client.backend.client.counters["jobs"] == 1
+    assert client.backend.single_flight.counters["deduplicated"] == 1
+
+def test_shared_queries_run_to_the_latest_deadline_of_their_callers(make_bigquery, fake_profile, monkeypatch):
+    fake_profile.dry_run_latency_seconds = 0.2
+    client = make_bigquery()
+    metrics = Metrics()
+    timeouts = []
+    query = FakeBigQueryClient.query
+
+    def recording(fake, sql, job_config=None):
+        if not job_config.dry_run:
+            timeouts.append(int(job_config.job_timeout_ms))
+        return query(fake, sql, job_config=job_config)
+
+    monkeypatch.setattr(FakeBigQueryClient, "query", recording)
+
+    async def call(seconds, delay):
+        await asyncio.sleep(delay)
+        with metrics.trace("get_eth_transfers") as trace, deadline(seconds):
+            await client.execute_query(QUERY_BUILDERS["eth_transfers"]([WALLET], 10, 5))
+        return trace
+
+    async def main():
+        # The second caller joins while the first one's dry run is still running
+        return await asyncio.gather(call(0.5, 0), call(5, 0.05))
+
+    first, second = asyncio.run(main())
+    assert client.client.counters["jobs"] == 1
+    assert len(timeouts) == 1 and timeouts[0] > 4000
+    # The job is accounted for half in each caller's trace
+    assert first.values["jobs"] == second.values["jobs"] == 0.5
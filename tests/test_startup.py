@@ -0,0 +1,33 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from startup_benchmark import HEAVY_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_server_import_defers_heavy_modules(tmp_path):
+    script = (
+        "import json, sys\n"
+        "import mcp_server\n"
+        f"print(json.dumps([module for module in {HEAVY_MODULES!r} if module in sys.modules]))\n"
+    )
+    env = {**os.environ, "WARM_UP": "false", "QUERY_CACHE_DIR": str(tmp_path / "cache"),
+           "TOKEN_INDEX_PATH": str(tmp_path / "tokens.db")}
+    completed = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env,
+                               capture_output=True, text=True, check=True)
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == []
+
+def test_warm_up_estimates_the_default_windows(make_crypto):
+    client = make_crypto()
+
+    async def main():
+        await client.warm_up()
+        dry_runs = client.backend.client.counters["dry_runs"]
+        await client.get_eth_transfers("0x" + "8" * 40)
+        return dry_runs
+
+    dry_runs = asyncio.run(main())
+    assert dry_runs > 0
+    assert client.backend.client.counters["dry_runs"] == dry_runs
@@ -0,0 +1,107 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+import pytest
+from crypto_queries import CryptoQueries
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+WALLETS = ["0x" + f"{n:x}" * 40 for n in range(1, 4)]
+TOKENS = ["0x" + "a" * 39 + f"{n}" for n in range(3)]
+DAYS = 10
+
+def _write(directory, view: str, rows) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    (directory / view).mkdir()
+    pq.write_table(pa.Table.from_pylist(rows), str(directory / view / "part-0.parquet"))
+
+@pytest.fixture
+def now() -> datetime:
+    return datetime.now(timezone.utc)
+
+@pytest.fixture
+def backend(tmp_path, now):
+    """DuckDB over 30 days of synthetic transfers, including the partial first day of the window and today."""
+    from duckdb_backend import DuckDBBackend
+
+    rng = random.Random(7)
+    start = now - timedelta(days=DAYS)
+    # Right before and after the window's start, on its first day, and after the last refresh
+    times = [now - timedelta(hours=rng.uniform(0, 30 * 24)) for _ in range(400)]
+    times += [start - timedelta(minutes=30), start + timedelta(minutes=30), now - timedelta(hours=1)]
+    transactions, transfers = [], []
+    for i, block_timestamp in enumerate(times):
+        sender, recipient = rng.choice(WALLETS), "0x" + f"{rng.randrange(16 ** 40):040x}"
+        if i % 2:
+            sender, recipient = recipient, sender
+        transactions.append({"from_address": sender, "to_address": recipient, "block_timestamp": block_timestamp,
+                             "value": str(rng.randrange(10 ** 18))})
+        transfers.append({"token_address": rng.choice(TOKENS), "from_address": sender, "to_address": recipient,
+                          "value": str(rng.randrange(10 ** 9)), "block_timestamp": block_timestamp})
+    _write(tmp_path, "transactions", transactions)
+    _write(tmp_path, "token_transfers", transfers)
+    # One contract created in the summarized days, one since the last refresh
+    _write(tmp_path, "contracts", [
+        {"address": WALLETS[1], "block_timestamp": now - timedelta(days=5)},
+        {"address": WALLETS[2], "block_timestamp": now - timedelta(hours=2)},
+    ])
+    return DuckDBBackend(str(tmp_path))
+
+def _refreshed(backend, now):
+    from refresh_summaries import refresh
+    from summary_state import load_state
+    from summary_tables import SummaryTables
+
+    tables = SummaryTables("", partitioned=False)
+    # Refreshed through yesterday's midnight (a day of lag), so more than a day is left to the raw tables
+    asyncio.run(refresh(backend, tables, initial_days=30, chunk_days=7, now=now))
+    return tables, asyncio.run(load_state(backend, tables))
+
+def _by_key(rows, *keys):
+    return {tuple(row[key] for key in keys): row for row in rows}
+
+def test_refresh_leaves_the_last_whole_day_to_late_rows(backend, now):
+    tables, state = _refreshed(backend, now)
+    yesterday = (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    assert state.refreshed_through == yesterday
+    assert state.coverage_start == yesterday - timedelta(days=30)
+    rows = asyncio.run(backend.execute_query(tables.state_query()))
+    assert len(rows) == 1
+
+    # Refreshing again has nothing left to merge until the next midnight, then merges the lagging day
+    from refresh_summaries import refresh
+    report = asyncio.run(refresh(backend, tables, initial_days=30, chunk_days=7, now=now))
+    assert report["chunks"] == 0
+    report = asyncio.run(refresh(backend, tables, initial_days=30, chunk_days=7, now=now + timedelta(days=1)))
+    assert report["chunks"] == 1 and report["refreshed_through"] == (yesterday + timedelta(days=1)).isoformat()
+
+def test_summary_queries_match_the_raw_queries(backend, now):
+    tables, state = _refreshed(backend, now)
+
+    raw = _by_key(asyncio.run(backend.execute_query(CryptoQueries.top_tokens(WALLETS, DAYS, 10))),
+                  "wallet_id", "token_address")
+    summarized = _by_key(asyncio.run(backend.execute_query(
+        tables.top_tokens(WALLETS, DAYS, 10, refreshed_through=state.refreshed_through))), "wallet_id", "token_address")
+    assert summarized.keys() == raw.keys()
+    for key, row in raw.items():
+        assert summarized[key]["transaction_count"] == row["transaction_count"]
+        assert summarized[key]["sent_raw"] == pytest.approx(row["sent_raw"])
+        assert summarized[key]["received_raw"] == pytest.approx(row["received_raw"])
+
+    raw = _by_key(asyncio.run(backend.execute_query(CryptoQueries.wallet_info(WALLETS, DAYS))), "wallet_id")
+    summarized = _by_key(asyncio.run(backend.execute_query(
+        tables.wallet_info(WALLETS, DAYS, refreshed_through=state.refreshed_through))), "wallet_id")
+    assert summarized == raw
+    assert [raw[(wallet_id,)]["is_contract"] for wallet_id in WALLETS] == [False, True, True]
+
+def test_windows_without_a_summarized_day_read_the_raw_tables(now):
+    from summary_tables import SummaryTables
+
+    tables = SummaryTables("", partitioned=False)
+    # A 1-day window starts after yesterday's midnight, or right at it within a minute after midnight
+    refreshed_through = (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    assert tables.top_tokens(WALLETS, 1, 10, refreshed_through=refreshed_through).shape == "top_tokens"
+    assert tables.top_tokens(WALLETS, 3, 10, refreshed_through=refreshed_through).shape == "top_tokens_summary"
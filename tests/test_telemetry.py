@@ -0,0 +1,50 @@
+import asyncio
+from telemetry import Metrics
+
+def test_call_traces_collect_work_from_worker_threads(make_crypto):
+    client = make_crypto()
+    metrics = Metrics()
+
+    async def main():
+        with metrics.trace("get_eth_transfers") as trace:
+            await client.get_eth_transfers("0x" + "7" * 40, days=10, limit=20)
+        return trace
+
+    trace = asyncio.run(main())
+    assert trace.values["jobs"] == 1 and trace.values["dry_runs"] == 1
+    assert trace.values["bytes_processed"] == client.backend.client.counters["bytes_processed"]
+    assert trace.values["job_seconds"] > 0 and trace.error is None
+
+def test_snapshot_and_prometheus_sum_calls_per_tool():
+    metrics = Metrics()
+    for _ in range(2):
+        with metrics.trace("get_wallet_info") as trace:
+            trace.add("rows", 3)
+    try:
+        with metrics.trace("get_wallet_info"):
+            raise ValueError("bad wallet")
+    except ValueError:
+        pass
+
+    tool = metrics.snapshot()["tools"]["get_wallet_info"]
+    assert (tool["calls"], tool["errors"], tool["rows"]) == (3, 1, 6)
+    assert metrics.snapshot()["recent"][-1]["error"] == "ValueError"
+    assert 'tool="get_wallet_info"' in metrics.prometheus()
+
+def test_response_sizes_are_measured_on_a_sample_of_calls(monkeypatch):
+    import mcp_app
+    import mcp_server
+    from compact_format import dumps
+    from telemetry import metrics
+
+    def call():
+        result = asyncio.run(mcp_server.get_eth_transfers("0x" + "8" * 40, days=10, limit=5))
+        return result, metrics.recent[-1]
+
+    monkeypatch.setattr(mcp_app, "RESPONSE_SIZE_SAMPLE_RATE", 0.0)
+    _, trace = call()
+    assert "response_bytes" not in trace and "sampled_responses" not in trace
+
+    monkeypatch.setattr(mcp_app, "RESPONSE_SIZE_SAMPLE_RATE", 1.0)
+    result, trace = call()
+    assert trace["sampled_responses"] == 1 and trace["response_bytes"] == len(dumps(result))
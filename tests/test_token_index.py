@@ -0,0 +1,30 @@
+import asyncio
+
+WALLET = "0x" + "9" * 40
+
+def test_transfers_are_labeled_from_the_index(make_crypto):
+    client = make_crypto()
+    rows = asyncio.run(client.get_usdc_transactions(WALLET, days=10, limit=5))
+    assert rows and all((row["token_symbol"], row["token_decimals"]) == ("USDC", 6) for row in rows)
+    assert client.tokens.counters["refreshes"] == 1
+
+def test_top_tokens_are_scaled_and_ranked(make_crypto):
+    client = make_crypto()
+    tokens = asyncio.run(client.get_top_tokens(WALLET, days=10, limit=5))
+    assert len(tokens) == 5 and all(token["decimals"] == 18 for token in tokens)
+    volumes = [token["sent"] + token["received"] for token in tokens]
+    assert volumes == sorted(volumes, reverse=True)
+
+def test_known_tokens_do_not_refresh_the_index(make_crypto):
+    client = make_crypto()
+
+    async def main():
+        await client.tokens.refresh()
+        jobs = client.backend.client.counters["jobs"]
+        found = await client.tokens.lookup(["0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48", "0x" + "0" * 40])
+        return jobs, found
+
+    jobs, found = asyncio.run(main())
+    assert found["0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"].name == "USD Coin"
+    assert client.backend.client.counters["jobs"] == jobs
+    assert not client.tokens.is_stale()
@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from wallet_history import WalletHistoryStore
+
+WALLET = "0x" + "a" * 40
+
+def _transfer(hours_ago: float, n: int):
+    return {"hash": f"0x{n:064x}", "block_timestamp": datetime.now(timezone.utc) - timedelta(hours=hours_ago)}
+
+class _Source:
+    """Transfers of one wallet, newest first, answering the history store's queries."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def window(self, days: int):
+        async def query(since):
+            self.calls.append(since)
+            start = max(since or datetime.min.replace(tzinfo=timezone.utc),
+                        datetime.now(timezone.utc) - timedelta(days=days))
+            return [row for row in self.rows if row["block_timestamp"] >= start]
+        return query
+
+def test_second_sync_only_queries_the_delta(tmp_path):
+    store = WalletHistoryStore(str(tmp_path / "history.db"))
+    source = _Source([_transfer(10, 2), _transfer(20, 1)])
+    first = asyncio.run(store.sync("eth_transfers", WALLET, 30, 100, source.window(30)))
+    assert [row["hash"] for row in first] == [f"0x{2:064x}", f"0x{1:064x}"]
+
+    source.rows.insert(0, _transfer(1, 3))
+    second = asyncio.run(store.sync("eth_transfers", WALLET, 30, 100, source.window(30)))
+    assert source.calls[0] is None
+    assert source.calls[1] == first[0]["block_timestamp"]
+    # The row at the high-water mark comes back with the delta and is stored once
+    assert [row["hash"] for row in second] == [f"0x{n:064x}" for n in (3, 2, 1)]
+
+def test_wider_window_than_the_history_refetches(tmp_path):
+    store = WalletHistoryStore(str(tmp_path / "history.db"))
+    source = _Source([_transfer(10, 2), _transfer(24 * 20, 1)])
+    assert len(asyncio.run(store.sync("eth_transfers", WALLET, 5, 100, source.window(5)))) == 1
+    rows = asyncio.run(store.sync("eth_transfers", WALLET, 30, 100, source.window(30)))
+    # The stored 5 days don't cover 30, so no delta query is made before the full fetch
+    assert source.calls == [None, None]
+    assert len(rows) == 2
+
+def test_history_filling_the_limit_serves_a_wider_window(tmp_path):
+    store = WalletHistoryStore(str(tmp_path / "history.db"))
+    source = _Source([_transfer(10, 3), _transfer(20, 2), _transfer(24 * 20, 1)])
+    asyncio.run(store.sync("eth_transfers", WALLET, 5, 2, source.window(5)))
+    rows = asyncio.run(store.sync("eth_transfers", WALLET, 30, 2, source.window(30)))
+    assert source.calls == [None, source.calls[1]] and source.calls[1] is not None
+    assert [row["hash"] for row in rows] == [f"0x{n:064x}" for n in (3, 2)]
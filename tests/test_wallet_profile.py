@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytest.importorskip("numpy")
+
+WALLET = "0x" + "a" * 40
+OTHER = "0x" + "b" * 40
+TOKEN = "0x" + "c" * 40
+
+def _row(hours_ago: float, sender: str, recipient: str, value: float, token: bool = False):
+    return {
+        "wallet_id": WALLET, "block_timestamp": datetime.now(timezone.utc) - timedelta(hours=hours_ago),
+        "from_address": sender, "to_address": recipient, "token_address": TOKEN if token else None,
+        "value": value, "transaction_hash": f"0x{int(hours_ago):064x}",
+        "gas_price": None if token else 2e10, "gas_used": None if token else 21000,
+        "token_name": "Token" if token else None, "token_symbol": "TKN" if token else None,
+        "token_decimals": 6 if token else None, "wallet_is_contract": False,
+    }
+
+ROWS = [
+    _row(1, WALLET, OTHER, 2e18),
+    _row(2, OTHER, WALLET, 5e18),
+    _row(3, WALLET, OTHER, 3e6, token=True),
+    _row(24 * 10, OTHER, WALLET, 1e18),
+]
+
+def test_views_are_derived_from_the_loaded_rows():
+    from wallet_profile import WalletProfile
+
+    profile = WalletProfile(WALLET, 30, 1000, ROWS)
+    assert [row["value_eth"] for row in profile.eth_transfers(30, 10)] == [2.0, 5.0, 1.0]
+    assert profile.wallet_info(30)["total_transactions"] == 3
+    totals = profile.totals(30)
+    assert (totals["eth_sent"], totals["eth_received"], totals["token_transfers_sent"]) == (2.0, 6.0, 1)
+    assert totals["gas_spent_eth"] == pytest.approx(2e10 * 21000 / 1e18)
+    assert profile.top_tokens(30, 5) == [{"token_address": TOKEN, "name": "Token", "symbol": "TKN", "decimals": 6,
+                                          "transaction_count": 1, "sent": 3.0, "received": 0.0}]
+    assert profile.counterparties(30, 5) == {"distinct_counterparties": 1,
+                                             "top_counterparties": [{"address": OTHER, "transfer_count": 4}]}
+    # Narrower windows are cut from the same columns
+    assert len(profile.eth_transfers(7, 10)) == 2
+    assert not profile.truncated and profile.covers(7, 60) and not profile.covers(60, 60)
+
+def test_full_sources_mark_the_profile_truncated():
+    from wallet_profile import WalletProfile
+
+    assert WalletProfile(WALLET, 30, 3, ROWS).truncated
+
+def test_profile_answers_later_single_wallet_calls(make_crypto):
+    client = make_crypto()
+
+    async def main():
+        profile = await client.get_wallet_profile(WALLET, days=10, limit=5)
+        jobs = client.backend.client.counters["jobs"]
+        transfers = await client.get_eth_transfers(WALLET, days=5, limit=5)
+        return profile, jobs, transfers
+
+    profile, jobs, transfers = asyncio.run(main())
+    assert not profile["partial"] and len(profile["eth_transfers"]) == 5
+    assert client.backend.client.counters["jobs"] == jobs
+    assert transfers == [row for row in profile["eth_transfers"]
+                         if row["block_timestamp"] >= datetime.now(timezone.utc) - timedelta(days=5)][:5]
+
+def test_wallet_profile_sections_come_from_one_job(make_crypto):
+    client = make_crypto()
+
+    async def main():
+        await client.tokens.refresh()
+        jobs = client.backend.client.counters["jobs"]
+        profile = await client.get_wallet_profile(WALLET, days=10, limit=5)
+        return profile, client.backend.client.counters["jobs"] - jobs
+
+    profile, jobs = asyncio.run(main())
+    assert jobs == 1
+    assert set(profile) >= {"wallet_info", "eth_transfers", "top_tokens", "usdc_transactions"}
+
+def test_over_size_profiles_fall_back_to_one_query_per_section(make_crypto):
+    client = make_crypto()
+    # Over 10 days the profile scans 25 GB (see fake_bigquery.py), each section at most 15 GB
+    client.backend.max_query_size_gb = 20
+
+    async def main():
+        await client.tokens.refresh()
+        jobs = client.backend.client.counters["jobs"]
+        profile = await client.get_wallet_profile(WALLET, days=10, limit=5)
+        return profile, client.backend.client.counters["jobs"] - jobs
+
+    profile, jobs = asyncio.run(main())
+    assert jobs == 4 and not profile["partial"]
+    assert len(profile["eth_transfers"]) == 5
@@ -0,0 +1,127 @@
+import asyncio
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, NamedTuple, Optional
+from crypto_queries import CryptoQueries
+from query_backend import QueryBackend
+
+class TokenMetadata(NamedTuple):
+    """Label and scale of one ERC-20 token."""
+    name: Optional[str]
+    symbol: Optional[str]
+    decimals: Optional[int]
+
+class TokenIndex:
+    """
+    Local, persistent token metadata (address -> name, symbol, decimals).
+
+    The public tokens table is loaded in bulk once into SQLite, then kept up
+    to date with incremental refreshes of the tokens added since the newest
+    one indexed, so queries no longer join the tokens table: raw values are
+    scaled and labeled on the client from this index.
+    """
+    DEFAULT_PATH = ".token_index.db"
+    DEFAULT_REFRESH_SECONDS = 3600
+    # Rows per page while loading, so the bulk load is never held in memory at once
+    LOAD_PAGE_SIZE = 10000
+
+    def __init__(self, path: str, backend: QueryBackend, refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        self.path = path
+        self.backend = backend
+        self.refresh_seconds = refresh_seconds
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tokens (
+                address TEXT PRIMARY KEY, name TEXT, symbol TEXT, decimals INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY, value REAL
+            );
+        """)
+        self._refresh_lock = asyncio.Lock()
+        self.counters = {"hits": 0, "misses": 0, "refreshes": 0, "indexed": 0}
+
+    def _state(self, key: str) -> Optional[float]:
+        row = self.conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: float) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO state VALUES (?, ?)", (key, value))
+
+    def is_stale(self) -> bool:
+        """Whether the index was never loaded or was last refreshed more than refresh_seconds ago."""
+        refreshed_at = self._state("refreshed_at")
+        return refreshed_at is None or time.time() - refreshed_at > self.refresh_seconds
+
+    async def refresh(self, only_if_stale: bool = False) -> int:
+        """
+        Load the tokens table, or only the tokens added since the last refresh.
+
+        Args:
+            only_if_stale (bool, optional): Skip the refresh unless the index is stale. Defaults to False.
+
+        Returns:
+            int: Number of tokens written
+
+        Raises:
+            BigQueryQueryTooLarge: If the load would process too much data
+        """
+        async with self._refresh_lock:
+            # Concurrent lookups that all found the index stale refresh it once
+            if only_if_stale and not self.is_stale():
+                return 0
+            indexed_through = self._state("indexed_through")
+            since = None if indexed_through is None else datetime.fromtimestamp(indexed_through, timezone.utc)
+            written = 0
+            async for page in self.backend.execute_query_stream(CryptoQueries.token_metadata(since), self.LOAD_PAGE_SIZE):
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?)",
+                    [(row["address"], row["name"], row["symbol"], row["decimals"]) for row in page]
+                )
+                newest = max((row["indexed_through"] for row in page if row["indexed_through"] is not None), default=None)
+                if newest is not None:
+                    indexed_through = max(indexed_through or 0.0, newest.timestamp())
+                written += len(page)
+            if indexed_through is not None:
+                self._set_state("indexed_through", indexed_through)
+            self._set_state("refreshed_at", time.time())
+            self.conn.commit()
+            self.counters["refreshes"] += 1
+            self.counters["indexed"] += written
+            return written
+
+    def _lookup(self, addresses: Iterable[str]) -> Dict[str, TokenMetadata]:
+        addresses = list(set(addresses))
+        found = {}
+        # Stay under SQLite's limit on bound parameters per statement
+        for start in range(0, len(addresses), 500):
+            chunk = addresses[start:start + 500]
+            cursor = self.conn.execute(
+                f"SELECT address, name, symbol, decimals FROM tokens WHERE address IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            found.update((address, TokenMetadata(name, symbol, decimals)) for address, name, symbol, decimals in cursor)
+        return found
+
+    async def lookup(self, addresses: Iterable[str]) -> Dict[str, TokenMetadata]:
+        """
+        Metadata of the given tokens, refreshing the index first if some are unknown and it is stale.
+
+        Args:
+            addresses (Iterable[str]): Lowercase token addresses
+
+        Returns:
+            Dict[str, TokenMetadata]: Metadata of the tokens found in the index
+
+        Raises:
+            BigQueryQueryTooLarge: If a needed refresh would process too much data
+        """
+        addresses = {address for address in addresses if address is not None}
+        found = self._lookup(addresses)
+        if len(found) < len(addresses) and self.is_stale():
+            await self.refresh(only_if_stale=True)
+            found = self._lookup(addresses)
+        self.counters["hits"] += len(found)
+        self.counters["misses"] += len(addresses) - len(found)
+        return found
@@ -0,0 +1,151 @@
+import pickle
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+@dataclass(frozen=True)
+class SyncStream:
+    """A per-wallet transfer stream: where its rows come from and how to deduplicate them."""
+    chain: str
+    table: str
+    key_columns: Tuple[str, ...]
+
+# Transfer kinds that can be synced incrementally. Token transfer keys include the
+# parties and value so several transfers within one transaction are kept apart.
+SYNC_STREAMS = {
+    "usdc_transactions": SyncStream("ethereum", "token_transfers",
+                                    ("transaction_hash", "from_address", "to_address", "value_eth")),
+    "eth_transfers": SyncStream("ethereum", "transactions", ("hash",)),
+    "sol_transfers": SyncStream("solana", "token_transfers",
+                                ("tx_signature", "source", "destination", "value_sol")),
+}
+
+class WalletHistoryStore:
+    """
+    Local per-wallet transfer store with high-water marks.
+
+    For every (chain, table, wallet) it records the newest block_timestamp already
+    fetched and how far back the stored rows are contiguous, so a refresh only
+    queries the delta since the mark.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                chain TEXT, tbl TEXT, wallet TEXT,
+                high_water REAL, coverage_start REAL,
+                PRIMARY KEY (chain, tbl, wallet)
+            );
+            CREATE TABLE IF NOT EXISTS transfers (
+                chain TEXT, tbl TEXT, wallet TEXT, tx_key TEXT,
+                block_timestamp REAL, row BLOB,
+                PRIMARY KEY (chain, tbl, wallet, tx_key)
+            );
+        """)
+
+    def _mark(self, stream: SyncStream, wallet_id: str) -> Optional[Tuple[float, float]]:
+        return self.conn.execute(
+            "SELECT high_water, coverage_start FROM watermarks WHERE chain = ? AND tbl = ? AND wallet = ?",
+            (stream.chain, stream.table, wallet_id)
+        ).fetchone()
+
+    def _merge(self, stream: SyncStream, wallet_id: str, rows: List[Dict[str, Any]]) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (stream.chain, stream.table, wallet_id,
+                 "|".join(str(row[column]) for column in stream.key_columns),
+                 row["block_timestamp"].timestamp(),
+                 pickle.dumps(row, protocol=pickle.HIGHEST_PROTOCOL))
+                for row in rows
+            ]
+        )
+
+    def _set_mark(self, stream: SyncStream, wallet_id: str, high_water: float, coverage_start: float) -> None:
+        # Rows older than the contiguous coverage can't be served reliably
+        self.conn.execute(
+            "DELETE FROM transfers WHERE chain = ? AND tbl = ? AND wallet = ? AND block_timestamp < ?",
+            (stream.chain, stream.table, wallet_id, coverage_start)
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?, ?)",
+            (stream.chain, stream.table, wallet_id, high_water, coverage_start)
+        )
+        self.conn.commit()
+
+    def _rows_since(self, stream: SyncStream, wallet_id: str, cutoff: float, limit: int) -> List[Dict[str, Any]]:
+        cursor = self.conn.execute(
+            """SELECT row FROM transfers
+               WHERE chain = ? AND tbl = ? AND wallet = ? AND block_timestamp >= ?
+               ORDER BY block_timestamp DESC LIMIT ?""",
+            (stream.chain, stream.table, wallet_id, cutoff, limit)
+        )
+        return [pickle.loads(row) for row, in cursor]
+
+    def _count_since(self, stream: SyncStream, wallet_id: str, cutoff: float, limit: int) -> int:
+        """Stored rows at or after cutoff, counted up to limit."""
+        return self.conn.execute(
+            """SELECT COUNT(*) FROM (
+                   SELECT 1 FROM transfers
+                   WHERE chain = ? AND tbl = ? AND wallet = ? AND block_timestamp >= ?
+                   LIMIT ?)""",
+            (stream.chain, stream.table, wallet_id, cutoff, limit)
+        ).fetchone()[0]
+
+    async def sync(
+        self,
+        kind: str,
+        wallet_id: str,
+        days: int,
+        limit: int,
+        run_query: Callable[[Optional[datetime]], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Bring a wallet's stored transfers up to date and return the requested window.
+
+        Only the rows since the high-water mark are queried when the stored
+        rows reach back to the window's start, or already fill the limit;
+        otherwise the window is fetched in full, without a delta query first.
+
+        Args:
+            kind (str): Transfer kind, one of SYNC_STREAMS
+            wallet_id (str): The wallet address
+            days (int): Number of days to look back
+            limit (int): Maximum number of transfers to return
+            run_query: Coroutine function running the transfer query for the full window
+                (None) or only for rows at or after the given timestamp
+
+        Returns:
+            List[Dict[str, Any]]: Transfers in the window, newest first
+        """
+        stream = SYNC_STREAMS[kind]
+        window_start = (datetime.now(timezone.utc) - timedelta(days=days)).timestamp()
+        mark = self._mark(stream, wallet_id)
+
+        if mark is not None and mark[0] >= window_start and (
+                mark[1] <= window_start or self._count_since(stream, wallet_id, window_start, limit) >= limit):
+            high_water, coverage_start = mark
+            delta = await run_query(datetime.fromtimestamp(high_water, timezone.utc))
+            self._merge(stream, wallet_id, delta)
+            if delta:
+                high_water = max(high_water, delta[0]["block_timestamp"].timestamp())
+                if len(delta) >= limit:
+                    # The delta was truncated, so there may be a gap behind it; its rows alone fill the limit
+                    coverage_start = max(coverage_start, delta[-1]["block_timestamp"].timestamp())
+            self._set_mark(stream, wallet_id, high_water, coverage_start)
+            return self._rows_since(stream, wallet_id, window_start, limit)
+
+        # No usable history for this window: fetch it in full and start over
+        rows = await run_query(None)
+        self.conn.execute(
+            "DELETE FROM transfers WHERE chain = ? AND tbl = ? AND wallet = ?",
+            (stream.chain, stream.table, wallet_id)
+        )
+        self._merge(stream, wallet_id, rows)
+        high_water = rows[0]["block_timestamp"].timestamp() if rows else window_start
+        coverage_start = rows[-1]["block_timestamp"].timestamp() if len(rows) >= limit else window_start
+        self._set_mark(stream, wallet_id, high_water, coverage_start)
+        return rows
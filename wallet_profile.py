@@ -0,0 +1,241 @@
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+import numpy as np
+from crypto_queries import CryptoQueries
+from query_builder import Query, QueryParameter, time_filter, wallet_transfers, window_parameters
+
+SECONDS_PER_DAY = 86400
+
+def profile_query(wallet_ids: List[str], days: int, max_rows: int,
+                  since: Optional[datetime] = None, until: Optional[datetime] = None) -> Query:
+    """
+    Build the raw-transfer query behind a WalletProfile.
+
+    Token transfers and native transactions of the window come back in one
+    job, newest first, with the wallet's contract status attached, so every
+    derived view can be computed locally once the rows are labeled from the
+    token index (token_name, token_symbol, token_decimals). Wallets without
+    activity still return one row (with a NULL block_timestamp).
+
+    Args:
+        wallet_ids (List[str]): The normalized Ethereum wallet addresses to query
+        days (int): Number of days to look back
+        max_rows (int): Maximum rows per wallet and source (token or native)
+        since (Optional[datetime]): Narrower lower bound on block_timestamp. Defaults to None.
+        until (Optional[datetime]): Exclusive upper bound on block_timestamp. Defaults to None.
+
+    Returns:
+        Query: The parameterized query
+    """
+    window = window_parameters(days, since, until)
+    token_rows = wallet_transfers(CryptoQueries.TOKEN_TRANSFERS,
+        "block_timestamp, from_address, to_address, token_address, CAST(value AS FLOAT64) AS value, "
+        "transaction_hash, CAST(NULL AS FLOAT64) AS gas_price, CAST(NULL AS INT64) AS gas_used",
+        time_filter(window))
+    native_rows = wallet_transfers(CryptoQueries.TRANSACTIONS,
+        "block_timestamp, from_address, to_address, CAST(NULL AS STRING) AS token_address, "
+        "CAST(value AS FLOAT64) AS value, `hash` AS transaction_hash, "
+        "CAST(gas_price AS FLOAT64) AS gas_price, receipt_gas_used AS gas_used",
+        time_filter(window))
+    sql = f"""
+    WITH token_rows AS (
+        SELECT * FROM ({token_rows})
+        WHERE TRUE
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY wallet_id ORDER BY block_timestamp DESC) <= @limit
+    ),
+
+    native_rows AS (
+        SELECT * FROM ({native_rows})
+        WHERE TRUE
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY wallet_id ORDER BY block_timestamp DESC) <= @limit
+    ),
+
+    contracts AS (
+        SELECT DISTINCT address
+        FROM {CryptoQueries.CONTRACTS_TABLE}
+        WHERE address IN UNNEST(@wallet_ids)
+            AND {time_filter(window)}
+    )
+
+    SELECT
+        wallet_id,
+        t.block_timestamp,
+        t.from_address,
+        t.to_address,
+        t.token_address,
+        t.value,
+        t.transaction_hash,
+        t.gas_price,
+        t.gas_used,
+        wallet_id IN (SELECT address FROM contracts) AS wallet_is_contract
+    FROM UNNEST(@wallet_ids) AS wallet_id
+    LEFT JOIN (
+        SELECT * FROM token_rows
+        UNION ALL
+        SELECT * FROM native_rows
+    ) t USING (wallet_id)
+    ORDER BY wallet_id, t.block_timestamp DESC
+    """
+    parameters = (
+        QueryParameter("wallet_ids", "STRING", tuple(wallet_ids)),
+        *window,
+        QueryParameter("limit", "INT64", max_rows)
+    )
+    return Query(sql, parameters, "wallet_profile")
+
+def _column(rows: List[Dict[str, Any]], name: str, dtype=object) -> np.ndarray:
+    if dtype is object:
+        return np.array([row[name] for row in rows], dtype=object)
+    return np.array([np.nan if row[name] is None else row[name] for row in rows], dtype=dtype)
+
+def _timestamp(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, timezone.utc)
+
+class WalletProfile:
+    """
+    One wallet's raw transfers for a window, held as NumPy columns.
+
+    Loaded from a single profile_query job; the transfer lists, top tokens,
+    wallet info, totals, counterparties and daily activity are all derived
+    locally from the same columns, for any window up to the loaded one.
+    """
+
+    def __init__(self, wallet_id: str, days: int, max_rows: int, rows: List[Dict[str, Any]]):
+        self.wallet_id = wallet_id
+        self.days = days
+        self.loaded_at = time.time()
+        self.is_contract = bool(rows and rows[0]["wallet_is_contract"])
+        rows = [row for row in rows if row["block_timestamp"] is not None]
+        self.timestamps = np.array([row["block_timestamp"].timestamp() for row in rows], dtype=np.float64)
+        self.from_address = _column(rows, "from_address")
+        self.to_address = _column(rows, "to_address")
+        self.token_address = _column(rows, "token_address")
+        self.transaction_hash = _column(rows, "transaction_hash")
+        self.token_name = _column(rows, "token_name")
+        self.token_symbol = _column(rows, "token_symbol")
+        self.value = _column(rows, "value", np.float64)
+        self.gas_price = _column(rows, "gas_price", np.float64)
+        self.gas_used = _column(rows, "gas_used", np.float64)
+        self.token_decimals = _column(rows, "token_decimals", np.float64)
+        self.is_token = self.token_address != None  # noqa: E711 (elementwise comparison)
+        self.sent = self.from_address == wallet_id
+        self.received = self.to_address == wallet_id
+        # Each source was capped at max_rows server-side; a full source means older rows were cut
+        self.truncated = max(int(self.is_token.sum()), int((~self.is_token).sum())) >= max_rows
+
+    def covers(self, days: int, max_age_seconds: float) -> bool:
+        """Whether this profile can answer a window of the given days exactly and is still fresh."""
+        return not self.truncated and days <= self.days and time.time() - self.loaded_at <= max_age_seconds
+
+    def _window(self, days: int) -> np.ndarray:
+        return self.timestamps >= time.time() - days * SECONDS_PER_DAY
+
+    def usdc_transactions(self, days: int, limit: int) -> List[Dict[str, Any]]:
+        """USDC transfers of the window, newest first, shaped like CryptoClient.get_usdc_transactions."""
+        index = np.flatnonzero(self._window(days) & (self.token_address == CryptoQueries.USDC_TOKEN_ADDRESS))[:limit]
+        return [{
+            "block_timestamp": _timestamp(self.timestamps[i]),
+            "from_address": self.from_address[i],
+            "to_address": self.to_address[i],
+            "token_address": self.token_address[i],
+            "value_eth": float(self.value[i] / 1e6),
+            "transaction_hash": self.transaction_hash[i],
+            "token_name": self.token_name[i],
+            "token_symbol": self.token_symbol[i],
+            "token_decimals": None if np.isnan(self.token_decimals[i]) else int(self.token_decimals[i]),
+        } for i in index]
+
+    def eth_transfers(self, days: int, limit: int) -> List[Dict[str, Any]]:
+        """ETH transfers of the window, newest first, shaped like CryptoClient.get_eth_transfers."""
+        index = np.flatnonzero(self._window(days) & ~self.is_token)[:limit]
+        return [{
+            "block_timestamp": _timestamp(self.timestamps[i]),
+            "from_address": self.from_address[i],
+            "to_address": self.to_address[i],
+            "value_eth": float(self.value[i] / 1e18),
+            "hash": self.transaction_hash[i],
+            "gas_price_gwei": float(self.gas_price[i] / 1e9),
+            "gas_used": None if np.isnan(self.gas_used[i]) else int(self.gas_used[i]),
+        } for i in index]
+
+    def top_tokens(self, days: int, limit: int) -> List[Dict[str, Any]]:
+        """Tokens by volume over the window, shaped like CryptoClient.get_top_tokens."""
+        mask = self._window(days) & self.is_token & ~np.isnan(self.token_decimals)
+        if not mask.any():
+            return []
+        tokens, first, inverse = np.unique(self.token_address[mask].astype(str), return_index=True, return_inverse=True)
+        scale = 10.0 ** self.token_decimals[mask][first]
+        counts = np.bincount(inverse)
+        sent = np.bincount(inverse, weights=np.where(self.sent[mask], self.value[mask], 0.0)) / scale
+        received = np.bincount(inverse, weights=np.where(self.received[mask], self.value[mask], 0.0)) / scale
+        volume = sent + received
+        order = [i for i in np.argsort(-volume, kind="stable") if volume[i] > 0.001][:limit]
+        names, symbols = self.token_name[mask][first], self.token_symbol[mask][first]
+        return [{
+            "token_address": str(tokens[i]),
+            "name": names[i],
+            "symbol": symbols[i],
+            "decimals": int(self.token_decimals[mask][first][i]),
+            "transaction_count": int(counts[i]),
+            "sent": float(sent[i]),
+            "received": float(received[i]),
+        } for i in order]
+
+    def wallet_info(self, days: int) -> Dict[str, Any]:
+        """First seen, transaction count and contract status, shaped like CryptoClient.get_wallet_info."""
+        timestamps = self.timestamps[self._window(days) & ~self.is_token]
+        return {
+            "first_seen": _timestamp(timestamps.min()) if timestamps.size else None,
+            "total_transactions": int(timestamps.size),
+            "is_contract": self.is_contract,
+        }
+
+    def totals(self, days: int) -> Dict[str, Any]:
+        """Sent and received ETH, gas spent, and token transfer counts over the window."""
+        window = self._window(days)
+        native, tokens = window & ~self.is_token, window & self.is_token
+        sent_native = native & self.sent
+        return {
+            "eth_sent": float(self.value[sent_native].sum() / 1e18),
+            "eth_received": float(self.value[native & self.received].sum() / 1e18),
+            "gas_spent_eth": float(np.nansum(self.gas_price[sent_native] * self.gas_used[sent_native]) / 1e18),
+            "token_transfers_sent": int((tokens & self.sent).sum()),
+            "token_transfers_received": int((tokens & self.received).sum()),
+        }
+
+    def counterparties(self, days: int, limit: int) -> Dict[str, Any]:
+        """Distinct counterparties over the window and the most frequent ones."""
+        window = self._window(days)
+        others = np.where(self.sent, self.to_address, self.from_address)[window]
+        others = others[others != None].astype(str)  # noqa: E711 (elementwise comparison)
+        addresses, counts = np.unique(others, return_counts=True)
+        order = np.argsort(-counts, kind="stable")[:limit]
+        return {
+            "distinct_counterparties": int(addresses.size),
+            "top_counterparties": [
+                {"address": str(addresses[i]), "transfer_count": int(counts[i])} for i in order
+            ],
+        }
+
+    def daily_activity(self, days: int) -> List[Dict[str, Any]]:
+        """Transfers per UTC day over the window, oldest day first."""
+        day_numbers = np.floor(self.timestamps[self._window(days)] / SECONDS_PER_DAY).astype(np.int64)
+        day_numbers, counts = np.unique(day_numbers, return_counts=True)
+        return [
+            {"date": _timestamp(day * SECONDS_PER_DAY).date().isoformat(), "transfers": int(count)}
+            for day, count in zip(day_numbers, counts)
+        ]
+
+    def summary(self, limit: int) -> Dict[str, Any]:
+        """Aggregate views over the whole loaded window."""
+        return {
+            "wallet_id": self.wallet_id,
+            "days": self.days,
+            "truncated": self.truncated,
+            "wallet_info": self.wallet_info(self.days),
+            "totals": self.totals(self.days),
+            "top_tokens": self.top_tokens(self.days, limit),
+            "counterparties": self.counterparties(self.days, limit),
+            "daily_activity": self.daily_activity(self.days),
+        }